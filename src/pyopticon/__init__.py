@@ -1,9 +1,11 @@
 from .dashboard import PyOpticonDashboard
 from .utilities.gmail_helper import GmailHelper
 from .utilities.serial_port_scanner import scan_serial_ports
+from .utilities.log_reader import read_log, iter_log_chunks, list_log_schemas
 from .demo_dashboard import run_demo_dashboard
 from .generic_widget import GenericWidget
 from .minimal_widget import MinimalWidget
 from .majumdar_lab_widgets import *
 from .built_in_widgets import *
 from .socket_client import PyOpticonSocketClient
+from ._system._shared_snapshot import SharedSnapshotReader
@@ -1,5 +1,16 @@
+from ._automation_timeline import *
 from ._automation_widget import *
 from ._data_logging_widget import *
 from ._serial_widget import *
 from ._show_hide_widget import *
-from ._socket_widget import *
\ No newline at end of file
+from ._socket_widget import *
+from ._widget_executor import *
+from ._gui_update_batcher import *
+from ._field_store import *
+from ._log_writers import *
+from ._log_rotation import *
+from ._socket_protocol import *
+from ._subscriptions import *
+from ._socket_server import *
+from ._code_cache import *
+from ._shared_snapshot import *
@@ -0,0 +1,101 @@
+__all__ = ['AutomationTimeline']
+
+
+class AutomationTimeline:
+    """ The steps of a loaded automation script, compiled into an indexed timeline. Each step is a function and the delay, in seconds,
+    between the previous step and it. The offset of each step from the start of the script is worked out once, as the step is added,
+    so looking up when a step is due, or how long the whole script takes, doesn't depend on the number of steps.\n
+
+    While a script is running, every step's due time is its offset plus a single origin time. Holding the script back while it awaits a
+    condition, or jumping ahead with the 'Skip' button, just moves the origin.
+    """
+
+    def __init__(self):
+        """Constructor for an AutomationTimeline"""
+        self.functions = [] # The function to call at each step
+        self.delays = [] # Seconds between the previous step and each step
+        self.offsets = [] # Seconds between the start of the script and each step
+        self.origin = 0 # The system time, in seconds, that offsets are measured from while the script runs
+
+    def __len__(self):
+        """The number of steps."""
+        return len(self.functions)
+
+    def append(self, delay, function):
+        """Add a step to the end of the timeline.
+
+        :param delay: The delay between the previous step and this one, in seconds
+        :type delay: int
+        :param function: The function to call, with no arguments or with the dashboard as its only argument
+        :type function: function
+        """
+        self.functions.append(function)
+        self.delays.append(delay)
+        self.offsets.append(delay+(self.offsets[-1] if len(self.offsets)>0 else 0))
+
+    def get_function(self, index):
+        """Get the function to call at a step.
+
+        :param index: The step's index
+        :type index: int
+        :return: The function
+        :rtype: function
+        """
+        return self.functions[index]
+
+    def get_delay(self, index):
+        """Get the delay between the step before a step and it.
+
+        :param index: The step's index
+        :type index: int
+        :return: The delay, in seconds
+        :rtype: int
+        """
+        return self.delays[index]
+
+    def get_total_duration(self):
+        """Get how long the whole script takes to run, not counting time spent awaiting conditions.
+
+        :return: The duration, in seconds
+        :rtype: int
+        """
+        return self.offsets[-1] if len(self.offsets)>0 else 0
+
+    def start_at(self, t0, index, delay):
+        """Set the origin so that a step is due a certain delay after a certain time, and the steps after it follow at their usual
+        intervals. Used when the script is started or resumed.
+
+        :param t0: The system time, in seconds, at which the script is (re)started
+        :type t0: float
+        :param index: The index of the next step to run
+        :type index: int
+        :param delay: How long after t0 that step is due, in seconds
+        :type delay: float
+        """
+        self.origin = t0+delay-self.offsets[index]
+
+    def shift(self, seconds):
+        """Move every step's due time later, or earlier if seconds is negative.
+
+        :param seconds: How far to move them, in seconds
+        :type seconds: float
+        """
+        self.origin += seconds
+
+    def get_due_time(self, index):
+        """Get the system time at which a step is due, once the script has been started.
+
+        :param index: The step's index
+        :type index: int
+        :return: The time, in seconds since the epoch
+        :rtype: float
+        """
+        return self.origin+self.offsets[index]
+
+    def get_end_time(self):
+        """Get the system time at which the last step is due, once the script has been started.
+
+        :return: The time, in seconds since the epoch
+        :rtype: float
+        """
+        return self.origin+self.get_total_duration()
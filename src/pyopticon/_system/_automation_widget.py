@@ -1,10 +1,8 @@
-from tkinter import *
-from tkinter import messagebox
-from tkinter import filedialog as fd
 from datetime import timedelta
 import time
 import traceback
 from .. import minimal_widget
+from ._automation_timeline import AutomationTimeline
 
 # Widget for automated programs (this one is a little bit complicated!)
 class AutomationWidget(minimal_widget.MinimalWidget):
@@ -25,52 +23,50 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self.parent = parent_dashboard
         self.root = parent_dashboard.get_tkinter_object()
         self.main_color = '#FF7F7F'
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         # Lay out all the tkinter elements
-        self.frame = Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
-        Label(self.frame,text="Automation Control ").grid(row=1,column=1,sticky='nesw')
-        self.automation_running_label = StringVar()
-        Label(self.frame,textvariable=self.automation_running_label).grid(row=1,column=2,sticky='nesw')
-        self.file_loaded = StringVar()
+        self.frame = gui.Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
+        gui.Label(self.frame,text="Automation Control ").grid(row=1,column=1,sticky='nesw')
+        self.automation_running_label = gui.StringVar()
+        gui.Label(self.frame,textvariable=self.automation_running_label).grid(row=1,column=2,sticky='nesw')
+        self.file_loaded = gui.StringVar()
         self.file_loaded.set("No file loaded.")
-        Label(self.frame,textvariable=self.file_loaded).grid(row=2,column=1,sticky='nesw')
+        gui.Label(self.frame,textvariable=self.file_loaded).grid(row=2,column=1,sticky='nesw')
 
-        self.lines_loaded = StringVar()
-        Label(self.frame,textvariable=self.lines_loaded).grid(row=3,column=1,sticky='nesw')
-        Label(self.frame,text="Next action in: ").grid(row=4,column=1,sticky='nesw')
-        Label(self.frame,text="Time remaining: ").grid(row=5,column=1,sticky='nesw')
-        self.step_countdown_readout = StringVar()
+        self.lines_loaded = gui.StringVar()
+        gui.Label(self.frame,textvariable=self.lines_loaded).grid(row=3,column=1,sticky='nesw')
+        gui.Label(self.frame,text="Next action in: ").grid(row=4,column=1,sticky='nesw')
+        gui.Label(self.frame,text="Time remaining: ").grid(row=5,column=1,sticky='nesw')
+        self.step_countdown_readout = gui.StringVar()
         self.step_countdown_readout.set("0:00:00")
-        Label(self.frame,textvariable=self.step_countdown_readout).grid(row=4,column=2,sticky='nesw')
-        self.time_to_go_readout = StringVar()
+        gui.Label(self.frame,textvariable=self.step_countdown_readout).grid(row=4,column=2,sticky='nesw')
+        self.time_to_go_readout = gui.StringVar()
         self.time_to_go_readout.set("0:00:00")
-        Label(self.frame,textvariable=self.time_to_go_readout).grid(row=5,column=2,sticky='nesw')
-        self.script_load_button = Button(self.frame,text="    Load    ",command=self._load_automation_file)
+        gui.Label(self.frame,textvariable=self.time_to_go_readout).grid(row=5,column=2,sticky='nesw')
+        self.script_load_button = gui.Button(self.frame,text="    Load    ",command=self._load_automation_file)
         self.script_load_button.grid(row=2,column=2,sticky='nesw')
-        self.start_button_text = StringVar()
-        self.script_start_button = Button(self.frame,textvariable=self.start_button_text,command=self._start_automated_tasks)
+        self.start_button_text = gui.StringVar()
+        self.script_start_button = gui.Button(self.frame,textvariable=self.start_button_text,command=self._start_automated_tasks)
         self.script_start_button.grid(row=3,column=2,sticky='nesw')
-        self.script_pause_button = Button(self.frame,text="Pause",command=self._pause_automated_tasks)
+        self.script_pause_button = gui.Button(self.frame,text="Pause",command=self._pause_automated_tasks)
         self.script_pause_button.grid(row=2,column=3,sticky='nesw')
-        self.script_stop_button = Button(self.frame,text="    Stop    ",command=self._stop_automated_tasks)
+        self.script_stop_button = gui.Button(self.frame,text="    Stop    ",command=self._stop_automated_tasks)
         self.script_stop_button.grid(row=3,column=3,sticky='nesw')
-        Label(self.frame,text="        ").grid(row=5,column=3,sticky='nesw')
-        self.skip_button = Button(self.frame, text='Skip', command=self._skip_await)
+        gui.Label(self.frame,text="        ").grid(row=5,column=3,sticky='nesw')
+        self.skip_button = gui.Button(self.frame, text='Skip', command=self._skip_await)
 
-        self.toggle_var = BooleanVar()
-        self.toggle = Checkbutton(self.frame, text="Enable Step Logging", variable=self.toggle_var, command=self._on_log_toggle)
+        self.toggle_var = gui.BooleanVar()
+        self.toggle = gui.Checkbutton(self.frame, text="Enable Step Logging", variable=self.toggle_var, command=self._on_log_toggle)
         self.toggle.grid(row=6,column=2,sticky='nesw')
 
         # Define some automation variables
         self.delay_for_loading = 0 # Keep track of accumulated delay when using schedule_delay function
-        self.delay_list = [] # List of delay intervals, in seconds
-        self.absolute_time_list = [] # List of system times, in seconds
-        self.lambda_list = [] # List of lambda functions to call
+        self.timeline = AutomationTimeline() # The loaded script's steps and when each is due
         self.automation_index = 0 # What step of the automation we're on
         self.seconds_to_next_task = 0 # Persistent countdown variable
         self.time_to_go = 0 # Total time remaining in recipe
         self.pause_tasks = True
         self._buttons_stopped_mode()
-        self.end_time = 0
         self.awaiting = False
         self.await_condition_displayed = False
         self.await_error_displayed = False
@@ -135,12 +131,11 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         :param function: The function to be executed at the scheduled time
         :type function: function
         """
-        if len(self.delay_list)==0:
+        if len(self.timeline)==0:
             self.seconds_to_next_task = self.delay_for_loading
-        self.delay_list.append(self.delay_for_loading)
+        self.timeline.append(self.delay_for_loading,function)
         self.delay_for_loading=0
-        self.lambda_list.append(function)
-        self.time_to_go = sum(self.delay_list)
+        self.time_to_go = self.timeline.get_total_duration()
 
     def schedule_action(self, target_widget_nickname, target_field_name, new_target_value, confirm=True):
         """This function is meant to be called in automation scripts. It changes the target field in the target widget to a certain value, 
@@ -185,7 +180,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         """
         old_value = target_widget.get_field(field_name)
         target_widget.set_field(field_name, new_target_value)
-        print("Automatic script switched value \""+old_value+"\" to \""+new_target_value+"\".")
+        print("Automatic script switched value \""+str(old_value)+"\" to \""+str(new_target_value)+"\".")
         if not (confirm_function is None):
             confirm_function()
 
@@ -199,7 +194,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         :param console_message: A message that's printed to the console as user-legible shorthand for the condition being awaited, e.g. 'Temperature < 100C'
         :type target_widget: str
         """
-        self.latest_await_index = len(self.delay_list)
+        self.latest_await_index = len(self.timeline)
         self.schedule_function(lambda dashboard: dashboard._automation_control_widget._schedule_await_condition_helper(condition,console_message))
 
     def _schedule_await_condition_helper(self,condition,console_message):
@@ -237,8 +232,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
                 print("Automation awaiting condition to proceed: "+console_message)
             self.await_condition_displayed = True
             self.automation_index-=1
-            self.absolute_time_list = list(x+1 for x in self.absolute_time_list)
-            self.end_time+=1
+            self.timeline.shift(1) # Check again in a second; every later step is held back with it
 
     def _skip_await(self):
         """This function gets called when the 'skip await' button gets pressed. It just sets a flag that _schedule_await_condition_helper reads."""
@@ -255,10 +249,10 @@ class AutomationWidget(minimal_widget.MinimalWidget):
             return
         if (not self.awaiting) and self.skip_await_flag:
             self.skip_await_flag = False
-            self.absolute_time_list = list(x-self.seconds_to_next_task for x in self.absolute_time_list)
+            self.timeline.shift(-self.seconds_to_next_task)
             print("Automation script advanced with 'Skip' button.")
-        if time.time() > self.absolute_time_list[self.automation_index]:# It's time to execute a task
-            execute_me = self.lambda_list[self.automation_index]
+        if time.time() > self.timeline.get_due_time(self.automation_index):# It's time to execute a task
+            execute_me = self.timeline.get_function(self.automation_index)
             try:
                 if execute_me.__code__.co_argcount==0:
                     execute_me()
@@ -267,29 +261,29 @@ class AutomationWidget(minimal_widget.MinimalWidget):
             except Exception as e:
                 self.parent_dashboard.exc_handler(e,'automation',self.name)
             self.automation_index += 1
-            self.lines_loaded.set(str(self.automation_index)+"/"+str(len(self.delay_list))+" steps done.")
-            if self.automation_index >= len(self.delay_list): # Script is finished; reset everything
+            self.lines_loaded.set(str(self.automation_index)+"/"+str(len(self.timeline))+" steps done.")
+            if self.automation_index >= len(self.timeline): # Script is finished; reset everything
                 self.automation_index = 0 
-                self.seconds_to_next_task = 0 if (len(self.delay_list)==0) else self.delay_list[0]
-                self.time_to_go = sum(self.delay_list)
+                self.seconds_to_next_task = 0 if (len(self.timeline)==0) else self.timeline.get_delay(0)
+                self.time_to_go = self.timeline.get_total_duration()
                 self.pause_tasks = True
                 self.step_countdown_readout.set(str(timedelta(seconds=self.seconds_to_next_task)))
                 self.time_to_go_readout.set(str(timedelta(seconds=self.time_to_go)))
                 self._buttons_stopped_mode()
                 self.automation_running_label.set("(finished!)")
-                self.lines_loaded.set("0/"+str(len(self.delay_list))+" steps done.")
+                self.lines_loaded.set("0/"+str(len(self.timeline))+" steps done.")
                 self.awaiting = False
                 print("Script successfully finished.")
                 return
             else:
-                self.seconds_to_next_task = self.delay_list[self.automation_index]
+                self.seconds_to_next_task = self.timeline.get_delay(self.automation_index)
         else:
-            self.seconds_to_next_task = int(round(float(self.absolute_time_list[self.automation_index])-time.time()))
+            self.seconds_to_next_task = int(round(float(self.timeline.get_due_time(self.automation_index))-time.time()))
         if self.seconds_to_next_task <= 0:
             self.root.after(0,self._update_tasks) # Execute next task immediately if it's got a delay of 0
         else:
             self.root.after(1000,self._update_tasks)
-            self.time_to_go = int(round(float(self.end_time)-time.time()))
+            self.time_to_go = int(round(float(self.timeline.get_end_time())-time.time()))
         if not self.awaiting: # If we're not in an awaiting state
             self.step_countdown_readout.set(str(timedelta(seconds=self.seconds_to_next_task)))
             #self.skip_button.grid_remove()
@@ -302,48 +296,41 @@ class AutomationWidget(minimal_widget.MinimalWidget):
             self.time_to_go_readout.set(str(timedelta(seconds=self.time_to_go)))
 
     def _start_automated_tasks(self):
-        """Start an automation script. Generates a list of absolute times at which each action in the 
-        automation queue will be executed, and starts calling _update_tasks every second."""
-        if len(self.delay_list)==0:
-            messagebox.showinfo("","No script is loaded.")
+        """Start an automation script. Lines up the automation timeline so that the next action is executed after whatever 
+        remained of its delay, and starts calling _update_tasks every second."""
+        if len(self.timeline)==0:
+            self.parent.gui.messagebox.showinfo("","No script is loaded.")
             return
         if not self.parent.serial_connected:
-            messagebox.showinfo("","Please open serial communications before starting an automation script.")
+            self.parent.gui.messagebox.showinfo("","Please open serial communications before starting an automation script.")
             return
         print("Starting automated script.")
-        # Populate absolute start times
-        t0 = time.time()
-        rel_times = []
-        for i in range(0, self.automation_index):
-            rel_times.append(0)
-        rel_times.append(self.seconds_to_next_task)
-        for i in range(self.automation_index+1,len(self.delay_list)):
-            rel_times.append(self.delay_list[i]+rel_times[i-1])
-        self.absolute_time_list = [t+t0 for t in rel_times]
-        self.end_time = self.absolute_time_list[len(self.absolute_time_list)-1]
+        # Line up the timeline with the current time
+        self.timeline.start_at(time.time(),self.automation_index,self.seconds_to_next_task)
         # Flags for displaying wait conditions and errors
         self.await_condition_displayed = False
         self.await_error_displayed = False
         self.skip_await_flag=False
-        self.toggle.config(state=DISABLED)
+        self.toggle.config(state='disabled')
         # Actually start
         self._buttons_running_mode()
         self.pause_tasks = False
         self._update_tasks()
 
-    def _load_automation_file(self): # Open a dialog and load a file for automation
-        """Load an automation script from a file. Generates a list of functions and a list of the delays before each one will be 
-        executed after starting the script. Sets GUI elements like '0/n steps done' and 'xx:xx:xx remaining'.\n
+    def _load_automation_file(self, filename=None): # Open a dialog and load a file for automation
+        """Load an automation script from a file, asking the user to choose one if filename is None. Compiles the scheduled functions, and the delays before each one will be 
+        executed, into an automation timeline. Sets GUI elements like '0/n steps done' and 'xx:xx:xx remaining'.\n
         
         Note that this method loads the contents of the automation file and calls exec() on it. This is obviously not secure; only use 
         automation scripts whose authors you trues. exec() is called in a namespace with schedule_delay, schedule_action, schedule_function, and schedule_await_condition 
         already defined as local variables for you to use.
+
+        :param filename: The path of the script to load, or None to open a file dialog. Defaults to None.
+        :type filename: str, optional
         """
         # Reset everything
         self.delay_for_loading = 0
-        self.delay_list = []
-        self.absolute_time_list = []
-        self.lambda_list = []
+        self.timeline = AutomationTimeline()
         self.automation_index = 0
         self.seconds_to_next_task = 0
         self.time_to_go = 0
@@ -355,7 +342,8 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self.lines_loaded.set("")
         self.latest_await_index = -1
         # Hopefully these all get overwritten; above is just to cover our bases if there's an error.
-        filename = fd.askopenfilename()
+        if filename is None:
+            filename = self.parent.gui.filedialog.askopenfilename()
         f = str.split(filename,'/')
         f = f[len(f)-1] # We just want the file name to display, not its whole path
         script = open(filename).read()
@@ -366,13 +354,12 @@ class AutomationWidget(minimal_widget.MinimalWidget):
                   'schedule_await_condition':self.schedule_await_condition},{})
         except Exception as e:
             print(traceback.format_exc())
-            messagebox.showinfo("","The script you loaded contains an error. See console for details.")
+            self.parent.gui.messagebox.showinfo("","The script you loaded contains an error. See console for details.")
             return
-        lines = len(self.delay_list)
         self.file_loaded.set("Loaded: "+f)
-        self.lines_loaded.set("0/"+str(len(self.delay_list))+" steps done.")
-        self.time_to_go = sum(self.delay_list)
-        self.seconds_to_next_task = 0 if (len(self.delay_list)==0) else self.delay_list[0]
+        self.lines_loaded.set("0/"+str(len(self.timeline))+" steps done.")
+        self.time_to_go = self.timeline.get_total_duration()
+        self.seconds_to_next_task = 0 if (len(self.timeline)==0) else self.timeline.get_delay(0)
         self.step_countdown_readout.set(str(timedelta(seconds=self.seconds_to_next_task)))
         if self.automation_index<=self.latest_await_index: #If there are still 'awaits' queued
             self.time_to_go_readout.set("≥"+str(timedelta(seconds=(self.time_to_go)))) 
@@ -394,12 +381,12 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self._buttons_stopped_mode()
         self.pause_tasks = True
         self.automation_index = 0
-        self.time_to_go = sum(self.delay_list)
-        self.seconds_to_next_task = self.delay_list[0]
+        self.time_to_go = self.timeline.get_total_duration()
+        self.seconds_to_next_task = self.timeline.get_delay(0)
         self.step_countdown_readout.set(str(timedelta(seconds=self.seconds_to_next_task)))
         self.time_to_go_readout.set(str(timedelta(seconds=self.time_to_go)))
-        self.lines_loaded.set("0/"+str(len(self.delay_list))+" steps done.")
-        self.toggle.config(state=NORMAL)
+        self.lines_loaded.set("0/"+str(len(self.timeline))+" steps done.")
+        self.toggle.config(state='normal')
         self.awaiting = False
 
     def _buttons_running_mode(self):
@@ -409,7 +396,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self.script_pause_button.configure(state='normal')
         self.script_stop_button.configure(state='normal')
         self.start_button_text.set("Start")
-        self.toggle.config(state=DISABLED)
+        self.toggle.config(state='disabled')
         self.automation_running_label.set("(running)")
         self.skip_button.grid(row=4,column=3,sticky='nesw')
         self.frame.configure(highlightbackground='green')
@@ -420,7 +407,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self.script_start_button.configure(state='normal')
         self.script_pause_button.configure(state='disabled')
         self.script_stop_button.configure(state='normal')
-        self.toggle.config(state=NORMAL)
+        self.toggle.config(state='normal')
         self.automation_running_label.set("(paused)")
         self.start_button_text.set("Resume")
         self.skip_button.grid_remove()
@@ -432,7 +419,7 @@ class AutomationWidget(minimal_widget.MinimalWidget):
         self.script_start_button.configure(state='normal')
         self.script_pause_button.configure(state='disabled')
         self.script_stop_button.configure(state='disabled')
-        self.toggle.config(state=NORMAL)
+        self.toggle.config(state='normal')
         self.automation_running_label.set("(stopped)")
         self.start_button_text.set("Start")
         self.skip_button.grid_remove()
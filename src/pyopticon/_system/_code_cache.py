@@ -0,0 +1,160 @@
+import ast
+import hashlib
+import textwrap
+import threading
+import collections
+
+__all__ = ['CodeCache']
+
+def _source_key(mode, source):
+    """Get the cache key for some source code.
+
+    :param mode: 'eval', 'exec', or 'register'
+    :type mode: str
+    :param source: The source code
+    :type source: str
+    :return: The key
+    :rtype: str
+    """
+    return mode+':'+hashlib.sha1(source.encode()).hexdigest()
+
+def _rewrite_exec_source(code):
+    """Turn the source of a function sent by PyOpticonSocketClient.do_exec into code that defines the function under a standard name
+    and then calls it.
+
+    :param code: The source, as returned by inspect.getsource
+    :type code: str
+    :return: The code to exec
+    :rtype: str
+    """
+    if 'do_exec' in code:
+        raise Exception("Ignoring do_exec() call: Not allowed to define exec functions inline (e.g. do_exec(lambda x: ...)); please define the function elsewhere (l = lambda x: ..., or def l():...), then do_exec(l).")
+    elif code[:3]=='def':
+        #Replace the first line with a standard name, append line that executes it
+        code = code[code.index('\n')+1:]
+        code = "def to_exec():\n"+code+"\nto_exec()"
+    elif 'lambda' in code:
+        #Replace the first line with a standard name, append line that executes it
+        code = code[code.index('lambda'):]
+        code = "to_exec = "+code+"\nto_exec()"
+    return code
+
+
+class CodeCache:
+    """ Compiles the code sent with socket Eval and Exec commands, and keeps the most recently used code objects, so that a client
+    sending the same expression over and over only pays for parsing and compiling it once. Code is looked up by a hash of its source.
+    Also holds the functions registered with the socket Register command, to be called by handle with Invoke. Safe to use from
+    several socket threads at once.
+
+    :param max_entries: The most compiled Eval/Exec code objects to keep. The least recently used is dropped to make room. Defaults to 256.
+    :type max_entries: int, optional
+    """
+
+    def __init__(self, max_entries=256):
+        """Constructor for a CodeCache"""
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict() # Source key -> code object, least recently used first
+        self.functions = dict() # Handle -> registered function
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, mode, source, prepare):
+        """Look up compiled code, compiling and caching it if it isn't cached.
+
+        :param mode: 'eval' or 'exec'
+        :type mode: str
+        :param source: The source as sent by the client
+        :type source: str
+        :param prepare: A function that turns the source into the code to compile
+        :type prepare: function
+        :return: The code object
+        :rtype: code
+        """
+        key = _source_key(mode,source)
+        with self.lock:
+            code = self.entries.get(key)
+            if code is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return code
+            self.misses += 1
+        code = compile(prepare(source),'<socket '+mode+'>',mode) # Compile outside the lock; a race only compiles twice
+        with self.lock:
+            self.entries[key] = code
+            self.entries.move_to_end(key)
+            while len(self.entries)>self.max_entries:
+                self.entries.popitem(last=False)
+        return code
+
+    def get_eval(self, expression):
+        """Get the compiled code for an Eval command's expression.
+
+        :param expression: The expression
+        :type expression: str
+        :return: The code object, for eval()
+        :rtype: code
+        """
+        return self._get('eval',expression,lambda s: s)
+
+    def get_exec(self, source):
+        """Get the compiled code for an Exec command's function source.
+
+        :param source: The function's source, as sent by PyOpticonSocketClient.do_exec
+        :type source: str
+        :return: The code object, for exec()
+        :rtype: code
+        """
+        return self._get('exec',source,_rewrite_exec_source)
+
+    def register(self, source, namespace):
+        """Define a function sent with a socket Register command, so it can be called by handle. The handle is derived from the
+        source, so registering the same function again gives the same handle.
+
+        :param source: The function's source: a def statement, or a line defining a lambda, as returned by inspect.getsource
+        :type source: str
+        :param namespace: The globals the function will run with
+        :type namespace: dict
+        :return: The handle
+        :rtype: str
+        """
+        handle = _source_key('register',source)[len('register:'):][:16]
+        with self.lock:
+            if handle in self.functions.keys():
+                return handle
+        text = textwrap.dedent(source)
+        if text[:4]=='def ':
+            tree = ast.parse(text)
+            if len(tree.body)==0 or not isinstance(tree.body[0],ast.FunctionDef):
+                raise Exception("Register needs the source of a function.")
+            exec(compile(tree,'<socket register>','exec'),namespace)
+            function = namespace[tree.body[0].name]
+        elif 'lambda' in text:
+            function = eval(compile(text[text.index('lambda'):].strip(),'<socket register>','eval'),namespace)
+        else:
+            raise Exception("Register needs the source of a function (def ... or ... = lambda ...).")
+        with self.lock:
+            self.functions[handle] = function
+        return handle
+
+    def get_function(self, handle):
+        """Get a registered function.
+
+        :param handle: The handle returned by register
+        :type handle: str
+        :return: The function
+        :rtype: function
+        """
+        with self.lock:
+            if handle not in self.functions.keys():
+                raise Exception("No registered function with handle "+str(handle))
+            return self.functions[handle]
+
+    def get_stats(self):
+        """Get statistics about the cache.
+
+        :return: A dict with keys 'entries', 'hits', 'misses', and 'functions' (the number registered)
+        :rtype: dict
+        """
+        with self.lock:
+            return {'entries':len(self.entries),'hits':self.hits,'misses':self.misses,'functions':len(self.functions)}
@@ -1,49 +1,78 @@
-from tkinter import *
-from tkinter import filedialog as fd
-from tkinter import messagebox
 import datetime
 import os
+import time
+import threading
+from ._log_writers import CsvLogWriter, NpzLogWriter, WriteBehindLogWriter
 
 # data logging widget
 class DataLoggingWidget():
-    """ This widget allows a user to choose a data logging location and to start and stop data logging
+    """ This widget allows a user to choose a data logging location and to start and stop data logging. Data is logged as CSV text, 
+    or, if the logfile's name ends in .npz, to a compressed binary NumPy archive that can be read back without parsing text (see NpzLogWriter).
+
+    Rows are written by a background writer thread (see WriteBehindLogWriter), so a slow disk doesn't hold up sampling or the GUI.
 
     :param parent: The dashboard to which this widget will be added.
     :type parent: pyopticon.dashboard.Dashboard
+    :param queue_rows: The maximum number of rows waiting to be written; if the disk falls this far behind, new rows are dropped. Defaults to 10000.
+    :type queue_rows: int, optional
+    :param flush_rows: Flush the logfile after this many rows. Defaults to 10.
+    :type flush_rows: int, optional
+    :param flush_seconds: Flush the logfile at least this often while logging, in seconds. Defaults to 1.
+    :type flush_seconds: float, optional
+    :param fsync: Whether every flush also forces the rows onto the disk with os.fsync. Defaults to False.
+    :type fsync: bool, optional
+    :param rotate_bytes: Start a new numbered segment of the logfile once it's at least this many bytes. Defaults to None (never).
+    :type rotate_bytes: int, optional
+    :param rotate_seconds: Start a new numbered segment of the logfile once the current one is this many seconds old. Defaults to None (never).
+    :type rotate_seconds: float, optional
+    :param compression: How to compress closed CSV segments: None, 'gzip', or 'zstd' (needs the zstandard package). Defaults to None.
+    :type compression: str, optional
     """
 
-    def __init__(self, parent_dashboard):
+    def __init__(self, parent_dashboard, **kwargs):
         """The constructor for a DataLoggingWidget"""
+        self.queue_rows = 10000 if not 'queue_rows' in kwargs.keys() else kwargs['queue_rows']
+        self.flush_rows = 10 if not 'flush_rows' in kwargs.keys() else kwargs['flush_rows']
+        self.flush_seconds = 1 if not 'flush_seconds' in kwargs.keys() else kwargs['flush_seconds']
+        self.fsync = False if not 'fsync' in kwargs.keys() else kwargs['fsync']
+        self.rotate_bytes = None if not 'rotate_bytes' in kwargs.keys() else kwargs['rotate_bytes']
+        self.rotate_seconds = None if not 'rotate_seconds' in kwargs.keys() else kwargs['rotate_seconds']
+        self.compression = None if not 'compression' in kwargs.keys() else kwargs['compression']
         # Parent is the labGUI object, root is the tkinter root object
         self.parent = parent_dashboard
         self.root = parent_dashboard.get_tkinter_object()
         self.main_color = '#FF7F7F'
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         # Widget for data logging
-        self.frame = Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
-        Label(self.frame,text="Data Logging Control").grid(row=1,column=1,sticky='nesw')
+        self.frame = gui.Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
+        gui.Label(self.frame,text="Data Logging Control").grid(row=1,column=1,sticky='nesw')
         # Select destination
         self.filename='None'
-        Label(self.frame, text="Destination: ").grid(row=2,column=1,sticky='nesw')
-        self.destination = StringVar()
+        gui.Label(self.frame, text="Destination: ").grid(row=2,column=1,sticky='nesw')
+        self.destination = gui.StringVar()
         self.destination.set("None selected.")
-        Label(self.frame, textvariable=self.destination).grid(row=2,column=2,sticky='nesw')
-        self.choose_destination_button = Button(self.frame,text="(Select)", command=self._choose_destination)
+        gui.Label(self.frame, textvariable=self.destination).grid(row=2,column=2,sticky='nesw')
+        self.choose_destination_button = gui.Button(self.frame,text="(Select)", command=self._choose_destination)
         self.choose_destination_button.grid(row=2,column=3,sticky='nesw')
         # Time interval
-        Label(self.frame, text="Time interval: ").grid(row=3,column=1,sticky='nesw')
-        self.time_interval = StringVar()
+        gui.Label(self.frame, text="Time interval: ").grid(row=3,column=1,sticky='nesw')
+        self.time_interval = gui.StringVar()
         self.time_interval.set("0:00:10")
-        self.logging_rate_entry = Entry(self.frame, textvariable=self.time_interval,width=8)
+        self.logging_rate_entry = gui.Entry(self.frame, textvariable=self.time_interval,width=8)
         self.logging_rate_entry.grid(row=3,column=2,sticky='nesw')
         # Start and stop logging
-        self.logging_status_text = StringVar()
+        self.logging_status_text = gui.StringVar()
         self.logging_status_text.set("Start Logging")
         self.logging_active = False
-        self.logging_interlock = False
-        Button(self.frame,textvariable=self.logging_status_text,command = self._toggle_logging).grid(row=3,column=3,sticky='nesw')
+        self.logging_starting = False # Waiting for the previous session's sampler to close its logfile; see _begin_logging
+        self.sampler_thread = None
+        self.writer = None
+        self.rows_late = 0
+        self.ticks_skipped = 0
+        gui.Button(self.frame,textvariable=self.logging_status_text,command = self._toggle_logging).grid(row=3,column=3,sticky='nesw')
         
-        # Remember the headers and whether they've been written yet
-        self.empty_file = True
+        # Remember the columns being logged. They're picked afresh each time logging starts; if they differ from the ones already in
+        # the file, the writer starts a new schema block.
         self.widgets_in_order = None
         self.widget_attributes_in_order = None
 
@@ -57,94 +86,180 @@ class DataLoggingWidget():
 
     # Methods to support serial communication and show/hide functionality            
     def _toggle_logging(self):
-        """Toggle whether data logging is active. Do the actual logging at regular intervals. Enable/disable buttons accordingly. 
-        Some machinery to manage the corner case where you stop logging and then restart logging within a shorter timespan than the data logging interval."""
-        if self.logging_active:
+        """Toggle whether data logging is active. Enable/disable buttons accordingly. While logging is active, a sampler thread 
+        collects and writes the data at regular intervals; see _run_sampler. Stopping doesn't wait for the logfile to be closed; 
+        the sampler thread finishes writing and closes it by itself."""
+        if self.logging_starting: # Cancel a start that's waiting for the previous logfile to close
+            self.logging_starting = False
+            self.logging_status_text.set("Start Logging")
+            self.choose_destination_button.configure(state='normal')
+            self.logging_rate_entry.configure(state='normal')
+            print("Cancelled starting data logging.")
+        elif self.logging_active:
             self.logging_status_text.set("Start Logging")
             print("Stopped data logging.")
             self.logging_active = False
             self.choose_destination_button.configure(state='normal')
             self.logging_rate_entry.configure(state='normal')
             self.frame.configure(highlightbackground=self.main_color, highlightcolor=self.main_color)
-            self.logging_interlock = True # This prevents one particular bug with slow polling rates
-            self.root.after(self.delay*1000, self._flip_interlock) # Kludgy, sorry
-            self.open_file.close()
+            self.stop_sampling.set() # The sampler thread closes the logfile on its way out
         else:
             # Check that the time interval and filename are valid
             if self.destination.get()=="None selected.":
-                messagebox.showinfo("","Please select a destination file/address.")
+                self.parent.gui.messagebox.showinfo("","Please select a destination file/address.")
                 return
             try:
-                delay = self.logging_rate_entry.get()
-                h,m,s = delay.split(":") # Delay is expected as a string in 0:00:00 format.
-                self.delay = 3600*int(h)+60*int(m)+int(s)
-            except:
-                messagebox.showinfo("","The time interval you enter must be in 0:00:00 format.")
+                self.delay = self._parse_interval(self.logging_rate_entry.get())
+            except Exception:
+                self.parent.gui.messagebox.showinfo("","The time interval you enter must be in 0:00:00 or 0:00:00.000 format, and more than 0.")
                 return
-            # Open the file
+            if self.sampler_thread is not None and self.sampler_thread.is_alive():
+                # Logging was stopped a moment ago and the old sampler is still closing the file. Wait for it on another thread, 
+                # so a slow disk can't freeze the GUI, then start.
+                self.logging_starting = True
+                self.logging_status_text.set("Cancel Start")
+                self.choose_destination_button.configure(state='disabled')
+                self.logging_rate_entry.configure(state='disabled')
+                print("Waiting for the previous logfile to close before starting data logging.")
+                old_sampler = self.sampler_thread
+                threading.Thread(target=lambda: (old_sampler.join(),self.root.after(0,self._begin_logging,True)),name="PyOpticon logfile close").start()
+                return
+            self._begin_logging()
+
+    def _begin_logging(self, waited=False):
+        """Open the logfile and start the sampler thread. Runs in the Tkinter thread.
+
+        :param waited: True if this was called once the previous session's logfile was closed, after _toggle_logging had to wait for it. Defaults to False.
+        :type waited: bool, optional
+        """
+        if waited:
+            if not self.logging_starting: # The start was cancelled in the meantime
+                return
+            self.logging_starting = False
+        # Open the file. The logfile's extension decides the format: .npz for a binary NumPy archive, CSV otherwise.
+        self.widgets_in_order = None # Pick the columns afresh, in case widgets or fields have changed
+        subsecond = (self.delay!=int(self.delay))
+        if self.filename.lower().endswith('.npz'):
+            self.mode = 'NPZ'
+            file_writer = NpzLogWriter(self.filename,rotate_bytes=self.rotate_bytes,rotate_seconds=self.rotate_seconds)
+        else:
             self.mode = 'CSV'
-            self.open_file = open(self.filename,'a') # Better to just avoid overwriting...
-            # Do cosmetic stuff
-            self.logging_status_text.set("Stop Logging")
-            self.frame.configure(highlightbackground='green', highlightcolor='green')
-            print("Started data logging every "+str(self.delay)+" seconds.")
-            self.logging_active = True
-            self.choose_destination_button.configure(state='disabled')
-            self.logging_rate_entry.configure(state='disabled')
-            if not self.logging_interlock: # If logging_interlock, an old request from before you hit pause is still active
-                self._poll_loggable_data()
-            else:
-                print("You hit pause on logging recently and a an old logging callback is still pending; the logging interval will update and logging will continue when that callback executes.")
+            file_writer = CsvLogWriter(self.filename,subsecond,self.rotate_bytes,self.rotate_seconds,self.compression)
+        self.writer = WriteBehindLogWriter(file_writer,max_rows=self.queue_rows,flush_rows=self.flush_rows,flush_seconds=self.flush_seconds,
+            fsync=self.fsync,on_error=lambda e: self.parent.exc_handler(e,'system','Data Logging Widget'))
+        self.rows_late = 0
+        self.ticks_skipped = 0
+        # Do cosmetic stuff
+        self.logging_status_text.set("Stop Logging")
+        self.frame.configure(highlightbackground='green', highlightcolor='green')
+        print("Started data logging every "+str(self.delay)+" seconds.")
+        self.logging_active = True
+        self.choose_destination_button.configure(state='disabled')
+        self.logging_rate_entry.configure(state='disabled')
+        self.stop_sampling = threading.Event()
+        self.sampler_thread = threading.Thread(target=self._run_sampler,args=(self.writer,self.delay,self.stop_sampling),name="PyOpticon data logging")
+        self.sampler_thread.start()
 
-    def _flip_interlock(self):
-        """Necessary for toggle_logging to handle a corner case when logging is flipped on and off in quick succession."""
-        self.logging_interlock = False
+    def _parse_interval(self, text):
+        """Parse a logging interval in h:mm:ss format, optionally with fractional seconds, e.g. '0:00:10' or '0:00:00.250'.
+        
+        :param text: The interval
+        :type text: str
+        :return: The interval, in seconds
+        :rtype: float
+        """
+        h,m,s = text.split(":")
+        delay = 3600*int(h)+60*int(m)+float(s)
+        if delay<=0:
+            raise Exception("The logging interval must be more than 0.")
+        return int(delay) if delay==int(delay) else round(delay,3)
 
-    def _poll_loggable_data(self):
-        """Prompt every widget to return all of the data that it wants logged. Format that data into .csv append it to the log file."""
-        if not self.logging_active:
-            return
-        self.root.after(self.delay*1000, self._poll_loggable_data)
-        all_data = dict()
+    def _run_sampler(self, writer, delay, stop):
+        """Body of the sampler thread. Logs a row immediately and then on a fixed grid of time.monotonic() deadlines every delay seconds, 
+        so slow log_data methods or a busy GUI don't make the interval drift; if a deadline is missed entirely, it's skipped. Row 
+        timestamps are monotonic times anchored to the wall clock when logging started, so they're evenly spaced even if the system 
+        clock is adjusted. A row sampled more than half an interval after its deadline is counted as late. Closes the writer when 
+        logging stops.
+        
+        :param writer: The writer for the logfile
+        :type writer: pyopticon._system._log_writers.WriteBehindLogWriter
+        :param delay: The logging interval, in seconds
+        :type delay: float
+        :param stop: An event that's set when logging stops
+        :type stop: threading.Event
+        """
+        wall_start = time.time()
+        monotonic_start = time.monotonic()
+        deadline = monotonic_start
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if now>=deadline:
+                    if now-deadline>delay/2:
+                        self.rows_late += 1
+                    try:
+                        self._poll_loggable_data(writer,datetime.datetime.fromtimestamp(wall_start+(now-monotonic_start)))
+                    except Exception as e:
+                        self.parent.exc_handler(e,'system','Data Logging Widget')
+                    deadline += delay
+                    now = time.monotonic()
+                    if deadline<=now: # Skip any ticks that were missed
+                        missed = (now-deadline)//delay+1
+                        self.ticks_skipped += int(missed)
+                        deadline += missed*delay
+                stop.wait(deadline-now)
+        finally:
+            writer.close()
+
+    def _poll_loggable_data(self, writer, now):
+        """Prompt every widget to return all of the data that it wants logged, and append it to the logfile as one row. Runs in the 
+        sampler thread, so widgets' log_data methods should only read values that are safe to read from any thread, like fields.
+        
+        :param writer: The writer for the logfile
+        :type writer: pyopticon._system._log_writers.WriteBehindLogWriter
+        :param now: The row's timestamp
+        :type now: datetime.datetime
+        """
+        all_data = dict() # Keyed by the widget objects themselves, so widgets with duplicate names or nicknames don't collide
         for obj in self.parent.all_widgets:
             if hasattr(obj,'log_data'):
-                out = obj.log_data()
-                all_data[obj.nickname] = out
-        datestamp = datetime.datetime.now().strftime("%m/%d/%Y")
-        timestamp = datetime.datetime.now().strftime('%H:%M:%S')
-        #print("Logged data at "+timestamp+".")
+                all_data[obj] = obj.log_data()
         
-        # Create the CSV headers, if needed
-        if self.empty_file or self.widgets_in_order is None:
+        # Decide on the columns, if needed
+        if self.widgets_in_order is None:
             self.widgets_in_order = []
             self.widget_attributes_in_order = dict()
-            new_header = "Date,Timestamp"
+            self.column_names = []
             for widget in self.parent.all_widgets:
                 if not hasattr(widget,'log_data'):
                     continue
                 self.widgets_in_order.append(widget)
-                self.widget_attributes_in_order[widget.name]=all_data[widget.nickname].keys()
-                for label in self.widget_attributes_in_order[widget.name]:
-                    label = widget.nickname+": "+label
-                    label = label.replace(","," -")
-                    new_header+=","
-                    new_header+=label
-            new_header+="\n"
-            if self.empty_file:
-                self.open_file.write(new_header)
-                self.empty_file = False
-        # Create a new line and append it to the log file.
-        new_line = datestamp+","+timestamp
+                self.widget_attributes_in_order[widget]=list(all_data[widget].keys())
+                for label in self.widget_attributes_in_order[widget]:
+                    self.column_names.append(widget.nickname+": "+label)
+        # Collect the values in the same order and append them to the log file.
+        values = []
         for widget in self.widgets_in_order:
-            for attribute in self.widget_attributes_in_order[widget.name]:
-                all_data[widget.nickname][attribute] = all_data[widget.nickname][attribute].replace(","," -")
-                new_line+=","
-                new_line+=str(all_data[widget.nickname][attribute])
-        new_line+="\n"
-        #self.open_file.close()
-        #self.open_file = open(self.filename,'a')
-        self.open_file.write(new_line)
-        self.open_file.flush()
+            for attribute in self.widget_attributes_in_order[widget]:
+                values.append(all_data[widget][attribute])
+        writer.write_row(now,self.column_names,values)
+
+    def get_logging_stats(self):
+        """Get counters for the current (or most recent) logging session: rows waiting in the write-behind queue ('queue_depth'), 
+        rows queued, written, and dropped because the queue was full, how many times the logfile was flushed ('syncs'), errors 
+        writing the logfile ('write_errors'), rows sampled late, and sampling ticks skipped because the sampler fell more than an 
+        interval behind.
+
+        :return: A dict with keys 'queue_depth', 'rows_queued', 'rows_written', 'rows_dropped', 'syncs', 'write_errors', 'rows_late', and 'ticks_skipped'
+        :rtype: dict
+        """
+        if self.writer is None:
+            stats = {'queue_depth':0,'rows_queued':0,'rows_written':0,'rows_dropped':0,'syncs':0,'write_errors':0}
+        else:
+            stats = self.writer.get_stats()
+        stats['rows_late'] = self.rows_late
+        stats['ticks_skipped'] = self.ticks_skipped
+        return stats
 
     def _choose_destination(self):
         """Open a dialog window to let the user select where the logfile should be saved."""
@@ -152,12 +267,16 @@ class DataLoggingWidget():
         timestamp = datetime.datetime.now().strftime('%H-%M')
         default = datestamp+"_"+timestamp+"_logfile"
         de = '.csv'
-        self.filename = fd.asksaveasfilename(defaultextension=de,initialfile=default)
+        types = [('CSV file','*.csv'),('NumPy archive (binary)','*.npz')]
+        self._set_destination(self.parent.gui.filedialog.asksaveasfilename(defaultextension=de,initialfile=default,filetypes=types))
+
+    def _set_destination(self, filename):
+        """Set the file that data will be logged to.
+        
+        :param filename: The path of the logfile
+        :type filename: str
+        """
+        self.filename = filename
         f = str.split(self.filename,'/')
         f = f[len(f)-1]
         self.destination.set(f) # Just the file name, not the whole path
-        if os.path.isfile(self.filename):
-            # File exists already
-            self.empty_file = False
-        else:
-            self.empty_file = True
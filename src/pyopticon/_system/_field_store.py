@@ -0,0 +1,192 @@
+import time
+import enum
+import threading
+import numbers
+
+class Field:
+    """ The value of one widget field, as created by GenericWidget.add_field. The value lives in a plain Python attribute along with
+    the time it was last set, so it can be read or written from any thread without touching the Tcl interpreter. The tkinter
+    StringVar bound to the field's GUI element is just a view: writes are pushed to it through the dashboard's GuiUpdateBatcher,
+    and edits the user makes in the GUI (typing in an entry box, picking from a dropdown) are copied back into the field.
+
+    Field has get() and set() methods like a StringVar, so code that treats widget.attributes as a dict of StringVars keeps working.
+    Other code can be told whenever the value changes by registering a listener with add_listener.
+
+    A field may declare a dtype (float, int, bool, or an enum.Enum subclass), in which case it holds native values of that type and
+    only formats them as text for display. Strings passed to set() are parsed; a string that can't be parsed, e.g. 'No Reading' or
+    'Read Error', is kept as-is, so widgets can still report their status through a numeric field.
+
+    :param name: The field's name
+    :type name: str
+    :param value: The field's initial value
+    :type value: str, or the field's dtype
+    :param view: The StringVar that displays the field, or None if it has no GUI element
+    :type view: tkinter.StringVar
+    :param batcher: The dashboard's GuiUpdateBatcher, used to update the view from other threads
+    :type batcher: pyopticon._system._gui_update_batcher.GuiUpdateBatcher
+    :param dtype: The type of the field's values: str (the default), float, int, bool, or an enum.Enum subclass
+    :type dtype: type, optional
+    :param fmt: How to display values, as a format string like '{:.1f}' or a function that takes a value and returns a str. By default, values are displayed with str(), and enum members by name.
+    :type fmt: str or function, optional
+    """
+
+    def __init__(self, name, value, view, batcher, dtype=str, fmt=None):
+        """Constructor for a Field"""
+        if not (dtype in (str,float,int,bool) or (isinstance(dtype,type) and issubclass(dtype,enum.Enum))):
+            raise Exception("Field dtype must be str, float, int, bool, or an enum.Enum subclass.")
+        self.name = name
+        self.view = view
+        self.batcher = batcher
+        self.dtype = dtype
+        self.fmt = fmt
+        self._state = (self._coerce(value),time.time()) # Replaced as a whole, never mutated, so readers never see a half-written value
+        self._lock = threading.Lock() # Held while _state or listeners is replaced, so concurrent writers don't lose each other's changes
+        self._updating_view = False
+        self.listeners = () # Replaced as a whole when listeners are added or removed, so it can be iterated from any thread
+        if view is not None:
+            view.set(self.format())
+            view.trace_add('write',self._on_view_write)
+
+    def _coerce(self, value):
+        """Convert a value to the field's dtype. Strings that can't be parsed as the dtype, and non-integral numbers for an int
+        field, are kept as strings.
+
+        :param value: The value to convert
+        :return: The converted value
+        """
+        if self.dtype is str:
+            return '' if value is None else str(value)
+        if value is None or type(value) is self.dtype:
+            return value
+        try:
+            if isinstance(value,str):
+                return self._parse(value.strip())
+            if self.dtype is int and not isinstance(value,numbers.Integral):
+                number = float(value) # Accept e.g. 3.0 or numpy.float64(3.0), but not 3.5, rather than truncating it
+                if not number.is_integer():
+                    raise ValueError(value)
+                return int(number)
+            return self.dtype(value)
+        except (ValueError,TypeError,KeyError):
+            return str(value)
+
+    def _parse(self, text):
+        """Parse a string as the field's dtype, raising ValueError or KeyError if it isn't valid."""
+        if self.dtype is float:
+            return float(text)
+        if self.dtype is int:
+            number = float(text) # Accept e.g. '3.0' from a dropdown or an old logfile, but not '3.5'
+            if not number.is_integer():
+                raise ValueError(text)
+            return int(number)
+        if self.dtype is bool:
+            if text.lower() in ('true','1','yes','on'):
+                return True
+            if text.lower() in ('false','0','no','off'):
+                return False
+            raise ValueError(text)
+        if text in self.dtype.__members__: # Enum member by name...
+            return self.dtype[text]
+        for member in self.dtype: # ...or by value
+            if str(member.value)==text:
+                return member
+        raise ValueError(text)
+
+    def format(self, value=None):
+        """Get the text that's displayed for a value.
+
+        :param value: The value to format. Defaults to the field's current value.
+        :return: The text to display
+        :rtype: str
+        """
+        value = self.get() if value is None else value
+        if value is None:
+            return ''
+        if isinstance(value,str):
+            return value
+        if self.fmt is not None:
+            return self.fmt.format(value) if isinstance(self.fmt,str) else self.fmt(value)
+        if isinstance(value,enum.Enum):
+            return value.name
+        return str(value)
+
+    def get(self):
+        """Get the field's current value. Safe to call from any thread.
+
+        :return: The field's value
+        :rtype: str, or the field's dtype
+        """
+        return self._state[0]
+
+    def get_timestamp(self):
+        """Get the time the field's value was last set.
+
+        :return: The time, in seconds since the epoch as returned by time.time()
+        :rtype: float
+        """
+        return self._state[1]
+
+    def set(self, value):
+        """Set the field's value, and update its GUI element at the next GUI refresh. Safe to call from any thread.
+
+        :param value: The new value, which is converted to the field's dtype
+        :type value: str, or the field's dtype
+        """
+        value = self._coerce(value)
+        with self._lock:
+            old_value = self._state[0]
+            state = (value,time.time())
+            self._state = state
+        if self.view is not None:
+            self.batcher.refresh(self)
+        if len(self.listeners)>0:
+            self._notify(old_value,state)
+
+    def add_listener(self, listener):
+        """Register a function to be called whenever the field's value changes, whether through set() or the GUI. It's called as 
+        listener(field, value, timestamp) in whichever thread changed the value, so it should be quick and thread-safe.
+
+        :param listener: The function to call
+        :type listener: function
+        """
+        with self._lock:
+            self.listeners = self.listeners+(listener,)
+
+    def remove_listener(self, listener):
+        """Stop calling a function registered with add_listener.
+
+        :param listener: The function
+        :type listener: function
+        """
+        with self._lock:
+            self.listeners = tuple(l for l in self.listeners if l is not listener)
+
+    def _notify(self, old_value, state):
+        """Call the listeners if the value in state, the (value, timestamp) just set, is different from old_value. Called after the 
+        lock is released, so listeners can read or set the field."""
+        value, timestamp = state
+        if value==old_value and type(value)==type(old_value):
+            return
+        for listener in self.listeners:
+            listener(self,value,timestamp)
+
+    def _update_view(self):
+        """Copy the field's current value into its StringVar. Runs in the Tkinter thread."""
+        self._updating_view = True
+        try:
+            self.view.set(self.format())
+        finally:
+            self._updating_view = False
+
+    def _on_view_write(self, *args):
+        """Trace callback for the StringVar: copy edits made through the GUI into the field. Runs in the Tkinter thread."""
+        if self._updating_view:
+            return
+        new_value = self._coerce(self.view.get())
+        with self._lock:
+            old_value = self._state[0]
+            if new_value == old_value and type(new_value) == type(old_value):
+                return
+            state = (new_value,time.time())
+            self._state = state
+        self._notify(old_value,state)
@@ -0,0 +1,71 @@
+import threading
+
+class GuiUpdateBatcher:
+    """ Collects GUI updates requested from worker threads and applies them in one Tkinter callback per refresh interval,
+    rather than posting a separate after(0) callback for every write. Repeated updates to the same StringVar between refreshes
+    collapse into one, so a dashboard with many fast-polling widgets doesn't flood the Tkinter event queue.
+
+    Updates requested from the Tkinter thread itself are applied immediately.
+
+    :param root: The dashboard's Tkinter root object
+    :type root: tkinter.Tk
+    :param refresh_ms: How long to wait after the first pending update before applying everything that's pending, in milliseconds.
+    :type refresh_ms: int
+    """
+
+    def __init__(self, root, refresh_ms):
+        """Constructor for a GuiUpdateBatcher. Must be called from the Tkinter thread."""
+        self.root = root
+        self.refresh_ms = refresh_ms
+        self.tk_thread = threading.current_thread()
+        self.lock = threading.Lock()
+        self.pending = dict() # Maps each StringVar's Tcl name to a function that updates it; StringVars themselves aren't hashable
+        self.flush_scheduled = False
+
+    def set(self, stringvar, value):
+        """Set a StringVar's value, from any thread.
+
+        :param stringvar: The StringVar to set
+        :type stringvar: tkinter.StringVar
+        :param value: The new value
+        :type value: str
+        """
+        self._request(str(stringvar),lambda: stringvar.set(value))
+
+    def refresh(self, field):
+        """Update a Field's StringVar from the field's value, from any thread. The value is read when the update is applied, so
+        the GUI always ends up showing the field's latest value.
+
+        :param field: The field whose GUI element to update
+        :type field: pyopticon._system._field_store.Field
+        """
+        self._request(str(field.view),field._update_view)
+
+    def _request(self, key, update):
+        """Apply an update now if on the Tkinter thread, or queue it for the next refresh otherwise.
+
+        :param key: The Tcl name of the StringVar being updated
+        :type key: str
+        :param update: A function that performs the update
+        :type update: function
+        """
+        if threading.current_thread() is self.tk_thread:
+            with self.lock:
+                self.pending.pop(key,None) # Don't let an older pending update overwrite this one later
+            update()
+            return
+        with self.lock:
+            self.pending[key] = update
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        self.root.after(self.refresh_ms,self.flush)
+
+    def flush(self):
+        """Apply every pending update. Runs in the Tkinter thread."""
+        with self.lock:
+            pending = self.pending
+            self.pending = dict()
+            self.flush_scheduled = False
+        for update in pending.values():
+            update()
@@ -0,0 +1,255 @@
+import threading
+import heapq
+import itertools
+import time
+import sys
+import traceback
+
+__all__ = ['HeadlessRoot','HeadlessVariable','HeadlessElement','HeadlessMessagebox','HeadlessFiledialog','HeadlessFont']
+
+# Stand-ins for tkinter, for running a dashboard with headless=True on a machine with no display, or with no Tk installed.
+# A headless dashboard's 'gui' attribute is this module rather than the tkinter module, so widgets that build their GUI with
+# e.g. self.parent_dashboard.gui.Label(...) get one of these objects instead. Any tkinter widget class (gui.Canvas, gui.Scale,
+# ...) gives a HeadlessElement, and any tkinter constant (gui.DISABLED, gui.END, ...) gives its usual value; see __getattr__ at
+# the bottom. Widgets that create tkinter objects directly (from tkinter import *; Label(...)) can't run headless.
+
+class HeadlessRoot:
+    """ Stands in for the dashboard's tkinter.Tk object when the dashboard is headless. Runs the same after() callbacks that the
+    Tkinter mainloop would (polling, logging, automation, GUI updates), in order of when they're due, on whatever thread calls mainloop().
+    Unlike Tkinter's, this after() may be called from any thread.
+    """
+
+    def __init__(self):
+        """Constructor for a HeadlessRoot"""
+        self.condition = threading.Condition()
+        self.timers = [] # Heap of (time.monotonic() due, tiebreaker, id, function, args)
+        self.cancelled = set()
+        self.counter = itertools.count()
+        self.destroyed = False
+        self.protocols = dict()
+        self.report_callback_exception = None
+
+    def after(self, ms, func, *args):
+        """Call a function after a delay.
+
+        :param ms: The delay, in milliseconds
+        :type ms: int
+        :param func: The function to call
+        :type func: function
+        :return: An id that can be passed to after_cancel
+        :rtype: str
+        """
+        with self.condition:
+            n = next(self.counter)
+            after_id = 'after#'+str(n)
+            heapq.heappush(self.timers,(time.monotonic()+ms/1000,n,after_id,func,args))
+            self.condition.notify()
+        return after_id
+
+    def after_idle(self, func, *args):
+        """Call a function as soon as possible."""
+        return self.after(0,func,*args)
+
+    def after_cancel(self, after_id):
+        """Cancel a callback scheduled with after().
+
+        :param after_id: The id returned by after()
+        :type after_id: str
+        """
+        with self.condition:
+            self.cancelled.add(after_id)
+
+    def mainloop(self):
+        """Run callbacks as they come due until destroy() is called. Ctrl-C is handled like closing the window."""
+        while True:
+            try:
+                with self.condition:
+                    while not self.destroyed:
+                        if len(self.timers)==0:
+                            self.condition.wait()
+                            continue
+                        delay = self.timers[0][0]-time.monotonic()
+                        if delay<=0:
+                            break
+                        self.condition.wait(delay)
+                    if self.destroyed:
+                        return
+                    (due,n,after_id,func,args) = heapq.heappop(self.timers)
+                    if after_id in self.cancelled:
+                        self.cancelled.discard(after_id)
+                        continue
+                self._run_callback(func,args)
+            except KeyboardInterrupt:
+                print("Keyboard interrupt; closing the dashboard.")
+                if 'WM_DELETE_WINDOW' in self.protocols:
+                    self._run_callback(self.protocols['WM_DELETE_WINDOW'],())
+                else:
+                    self.destroy()
+
+    def _run_callback(self, func, args):
+        """Run one callback, reporting any exception the way Tkinter would."""
+        try:
+            func(*args)
+        except Exception:
+            if self.report_callback_exception is not None:
+                self.report_callback_exception(*sys.exc_info())
+            else:
+                traceback.print_exc()
+
+    def destroy(self):
+        """Make mainloop() return."""
+        with self.condition:
+            self.destroyed = True
+            self.condition.notify()
+
+    def protocol(self, name, func):
+        """Remember a window manager protocol handler; 'WM_DELETE_WINDOW' runs on Ctrl-C."""
+        self.protocols[name] = func
+
+    def title(self, *args):
+        """Does nothing; there's no window."""
+        pass
+
+    def resizable(self, *args):
+        """Does nothing; there's no window."""
+        pass
+
+    def winfo_children(self):
+        """There are no GUI elements."""
+        return []
+
+
+class HeadlessVariable:
+    """ Stands in for tkinter.StringVar and BooleanVar when the dashboard is headless. Holds a value and runs trace callbacks.
+
+    :param master: Ignored
+    :param value: The initial value
+    """
+
+    def __init__(self, master=None, value=None, name=None):
+        """Constructor for a HeadlessVariable"""
+        self.value = '' if value is None else value
+        self.traces = []
+
+    def get(self):
+        """Get the variable's value."""
+        return self.value
+
+    def set(self, value):
+        """Set the variable's value and run any trace callbacks."""
+        self.value = value
+        for callback in self.traces:
+            callback(str(id(self)),'','write')
+
+    def trace_add(self, mode, callback):
+        """Register a callback to run whenever the variable is set."""
+        self.traces.append(callback)
+
+    def __str__(self):
+        """A unique name for the variable, like a Tcl variable name."""
+        return 'HEADLESS_VAR'+str(id(self))
+
+
+class HeadlessElement:
+    """ Stands in for tkinter's Frame, Label, Button, Entry, OptionMenu, and Checkbutton when the dashboard is headless.
+    It accepts the same constructor arguments and ignores any method called on it (grid, configure, etc.), so GUI-building
+    code runs unchanged. Like an Entry, get() returns the value of its textvariable, if it has one.
+    """
+
+    def __init__(self, master=None, *args, **kwargs):
+        """Constructor for a HeadlessElement"""
+        self.textvariable = kwargs['textvariable'] if 'textvariable' in kwargs.keys() else None
+        if self.textvariable is None and len(args)>0 and isinstance(args[0],HeadlessVariable): # OptionMenu(master, variable, *options)
+            self.textvariable = args[0]
+        self.options = dict(kwargs)
+
+    def get(self):
+        """Get the value of the element's textvariable, or '' if it has none."""
+        return '' if self.textvariable is None else self.textvariable.get()
+
+    def grid_size(self):
+        """Elements are never actually gridded."""
+        return (0,0)
+
+    def winfo_children(self):
+        """There are no GUI elements."""
+        return []
+
+    def cget(self, key):
+        """Get an option passed to the constructor or configure, or None."""
+        return self.options.get(key)
+
+    def configure(self, **kwargs):
+        """Remember options, e.g. state='disabled'."""
+        self.options.update(kwargs)
+
+    config = configure
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def __getattr__(self, name):
+        """Any other method (grid, grid_remove, pack, bind, ...) does nothing."""
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+class HeadlessMessagebox:
+    """Stands in for tkinter.messagebox when the dashboard is headless; messages are printed to the console instead."""
+
+    def showinfo(self, title, message, **kwargs):
+        """Print the message."""
+        print(message)
+
+    showwarning = showinfo
+    showerror = showinfo
+
+
+class HeadlessFiledialog:
+    """Stands in for tkinter.filedialog when the dashboard is headless. There's nobody to choose a file, so asking raises an exception;
+    pass filenames directly instead, e.g. to PyOpticonDashboard.load_automation_script."""
+
+    def __getattr__(self, name):
+        """Every dialog (askopenfilename, asksaveasfilename, ...) raises an exception."""
+        if name.startswith('__'):
+            raise AttributeError(name)
+        def ask(*args, **kwargs):
+            raise Exception("A headless dashboard can't show a file dialog ("+name+"); give the filename directly instead.")
+        return ask
+
+
+class HeadlessFont:
+    """Stands in for tkinter.font when the dashboard is headless. Fonts are HeadlessElements."""
+
+    Font = HeadlessElement
+
+    def nametofont(self, name, **kwargs):
+        """Get a stand-in for a named font."""
+        return HeadlessElement()
+
+Frame = HeadlessElement
+Label = HeadlessElement
+Button = HeadlessElement
+Entry = HeadlessElement
+OptionMenu = HeadlessElement
+Checkbutton = HeadlessElement
+StringVar = HeadlessVariable
+BooleanVar = HeadlessVariable
+messagebox = HeadlessMessagebox()
+filedialog = HeadlessFiledialog()
+font = HeadlessFont()
+
+_CONSTANTS = {'TRUE':1,'FALSE':0,'YES':1,'NO':0}
+
+def __getattr__(name):
+    """Stand-ins for the rest of tkinter: the value of a constant such as DISABLED or END ('disabled', 'end'), and a HeadlessElement 
+    class for any widget class such as Canvas or Scale."""
+    if name.isupper():
+        return _CONSTANTS.get(name,name.lower())
+    if name[:1].isupper():
+        return HeadlessElement
+    raise AttributeError("module '"+__name__+"' has no attribute '"+name+"'")
@@ -0,0 +1,217 @@
+import os
+import re
+import gzip
+import shutil
+import time
+import threading
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__all__ = ['RotatingFile','rotate_log_file','list_log_segments']
+
+# Rotation for long-running logfiles. The file being written always keeps the name it was given, e.g. 'run.csv'. When it's rotated,
+# it's renamed to the next numbered segment, e.g. 'run.0001.csv', 'run.0002.csv', ..., and optionally compressed in the background
+# to 'run.0001.csv.gz' (gzip) or 'run.0001.csv.zst' (zstd, if the zstandard package is installed).
+
+COMPRESSION_EXTENSIONS = {'gzip':'.gz','zstd':'.zst'}
+
+def _check_compression(compression):
+    """Raise an exception if a compression option isn't supported.
+
+    :param compression: None, 'gzip', or 'zstd'
+    :type compression: str
+    """
+    if compression is not None and compression not in COMPRESSION_EXTENSIONS.keys():
+        raise Exception("Log compression must be None, 'gzip', or 'zstd', not "+str(compression))
+    if compression=='zstd' and zstandard is None:
+        raise Exception("zstd log compression needs the zstandard package (pip install zstandard). Use 'gzip' instead, or install it.")
+
+def _segment_pattern(filename):
+    """Get a regular expression matching the basenames of filename's rotated segments, with the segment number as group 1.
+
+    :param filename: The path of the logfile
+    :type filename: str
+    :return: The compiled pattern
+    :rtype: re.Pattern
+    """
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    return re.compile(re.escape(stem)+r'\.(\d{4,})'+re.escape(ext)+r'(\.gz|\.zst)?$')
+
+def list_log_segments(filename):
+    """List a logfile's rotated segments, oldest first, followed by the logfile itself if it exists. If a segment is in the middle of
+    being compressed, it's listed once, uncompressed.
+
+    :param filename: The path of the logfile, e.g. 'run.csv'
+    :type filename: str
+    :return: The paths of the segments, e.g. ['run.0001.csv.gz', 'run.0002.csv', 'run.csv']
+    :rtype: list
+    """
+    directory = os.path.dirname(filename)
+    pattern = _segment_pattern(filename)
+    segments = dict()
+    for name in os.listdir(directory if directory!='' else '.'):
+        match = pattern.match(name)
+        if match is None:
+            continue
+        n = int(match.group(1))
+        if n not in segments or match.group(2) is None: # Prefer the uncompressed copy until compression has finished
+            segments[n] = os.path.join(directory,name)
+    out = [segments[n] for n in sorted(segments.keys())]
+    if os.path.isfile(filename):
+        out.append(filename)
+    return out
+
+def rotate_log_file(filename, compression=None):
+    """Rename a closed logfile to its next numbered segment, and start compressing it in the background if desired.
+
+    :param filename: The path of the logfile
+    :type filename: str
+    :param compression: None, 'gzip', or 'zstd'. Defaults to None.
+    :type compression: str, optional
+    :return: The path that the logfile was renamed to
+    :rtype: str
+    """
+    _check_compression(compression)
+    directory = os.path.dirname(filename)
+    pattern = _segment_pattern(filename)
+    numbers = [int(m.group(1)) for m in map(pattern.match,os.listdir(directory if directory!='' else '.')) if m is not None]
+    n = 1 if len(numbers)==0 else max(numbers)+1
+    stem, ext = os.path.splitext(filename)
+    segment = stem+'.'+str(n).zfill(4)+ext
+    os.replace(filename,segment)
+    if compression is not None:
+        threading.Thread(target=_compress,args=(segment,compression),name="PyOpticon log compression").start()
+    return segment
+
+def _compress(path, compression):
+    """Compress a file, writing to a temporary name first so a half-written file is never mistaken for a segment, then delete the original.
+
+    :param path: The path of the file
+    :type path: str
+    :param compression: 'gzip' or 'zstd'
+    :type compression: str
+    """
+    destination = path+COMPRESSION_EXTENSIONS[compression]
+    try:
+        with open(path,'rb') as src:
+            if compression=='gzip':
+                with gzip.open(destination+'.part','wb') as dst:
+                    shutil.copyfileobj(src,dst)
+            else:
+                with open(destination+'.part','wb') as dst:
+                    zstandard.ZstdCompressor().copy_stream(src,dst)
+        os.replace(destination+'.part',destination)
+        os.remove(path)
+    except Exception as e:
+        print("Failed to compress log segment "+str(path)+": "+str(e))
+
+
+class RotatingFile:
+    """ A text file opened for appending that rotates itself once it's bigger than max_bytes or older than max_seconds: the current
+    file is renamed to the next numbered segment (see rotate_log_file), optionally compressed, and a new, empty file is started under
+    the original name. Rotation only happens at the start of a write, so if every write is a whole line, no line is ever split between
+    segments. If header is set, it's written at the top of every new segment. Newlines are written as-is on every platform, so the
+    number of bytes written so far is always a valid offset into the file. Safe to write from several threads.
+
+    :param filename: The path of the logfile. Data is appended if it already exists.
+    :type filename: str
+    :param max_bytes: Rotate once the file is at least this big, in bytes. Defaults to None (no limit).
+    :type max_bytes: int, optional
+    :param max_seconds: Rotate once this many seconds have passed since the segment was started (or the file was opened). Defaults to None (no limit).
+    :type max_seconds: float, optional
+    :param compression: How to compress closed segments: None, 'gzip', or 'zstd'. Defaults to None.
+    :type compression: str, optional
+    :param header: Text to write at the top of every new segment, or None. Defaults to None.
+    :type header: str, optional
+    """
+
+    def __init__(self, filename, max_bytes=None, max_seconds=None, compression=None, header=None):
+        """Constructor for a RotatingFile"""
+        _check_compression(compression)
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.header = header
+        self.lock = threading.RLock()
+        self.rotations = 0
+        self._open()
+
+    def _open(self):
+        """Open the current segment."""
+        self.open_file = open(self.filename,'a',newline='',encoding='utf-8')
+        self.size = self.open_file.tell()
+        self.started = time.monotonic()
+
+    def is_empty(self):
+        """Whether nothing has been written to the current segment yet.
+
+        :return: True if the current segment is empty
+        :rtype: bool
+        """
+        return self.size==0
+
+    def _rotation_due(self):
+        """Whether the current segment is big or old enough to be rotated."""
+        if self.size==0:
+            return False
+        if self.max_bytes is not None and self.size>=self.max_bytes:
+            return True
+        return self.max_seconds is not None and time.monotonic()-self.started>=self.max_seconds
+
+    def rotate(self):
+        """Close the current segment, rename (and maybe compress) it, and start a new one."""
+        with self.lock:
+            self.open_file.close()
+            rotate_log_file(self.filename,self.compression)
+            self.rotations += 1
+            self._open()
+
+    def write(self, s):
+        """Write text, rotating first if a rotation is due.
+
+        :param s: The text
+        :type s: str
+        """
+        with self.lock:
+            if self._rotation_due():
+                self.rotate()
+            if self.size==0 and self.header is not None:
+                self.size += len(self.header.encode())
+                self.open_file.write(self.header)
+            self.size += len(s.encode())
+            self.open_file.write(s)
+
+    def write_header(self, header):
+        """Change the header, and write the new one now, e.g. because a logfile's columns have changed. If a rotation is due, the new
+        header starts a new segment instead.
+
+        :param header: The new header
+        :type header: str
+        :return: The byte offset in the current segment at which the header starts
+        :rtype: int
+        """
+        with self.lock:
+            self.header = header
+            if self._rotation_due():
+                self.rotate()
+            offset = self.size
+            self.size += len(header.encode())
+            self.open_file.write(header)
+            return offset
+
+    def flush(self):
+        """Flush Python's buffer for the current segment."""
+        with self.lock:
+            self.open_file.flush()
+
+    def fileno(self):
+        """Get the current segment's file descriptor, e.g. for os.fsync."""
+        return self.open_file.fileno()
+
+    def close(self):
+        """Close the current segment. It isn't rotated."""
+        with self.lock:
+            self.open_file.close()
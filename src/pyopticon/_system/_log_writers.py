@@ -0,0 +1,578 @@
+import os
+import enum
+import datetime
+import time
+import zipfile
+import queue
+import threading
+import numpy as np
+from ._log_rotation import RotatingFile, rotate_log_file
+
+# Writers used by the DataLoggingWidget to append rows of logged data to a file. Each row is a datetime.datetime timestamp
+# plus a list of column names ('Nickname: Field') and a matching list of values, as returned by widgets' log_data methods.
+
+# When logs are read back into NumPy arrays, every column is float64, with NaN wherever a value wasn't a number (e.g. 'No Reading'
+# or an enum member's name). Those values are kept, sparsely, under this key: a dict mapping each column that has any of them to a
+# (row indices, values) pair of arrays.
+TEXT_KEY = '#text'
+
+def _split_text(cells):
+    """Parse a column of logged values, as text, into numbers, keeping the ones that aren't numbers separately.
+
+    :param cells: The values
+    :type cells: numpy.ndarray
+    :return: A float64 array with NaN for blank cells and cells that aren't numbers ('True' and 'False' are read as 1 and 0), 
+        the row indices of the cells that aren't numbers, and their text
+    :rtype: tuple
+    """
+    try:
+        return (np.where(cells=='','nan',cells).astype(np.float64),np.empty(0,dtype=np.int64),np.empty(0,dtype=str))
+    except ValueError:
+        pass
+    numbers = np.full(len(cells),np.nan)
+    rows = []
+    text = []
+    for i in range(len(cells)): # Only columns with text in them are parsed cell by cell
+        cell = str(cells[i])
+        if cell=='':
+            continue
+        try:
+            numbers[i] = float(cell)
+        except ValueError:
+            if cell=='True' or cell=='False':
+                numbers[i] = (cell=='True')
+            else:
+                rows.append(i)
+                text.append(cell)
+    return (numbers,np.array(rows,dtype=np.int64),np.array(text,dtype=str))
+
+def _select_rows(chunk, keep):
+    """Keep only some rows of a chunk of log data, including its text values.
+
+    :param chunk: A dict mapping 'Timestamp' and column names to arrays, and maybe TEXT_KEY to text values
+    :type chunk: dict
+    :param keep: Which rows to keep
+    :type keep: numpy.ndarray of bool
+    :return: The selected rows, in the same form
+    :rtype: dict
+    """
+    out = dict((k,v[keep]) for (k,v) in chunk.items() if k!=TEXT_KEY)
+    if TEXT_KEY in chunk.keys():
+        new_index = np.cumsum(keep)-1
+        text = dict()
+        for (name,(rows,values)) in chunk[TEXT_KEY].items():
+            kept = keep[rows]
+            if kept.any():
+                text[name] = (new_index[rows[kept]],values[kept])
+        out[TEXT_KEY] = text
+    return out
+
+def _concatenate_chunks(chunks):
+    """Join chunks of log data into one, padding columns that are missing from some chunks with NaN.
+
+    :param chunks: Dicts mapping 'Timestamp' and column names to arrays, and maybe TEXT_KEY to text values
+    :type chunks: list
+    :return: One dict in the same form
+    :rtype: dict
+    """
+    names = []
+    for chunk in chunks:
+        for name in chunk.keys():
+            if name not in names and name!='Timestamp' and name!=TEXT_KEY:
+                names.append(name)
+    out = {'Timestamp':np.concatenate([c['Timestamp'] for c in chunks]) if len(chunks)>0 else np.empty(0)}
+    for name in names:
+        out[name] = np.concatenate([c[name] if name in c else np.full(len(c['Timestamp']),np.nan) for c in chunks])
+    text = dict()
+    first_row = 0
+    for chunk in chunks:
+        for (name,(rows,values)) in chunk.get(TEXT_KEY,dict()).items():
+            text.setdefault(name,[]).append((rows+first_row,values))
+        first_row += len(chunk['Timestamp'])
+    out[TEXT_KEY] = dict((name,(np.concatenate([p[0] for p in parts]),np.concatenate([p[1] for p in parts]))) for (name,parts) in text.items())
+    return out
+
+class CsvLogWriter:
+    """ Writes logged data as CSV text, with 'Date' and 'Timestamp' columns followed by one column per logged field.
+
+    The file is made of schema blocks. Each block starts with a '#schema=<n>' line and a header row naming its columns, and is
+    followed by rows with those columns. A new block is started whenever the columns change, e.g. when logging is restarted to an
+    existing file after a widget or field was added, so earlier rows never end up under the wrong header. Alongside the logfile, an
+    index file (the logfile's name plus '.idx'; see read_log_index) records where each block starts, so readers can jump to the right
+    block without scanning the whole file. The file can also be rotated by size or age (see RotatingFile), in which case every new
+    segment starts with the current schema block's header.
+
+    :param filename: The path of the logfile. Data is appended if it already exists.
+    :type filename: str
+    :param subsecond: Whether to include milliseconds in the Timestamp column, e.g. for logging intervals shorter than a second. Defaults to False.
+    :type subsecond: bool, optional
+    :param rotate_bytes: Start a new segment once the file is at least this many bytes. Defaults to None (never).
+    :type rotate_bytes: int, optional
+    :param rotate_seconds: Start a new segment once the current one is this many seconds old. Defaults to None (never).
+    :type rotate_seconds: float, optional
+    :param compression: How to compress closed segments: None, 'gzip', or 'zstd'. Defaults to None.
+    :type compression: str, optional
+    """
+
+    def __init__(self, filename, subsecond=False, rotate_bytes=None, rotate_seconds=None, compression=None):
+        """Constructor for a CsvLogWriter"""
+        self.filename = filename
+        self.index_filename = filename+'.idx'
+        self.subsecond = subsecond
+        self.schema, self.names = self._find_last_schema()
+        self.raw_names = None # The last list of names passed to write_row, before commas were replaced
+        self.open_file = RotatingFile(filename,rotate_bytes,rotate_seconds,compression) # Appends; better to just avoid overwriting...
+        if self.names is not None:
+            self.open_file.header = self._header(self.schema,self.names)
+
+    def write_row(self, now, names, values):
+        """Append one row of data, starting a new schema block first if the columns have changed.
+
+        :param now: When the data was sampled
+        :type now: datetime.datetime
+        :param names: The column names
+        :type names: list
+        :param values: The values, in the same order as the names
+        :type values: list
+        """
+        if names is not self.raw_names: # Callers usually pass the same list every time, so only compare columns when it changes
+            self.raw_names = names
+            sanitized = [name.replace(","," -") for name in names]
+            if sanitized!=self.names:
+                self.schema += 1
+                self.names = sanitized
+                rotations = self.open_file.rotations
+                offset = self.open_file.write_header(self._header(self.schema,self.names))
+                self._add_to_index(offset,now,restart=(offset==0 or rotations!=self.open_file.rotations))
+        new_line = now.strftime("%m/%d/%Y")+","+now.strftime('%H:%M:%S')
+        if self.subsecond:
+            new_line += now.strftime('.%f')[:4] # Milliseconds
+        for value in values:
+            new_line += ","+self._format_value(value)
+        rotations = self.open_file.rotations
+        self.open_file.write(new_line+"\n")
+        if rotations!=self.open_file.rotations: # The new segment starts with the current header, so its index starts over
+            self._add_to_index(0,now,restart=True)
+
+    def _header(self, schema, names):
+        """Make the lines that start a schema block.
+
+        :param schema: The schema's number
+        :type schema: int
+        :param names: The column names, with commas already replaced
+        :type names: list
+        :return: The '#schema=<n>' line and the header row
+        :rtype: str
+        """
+        return "#schema="+str(schema)+"\n"+",".join(["Date","Timestamp"]+names)+"\n"
+
+    def _add_to_index(self, offset, now, restart=False):
+        """Record the start of a schema block in the index file.
+
+        :param offset: The byte offset of the block's '#schema' line
+        :type offset: int
+        :param now: The timestamp of the block's first row
+        :type now: datetime.datetime
+        :param restart: Whether to discard the existing index, e.g. because this block starts a new file or segment. Defaults to False.
+        :type restart: bool, optional
+        """
+        self._write_index([(self.schema,offset,now.timestamp())],restart)
+
+    def _write_index(self, entries, restart):
+        """Append entries to the index file, or replace its contents.
+
+        :param entries: (schema, offset, first timestamp) tuples
+        :type entries: list
+        :param restart: Whether to replace the existing index
+        :type restart: bool
+        """
+        new_file = restart or not os.path.isfile(self.index_filename)
+        with open(self.index_filename,'w' if restart else 'a') as f:
+            if new_file:
+                f.write("Schema,Offset,First Timestamp\n")
+            for (schema,offset,first) in entries:
+                f.write(str(schema)+","+str(offset)+","+repr(float(first))+"\n")
+
+    def _find_last_schema(self):
+        """Find the number and columns of the last schema block in an existing logfile, using its index. A logfile with no index, e.g.
+        one written by an older version of PyOpticon, is scanned once and an index is built for it.
+
+        :return: The schema number (0 if the file is new) and its column names (None if the file is new)
+        :rtype: tuple
+        """
+        if (not os.path.isfile(self.filename)) or os.path.getsize(self.filename)==0:
+            if os.path.isfile(self.index_filename):
+                os.remove(self.index_filename) # Left over from a deleted logfile
+            return (0,None)
+        index = read_log_index(self.filename) if os.path.isfile(self.index_filename) else self._rebuild_index()
+        if len(index)==0:
+            return (0,None)
+        schema, offset, first = index[-1]
+        with open(self.filename,'r',encoding='utf-8',newline='') as f:
+            f.seek(offset)
+            line = f.readline()
+            if line.startswith('#schema='):
+                line = f.readline()
+        return (schema,line.rstrip('\r\n').split(',')[2:])
+
+    def _rebuild_index(self):
+        """Scan the whole logfile for schema blocks and write an index of them. Header rows without a '#schema' line before them, as
+        written by older versions of PyOpticon, are numbered in order.
+
+        :return: (schema, offset, first timestamp) tuples; the first timestamp is NaN if it can't be read
+        :rtype: list
+        """
+        index = []
+        offset = 0
+        schema = 0
+        after_marker = False
+        with open(self.filename,'rb') as f:
+            for line in f:
+                if line.startswith(b'#schema='):
+                    schema = int(line[8:].strip())
+                    index.append([schema,offset,np.nan])
+                    after_marker = True
+                elif line.startswith(b'Date,Timestamp'):
+                    if not after_marker:
+                        schema += 1
+                        index.append([schema,offset,np.nan])
+                    after_marker = False
+                else:
+                    after_marker = False
+                    if len(index)>0 and np.isnan(index[-1][2]):
+                        try:
+                            cells = line.decode('utf-8').split(',')
+                            index[-1][2] = datetime.datetime.strptime(cells[0]+" "+cells[1][:8],"%m/%d/%Y %H:%M:%S").timestamp()
+                        except Exception:
+                            pass
+                offset += len(line)
+        self._write_index(index,True)
+        return [tuple(entry) for entry in index]
+
+    def sync(self, fsync=False):
+        """Push written rows out of Python's buffer to the operating system, and optionally to the disk.
+
+        :param fsync: Whether to also call os.fsync, so rows survive a power failure. Defaults to False.
+        :type fsync: bool, optional
+        """
+        self.open_file.flush()
+        if fsync:
+            os.fsync(self.open_file.fileno())
+
+    def _format_value(self, value):
+        """Format one logged value as CSV text. Numbers are written with full precision; enum members are written by name.
+
+        :param value: The value returned by a widget's log_data
+        :return: The text to put in the CSV cell
+        :rtype: str
+        """
+        if isinstance(value,enum.Enum):
+            value = value.name
+        return str(value).replace(","," -")
+
+    def close(self):
+        """Close the file."""
+        self.open_file.close()
+
+
+class NpzLogWriter:
+    """ Writes logged data to a NumPy .npz archive (a zip file of .npy arrays), which can be opened with numpy.load and read back
+    column by column without parsing any text. Rows are collected in preallocated NumPy arrays and written out as one compressed
+    chunk every chunk_rows rows or chunk_seconds seconds, whichever comes first, and when logging stops. Chunk n is stored as the members
+    'chunk_<n>/names' (the column names), 'chunk_<n>/t' (timestamps, as float64 seconds since the epoch), and 'chunk_<n>/c<i>' for
+    the i-th column, as float64. Values that aren't numbers or bools (e.g. 'No Reading') are NaN in the column, and are kept in
+    'chunk_<n>/x<i>i' (their row indices) and 'chunk_<n>/x<i>v' (their text), which are only written if the column has any.
+
+    Appending to an existing archive adds new chunks after the ones already there. The archive can be rotated by size or age, in which
+    case it's renamed to a numbered segment after a chunk is written (see rotate_log_file) and a new archive is started. Chunks are
+    already compressed, so segments aren't compressed again.
+
+    :param filename: The path of the .npz logfile
+    :type filename: str
+    :param chunk_rows: The maximum number of rows per chunk. Defaults to 1000.
+    :type chunk_rows: int, optional
+    :param chunk_seconds: The maximum time to hold rows in memory before writing a chunk, in seconds. Defaults to 60.
+    :type chunk_seconds: float, optional
+    :param rotate_bytes: Start a new segment once the archive is at least this many bytes. Defaults to None (never).
+    :type rotate_bytes: int, optional
+    :param rotate_seconds: Start a new segment once the current one is this many seconds old. Defaults to None (never).
+    :type rotate_seconds: float, optional
+    """
+
+    def __init__(self, filename, chunk_rows=1000, chunk_seconds=60, rotate_bytes=None, rotate_seconds=None):
+        """Constructor for an NpzLogWriter"""
+        self.filename = filename
+        self.chunk_rows = chunk_rows
+        self.chunk_seconds = chunk_seconds
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.segment_started = time.monotonic()
+        self.next_chunk = 0
+        if os.path.isfile(filename) and os.path.getsize(filename)>0:
+            with zipfile.ZipFile(filename,'r') as z:
+                chunks = set(n.split('/')[0] for n in z.namelist() if n.startswith('chunk_'))
+            self.next_chunk = len(chunks)
+        self.names = None
+        self.t = np.empty(chunk_rows,dtype=np.float64)
+        self.columns = []
+        self.text = [] # For each column, a dict mapping row index to the value, for rows whose values aren't numbers
+        self.n_rows = 0
+        self.chunk_started = None
+
+    def write_row(self, now, names, values):
+        """Add one row of data, writing out a chunk if one is due.
+
+        :param now: When the data was sampled
+        :type now: datetime.datetime
+        :param names: The column names
+        :type names: list
+        :param values: The values, in the same order as the names
+        :type values: list
+        """
+        if self.names is not None and list(names)!=self.names: # Every chunk has a single set of columns
+            self.flush()
+        if self.names is None:
+            self.names = list(names)
+            self.columns = [np.empty(self.chunk_rows,dtype=np.float64) for n in names]
+            self.text = [dict() for n in names]
+        if self.n_rows==0:
+            self.chunk_started = time.monotonic()
+        i = self.n_rows
+        self.t[i] = now.timestamp()
+        for j in range(len(values)):
+            value = values[j]
+            if isinstance(value,(int,float,np.number)) and not isinstance(value,enum.Enum): # bools are ints
+                self.columns[j][i] = value
+            else:
+                self.columns[j][i] = np.nan
+                self.text[j][i] = value.name if isinstance(value,enum.Enum) else str(value)
+        self.n_rows += 1
+        if self.n_rows>=self.chunk_rows or time.monotonic()-self.chunk_started>=self.chunk_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write the rows collected so far to the archive as one compressed chunk."""
+        if self.n_rows==0:
+            self.names = None
+            return
+        n = self.n_rows
+        prefix = 'chunk_'+str(self.next_chunk).zfill(6)+'/'
+        with zipfile.ZipFile(self.filename,'a',compression=zipfile.ZIP_DEFLATED) as z:
+            self._write_array(z,prefix+'names',np.array(self.names,dtype=str))
+            self._write_array(z,prefix+'t',self.t[:n])
+            for j in range(len(self.names)):
+                self._write_array(z,prefix+'c'+str(j),self.columns[j][:n])
+                if len(self.text[j])>0:
+                    rows = sorted(self.text[j].keys())
+                    self._write_array(z,prefix+'x'+str(j)+'i',np.array(rows,dtype=np.int64))
+                    self._write_array(z,prefix+'x'+str(j)+'v',np.array([self.text[j][i] for i in rows],dtype=str))
+        self.next_chunk += 1
+        self.n_rows = 0
+        self.names = None
+        if (self.rotate_bytes is not None and os.path.getsize(self.filename)>=self.rotate_bytes) or \
+                (self.rotate_seconds is not None and time.monotonic()-self.segment_started>=self.rotate_seconds):
+            rotate_log_file(self.filename)
+            self.next_chunk = 0
+            self.segment_started = time.monotonic()
+
+    def sync(self, fsync=False):
+        """Does nothing; rows are held in memory until a whole chunk is written, and each chunk is written in one go."""
+        pass
+
+    def _write_array(self, z, name, array):
+        """Write one array into the archive as a .npy member.
+
+        :param z: The open archive
+        :type z: zipfile.ZipFile
+        :param name: The member's name, without the .npy extension
+        :type name: str
+        :param array: The array
+        :type array: numpy.ndarray
+        """
+        with z.open(name+'.npy','w',force_zip64=True) as f:
+            np.lib.format.write_array(f,np.ascontiguousarray(array),allow_pickle=False)
+
+    def close(self):
+        """Write any remaining rows."""
+        self.flush()
+
+
+class WriteBehindLogWriter:
+    """ Wraps a CsvLogWriter or NpzLogWriter so that rows are handed to a background thread to be written, rather than written by
+    the thread that samples them; a slow network share or USB disk then can't hold up sampling. Rows wait in a bounded queue. If the
+    queue fills up because the disk can't keep up, new rows are dropped (and counted) rather than blocking the sampler. Written rows are
+    synced every flush_rows rows or flush_seconds seconds, whichever comes first.
+
+    :param writer: The writer that does the actual writing
+    :type writer: pyopticon._system._log_writers.CsvLogWriter or pyopticon._system._log_writers.NpzLogWriter
+    :param max_rows: The maximum number of rows waiting to be written. Defaults to 10000.
+    :type max_rows: int, optional
+    :param flush_rows: Sync after this many rows. Defaults to 10.
+    :type flush_rows: int, optional
+    :param flush_seconds: Sync at least this often while rows are being written, in seconds. Defaults to 1.
+    :type flush_seconds: float, optional
+    :param fsync: Whether each sync also calls os.fsync to force rows onto the disk. Safer, but slower. Defaults to False.
+    :type fsync: bool, optional
+    :param on_error: A function to call with any exception raised while writing. Defaults to printing it. So that e.g. a full disk 
+        doesn't produce a report for every row, an error is only reported the first time it happens, and then at most once every 
+        error_report_seconds while it keeps happening; every error is counted in get_stats.
+    :type on_error: function, optional
+    :param error_report_seconds: How often to report an error that keeps happening, in seconds. Defaults to 60.
+    :type error_report_seconds: float, optional
+    """
+
+    def __init__(self, writer, max_rows=10000, flush_rows=10, flush_seconds=1, fsync=False, on_error=print, error_report_seconds=60):
+        """Constructor for a WriteBehindLogWriter. Starts the writer thread."""
+        self.writer = writer
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.on_error = on_error
+        self.error_report_seconds = error_report_seconds
+        self.errors = 0
+        self.errors_unreported = 0 # Errors since the last one that was reported
+        self.last_error = None # Type and text of the last error reported
+        self.last_error_reported = 0 # time.monotonic() when it was reported
+        self.queue = queue.Queue(max_rows)
+        self.rows_queued = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.syncs = 0
+        self.thread = threading.Thread(target=self._run,name="PyOpticon log writer")
+        self.thread.start()
+
+    def write_row(self, now, names, values):
+        """Queue one row to be written. Never blocks; if the queue is full, the row is dropped.
+
+        :param now: When the data was sampled
+        :type now: datetime.datetime
+        :param names: The column names
+        :type names: list
+        :param values: The values, in the same order as the names
+        :type values: list
+        """
+        try:
+            self.queue.put_nowait((now,names,values))
+            self.rows_queued += 1
+        except queue.Full:
+            self.rows_dropped += 1
+
+    def close(self):
+        """Wait for every queued row to be written, then close the underlying writer."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        """Body of the writer thread. Writes rows as they arrive and syncs on the configured cadence, until close() is called."""
+        unsynced = 0
+        last_sync = time.monotonic()
+        while True:
+            timeout = None if unsynced==0 else max(0,last_sync+self.flush_seconds-time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False # Time to sync
+            if item is None:
+                break
+            try:
+                if item:
+                    self.writer.write_row(*item)
+                    self.rows_written += 1
+                    unsynced += 1
+                if unsynced>0 and (unsynced>=self.flush_rows or time.monotonic()-last_sync>=self.flush_seconds):
+                    self.writer.sync(self.fsync)
+                    self.syncs += 1
+                    unsynced = 0
+                    last_sync = time.monotonic()
+            except Exception as e:
+                self._report_error(e)
+        try:
+            self.writer.close()
+        except Exception as e:
+            self._report_error(e)
+
+    def _report_error(self, e):
+        """Count an error raised while writing, and pass it to on_error if it's new, or if it's been error_report_seconds since it 
+        was last reported.
+
+        :param e: The exception
+        :type e: Exception
+        """
+        self.errors += 1
+        error = (type(e),str(e))
+        now = time.monotonic()
+        if error==self.last_error and now-self.last_error_reported<self.error_report_seconds:
+            self.errors_unreported += 1
+            return
+        if self.errors_unreported>0:
+            print(str(self.errors_unreported)+" more errors writing the logfile weren't reported individually.")
+        self.errors_unreported = 0
+        self.last_error = error
+        self.last_error_reported = now
+        self.on_error(e)
+
+    def get_stats(self):
+        """Get counters describing the write-behind queue.
+
+        :return: A dict with keys 'queue_depth' (rows currently waiting), 'rows_queued', 'rows_written', 'rows_dropped', 'syncs', and 'write_errors' (including those not reported individually)
+        :rtype: dict
+        """
+        return {'queue_depth':self.queue.qsize(),'rows_queued':self.rows_queued,'rows_written':self.rows_written,
+                'rows_dropped':self.rows_dropped,'syncs':self.syncs,'write_errors':self.errors}
+
+
+def read_log_index(filename):
+    """Read the index of a CSV logfile's schema blocks, written by CsvLogWriter.
+
+    :param filename: The path of the logfile (not of the index file)
+    :type filename: str
+    :return: A list of (schema number, byte offset of the block's '#schema' line, timestamp of the block's first row in seconds since the epoch) tuples, in the order the blocks appear in the file. The timestamp may be NaN if it isn't known.
+    :rtype: list
+    """
+    index = []
+    with open(filename+'.idx','r') as f:
+        f.readline() # Header
+        for line in f:
+            if line.strip()=='':
+                continue
+            schema, offset, first = line.strip().split(',')
+            index.append((int(schema),int(offset),float(first)))
+    return index
+
+def iter_npz_chunks(filename):
+    """Read a logfile written by NpzLogWriter one chunk at a time, so archives bigger than memory can be processed piece by piece.
+
+    :param filename: The path of the .npz logfile
+    :type filename: str
+    :return: A generator of dicts, one per chunk, like the one read_npz_log returns
+    :rtype: generator
+    """
+    with np.load(filename,allow_pickle=False) as archive: # Members are only read from the archive when they're accessed
+        members = set(archive.files)
+        for chunk in sorted(set(k.split('/')[0] for k in members if k.startswith('chunk_'))):
+            names = [str(n) for n in archive[chunk+'/names']]
+            out = {'Timestamp':archive[chunk+'/t']}
+            text = dict()
+            for j in range(len(names)):
+                column = archive[chunk+'/c'+str(j)]
+                if column.dtype.kind=='U': # Written by an older version, which stored columns with any text in them as text
+                    (column,rows,values) = _split_text(column)
+                elif chunk+'/x'+str(j)+'i' in members:
+                    (rows,values) = (archive[chunk+'/x'+str(j)+'i'],archive[chunk+'/x'+str(j)+'v'])
+                else:
+                    rows = []
+                out[names[j]] = column
+                if len(rows)>0:
+                    text[names[j]] = (rows,values)
+            out[TEXT_KEY] = text
+            yield out
+
+def read_npz_log(filename):
+    """Read a logfile written by NpzLogWriter back into memory, one array per column.
+
+    :param filename: The path of the .npz logfile
+    :type filename: str
+    :return: A dict mapping 'Timestamp' to an array of float64 epoch seconds, each column name to a float64 array of its values, with NaN where a value wasn't a number, and TEXT_KEY ('#text') to a dict mapping column names to (row indices, text) pairs of arrays for those values. Columns missing from some chunks are padded with NaN.
+    :rtype: dict
+    """
+    return _concatenate_chunks(list(iter_npz_chunks(filename)))
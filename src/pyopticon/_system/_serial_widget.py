@@ -1,7 +1,9 @@
-from tkinter import *
 import serial.tools.list_ports
 import platform
 import traceback
+import time
+import heapq
+import itertools
 
 # Serial widget
 class SerialWidget:
@@ -21,18 +23,23 @@ class SerialWidget:
         self.root = parent_dashboard.get_tkinter_object()
         self.serial_polling_wait = polling_interval # Poll serial ports every X milliseconds
         self.main_color = '#FF7F7F'
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         # Widget for all serial connections
-        self.frame = Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
-        self.control_label = Label(self.frame,text="Control Serial Communication")
+        self.frame = gui.Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
+        self.control_label = gui.Label(self.frame,text="Control Serial Communication")
         self.control_label.grid(row=1,column=1,sticky='nesw')
         # Open/close serial communication logic
-        self.connect_serial_text = StringVar()
+        self.connect_serial_text = gui.StringVar()
         self.connect_serial_text.set("Start polling devices")
         self.parent.serial_connected = False
-        Button(self.frame,textvariable=self.connect_serial_text,command = self._toggle_serial_connected).grid(row=2,column=1,sticky='nesw')
+        gui.Button(self.frame,textvariable=self.connect_serial_text,command = self._toggle_serial_connected).grid(row=2,column=1,sticky='nesw')
         # Serial port updating logic
-        self.update_ports_button = Button(self.frame,text="Update Serial Ports",command=self._update_serial_ports)
+        self.update_ports_button = gui.Button(self.frame,text="Update Serial Ports",command=self._update_serial_ports)
         self.update_ports_button.grid(row=3,column=1,sticky='nesw')
+        # Polling schedule state; see _start_polling_clock
+        self._poll_heap = []
+        self._poll_after_id = None
+        self._reset_polling_stats()
 
     def get_frame(self):
         """Get the tkinter frame on which this object is drawn.
@@ -51,6 +58,9 @@ class SerialWidget:
             self.connect_serial_text.set("Start polling devices")
             self.parent.serial_connected = False
             self.update_ports_button.configure(state='normal')
+            if self._poll_after_id is not None: # Stop the polling clock so a quick reconnect doesn't start a second one
+                self.root.after_cancel(self._poll_after_id)
+                self._poll_after_id = None
             for obj in self.parent.all_widgets:
                 obj.close_serial()
             print("Closing all connections.")
@@ -63,31 +73,131 @@ class SerialWidget:
             # Prompt widgets to connect to their devices
             for obj in self.parent.all_widgets:
                 if hasattr(obj,'queue'):
-                    obj.queue.put(('HANDSHAKE',obj)) #Prompt each widget to update
+                    obj.queue.put(('HANDSHAKE',obj,time.monotonic())) #Prompt each widget to update
             print("Opening all connections.")
 
             # Start polling the devices as normal. A device is expected to ignore queries while it's handshaking.
-            self.root.after(self.serial_polling_wait,lambda: self._update_widgets())
+            self._reset_polling_stats()
+            self._start_polling_clock()
             #self.root.after(self.serial_polling_wait*max_interval-50,lambda: print("All connections opened."))
 
+    def _polling_period(self,obj):
+        """Get how often a widget should be prompted to update: its update_interval_ms if it has one, otherwise 
+        update_every_n_cycles (default 1) times the dashboard's polling interval.
+        
+        :param obj: The widget
+        :type obj: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+        :return: The widget's polling period, in seconds
+        :rtype: float
+        """
+        if getattr(obj,'update_interval_ms',None) is not None:
+            return obj.update_interval_ms/1000
+        return getattr(obj,'update_every_n_cycles',1)*self.serial_polling_wait/1000
+
+    def _start_polling_clock(self):
+        """Build the polling schedule: a heap of (deadline, tiebreaker, period, widget) entries ordered by time.monotonic() deadline, 
+        with one entry per widget plus one (with widget None) for the interlocks, which run every polling interval. Every entry is 
+        first due one polling interval from now, as before."""
+        base_period = self.serial_polling_wait/1000
+        first_deadline = time.monotonic()+base_period
+        self._poll_tiebreaker = itertools.count() # Keeps heap comparisons from ever reaching the widget objects
+        self._poll_heap = [(first_deadline,next(self._poll_tiebreaker),base_period,None)]
+        for obj in self.parent.all_widgets:
+            if hasattr(obj,'queue'):
+                self._poll_heap.append((first_deadline,next(self._poll_tiebreaker),self._polling_period(obj),obj))
+        heapq.heapify(self._poll_heap)
+        self._schedule_next_poll()
+
     def _update_widgets(self):
-        """So long as serial communications are active, poll all widgets. Also check interlocks"""
+        """So long as serial communications are active, prompt every widget that's due to update, and check interlocks if they're due. 
+        Each entry is then rescheduled on its own fixed grid of deadlines, so widgets polled at different rates don't hold each other up."""
+        self._poll_after_id = None
         if not self.parent.serial_connected:
             return
-        for obj in self.parent.all_widgets:
-            if hasattr(obj,'queue'):
-                if hasattr(obj,'doing_handshake'):
-                    if obj.doing_handshake:
-                        print("Warning: widget '"+obj.name+"' prompted to update before handshake complete. Ignoring...")
-                        continue
-
-                obj.queue.put(('UPDATE',obj)) #Prompt each widget to update
-                
-                if hasattr(obj,'doing_update'):
-                    if obj.doing_update:
-                        print("Warning: widget '"+obj.name+"' prompted to update before the previous update cycle finished. Consider polling less often using update_every_n_cycles argument, or else the dashboard may lag.")
-        self.root.after(self.serial_polling_wait,self._update_widgets)
-        self._poll_interlocks()
+        now = time.monotonic()
+        while self._poll_heap[0][0] <= now+0.001: # after() works in whole milliseconds, so allow waking up a hair early
+            (deadline,tiebreaker,period,obj) = heapq.heappop(self._poll_heap)
+            self._record_poll_jitter(now-deadline)
+            if obj is None:
+                self._poll_interlocks()
+            else:
+                self._prompt_update(obj)
+            heapq.heappush(self._poll_heap,(self._next_deadline(deadline,period),next(self._poll_tiebreaker),period,obj))
+        self._schedule_next_poll()
+
+    def _prompt_update(self,obj):
+        """Put an 'UPDATE' command in a widget's queue, warning if the widget is still busy.
+        
+        :param obj: The widget to update
+        :type obj: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+        """
+        if hasattr(obj,'doing_handshake'):
+            if obj.doing_handshake:
+                print("Warning: widget '"+obj.name+"' prompted to update before handshake complete. Ignoring...")
+                return
+
+        obj.queue.put(('UPDATE',obj,time.monotonic())) #Prompt the widget to update
+        
+        if hasattr(obj,'doing_update'):
+            if obj.doing_update:
+                print("Warning: widget '"+obj.name+"' prompted to update before the previous update cycle finished. Consider polling less often using the update_interval_ms or update_every_n_cycles arguments, or else the dashboard may lag.")
+
+    def _next_deadline(self,deadline,period):
+        """Get the next deadline on an entry's fixed grid. Ticks fall on multiples of the period after the first deadline, so 
+        time spent polling, running interlocks, or waiting on a busy Tkinter event queue doesn't make the cadence drift. If whole 
+        ticks have already been missed, they're skipped (and counted) rather than run back-to-back.
+        
+        :param deadline: The deadline of the tick that just ran, from time.monotonic()
+        :type deadline: float
+        :param period: The entry's polling period, in seconds
+        :type period: float
+        :return: The next deadline, which is always in the future
+        :rtype: float
+        """
+        next_deadline = deadline+period
+        now = time.monotonic()
+        if next_deadline <= now:
+            self.polling_overruns += 1
+            missed = int((now-next_deadline)//period)+1
+            self.polling_ticks_skipped += missed
+            next_deadline += missed*period
+        return next_deadline
+
+    def _schedule_next_poll(self):
+        """Arm _update_widgets for whenever the next entry in the polling schedule is due. Nothing wakes up in between."""
+        delay_ms = max(0,int(round((self._poll_heap[0][0]-time.monotonic())*1000)))
+        self._poll_after_id = self.root.after(delay_ms,self._update_widgets)
+
+    def _reset_polling_stats(self):
+        """Zero the statistics reported by get_polling_stats."""
+        self.polling_ticks = 0
+        self.polling_overruns = 0
+        self.polling_ticks_skipped = 0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+        self._jitter_last = 0.0
+
+    def _record_poll_jitter(self,jitter):
+        """Add one observation to the polling jitter statistics.
+        
+        :param jitter: How far after its deadline this tick ran, in seconds (can be slightly negative)
+        :type jitter: float
+        """
+        self.polling_ticks += 1
+        self._jitter_last = jitter
+        self._jitter_total += abs(jitter)
+        self._jitter_max = max(self._jitter_max,abs(jitter))
+
+    def get_polling_stats(self):
+        """Get statistics on how closely polling has kept to its schedule since serial communications were last opened. Each 
+        widget update and each run of the interlocks counts as a tick.
+        
+        :return: A dict with keys 'ticks', 'overruns' (times a tick ran so late that the next one was already due), 'ticks_skipped', and 'jitter_last', 'jitter_mean', and 'jitter_max' (absolute lateness of ticks, in seconds)
+        :rtype: dict
+        """
+        mean = (self._jitter_total/self.polling_ticks) if self.polling_ticks>0 else 0.0
+        return {'ticks':self.polling_ticks,'overruns':self.polling_overruns,'ticks_skipped':self.polling_ticks_skipped,
+                'jitter_last':self._jitter_last,'jitter_mean':mean,'jitter_max':self._jitter_max}
 
 
     def _read_serial_ports(self):
@@ -0,0 +1,204 @@
+import time
+import struct
+import zlib
+import threading
+from ._socket_protocol import pack, unpack, _plain_value
+
+__all__ = ['SharedSnapshotPublisher','SharedSnapshotReader']
+
+# A dashboard can publish the latest values of its logged fields (see PyOpticonDashboard.get_snapshot) to a named block of shared
+# memory, for analysis processes on the same computer to read without a socket round trip, or any system call, per read. The block
+# starts with a fixed header, followed by the snapshot encoded as MessagePack (see _socket_protocol):
+#
+#   bytes 0-7    b'PYOSNAP1'
+#   bytes 8-15   sequence number (uint64), odd while the snapshot is being rewritten
+#   bytes 16-19  length of the snapshot in bytes (uint32)
+#   bytes 20-23  CRC-32 of the snapshot (uint32)
+#   bytes 24-31  when it was published, in seconds since the epoch (float64)
+#
+# all little-endian. Readers copy the snapshot out and check that the sequence number was even and unchanged throughout, and that the
+# checksum matches, and try again if not (a 'seqlock'), so the dashboard never waits for readers.
+
+MAGIC = b'PYOSNAP1'
+HEADER = struct.Struct('<8sQIId')
+SEQUENCE = struct.Struct('<Q')
+
+def _shared_memory():
+    """Import the multiprocessing.shared_memory module, which is only imported when a shared snapshot is actually used, so that the 
+    rest of PyOpticon still works on Python versions without it.
+
+    :return: The module
+    :rtype: module
+    """
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise Exception("Shared memory snapshots need Python 3.8 or later.")
+    return shared_memory
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership of it.
+
+    :param name: The block's name
+    :type name: str
+    :return: The block
+    :rtype: multiprocessing.shared_memory.SharedMemory
+    """
+    shared_memory = _shared_memory()
+    try:
+        return shared_memory.SharedMemory(name=name,track=False) # Python 3.13+
+    except TypeError:
+        pass
+    memory = shared_memory.SharedMemory(name=name)
+    try: # Otherwise Python would delete the block when this process exits, as if this process had created it
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name,'shared_memory')
+    except Exception:
+        pass
+    return memory
+
+
+class SharedSnapshotPublisher:
+    """ Publishes the dashboard's snapshot to shared memory every interval seconds, from a thread of its own. Values that the binary
+    socket encoding can't carry are published as text.
+
+    :param dashboard: The dashboard
+    :type dashboard: pyopticon.dashboard.PyOpticonDashboard
+    :param name: The name of the shared memory block, which readers use to find it
+    :type name: str
+    :param interval: How often to publish, in seconds. Defaults to 0.1.
+    :type interval: float, optional
+    :param size: The size of the block in bytes, which limits the size of the snapshot. Defaults to 1 MB.
+    :type size: int, optional
+    """
+
+    def __init__(self, dashboard, name, interval=0.1, size=1024*1024):
+        """Constructor for a SharedSnapshotPublisher. Creates the shared memory block, replacing one left behind by a dashboard that didn't close cleanly."""
+        self.dashboard = dashboard
+        self.name = name
+        self.interval = interval
+        shared_memory = _shared_memory()
+        try:
+            self.memory = shared_memory.SharedMemory(name=name,create=True,size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.memory = shared_memory.SharedMemory(name=name,create=True,size=size)
+        self.sequence = 0
+        self.publications = 0
+        self.too_big = False
+        self.stop_event = threading.Event()
+        HEADER.pack_into(self.memory.buf,0,MAGIC,0,0,0,0.0)
+
+    def publish(self):
+        """Write the current snapshot to shared memory."""
+        snapshot = _plain_value(self.dashboard.get_snapshot())
+        payload = pack(snapshot)
+        if HEADER.size+len(payload)>self.memory.size:
+            if not self.too_big: # Only warn once
+                print("The dashboard's snapshot ("+str(len(payload))+" bytes) doesn't fit in shared memory block '"+self.name
+                    +"'; increase shared_snapshot_bytes.")
+                self.too_big = True
+            return
+        buf = self.memory.buf
+        SEQUENCE.pack_into(buf,8,self.sequence+1) # Odd: readers will retry
+        buf[HEADER.size:HEADER.size+len(payload)] = payload
+        HEADER.pack_into(buf,0,MAGIC,self.sequence+1,len(payload),zlib.crc32(payload),time.time())
+        self.sequence += 2
+        SEQUENCE.pack_into(buf,8,self.sequence)
+        self.publications += 1
+
+    def run(self):
+        """Publish every interval seconds until stop() is called. Runs in the publisher's thread."""
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                self.dashboard.exc_handler(e,"shared memory snapshot")
+        self.memory.close()
+        self.memory.unlink()
+
+    def stop(self):
+        """Stop publishing and remove the shared memory block."""
+        self.stop_event.set()
+
+
+class SharedSnapshotReader:
+    """ Reads the snapshot that a dashboard on the same computer publishes to shared memory (see the dashboard's shared_snapshot_name
+    option). Reading the header, to check whether there's a new snapshot, involves no system calls, so it's cheap to call read as often
+    as desired; the snapshot is only decoded when it's changed.
+
+    :param name: The name of the shared memory block, as given to the dashboard
+    :type name: str
+    """
+
+    def __init__(self, name):
+        """Constructor for a SharedSnapshotReader. Raises an exception if the dashboard isn't publishing under that name."""
+        try:
+            self.memory = _attach(name)
+        except FileNotFoundError:
+            raise Exception("No dashboard is publishing a snapshot named '"+str(name)+"'")
+        if bytes(self.memory.buf[0:8])!=MAGIC:
+            self.memory.close()
+            raise Exception("Shared memory block '"+str(name)+"' doesn't hold a PyOpticon snapshot.")
+        self.name = name
+        self.last_sequence = None
+        self.last_snapshot = None
+        self.last_timestamp = None
+
+    def get_sequence(self):
+        """Get the snapshot's sequence number, which goes up each time the dashboard publishes. Costs no system calls.
+
+        :return: The sequence number; odd while a new snapshot is being written
+        :rtype: int
+        """
+        return SEQUENCE.unpack_from(self.memory.buf,8)[0]
+
+    def read(self, retries=1000):
+        """Get the latest snapshot.
+
+        :param retries: How many times to try again if the dashboard is in the middle of publishing. Defaults to 1000.
+        :type retries: int, optional
+        :return: A dict with keys 'sequence', 'timestamp' (when it was published, in seconds since the epoch), and 'fields' (a dict mapping widgets' nicknames to dicts of their logged fields' names and values), or None if nothing has been published yet
+        :rtype: dict
+        """
+        buf = self.memory.buf
+        for attempt in range(retries+1):
+            sequence = SEQUENCE.unpack_from(buf,8)[0]
+            if sequence==self.last_sequence:
+                return {'sequence':sequence,'timestamp':self.last_timestamp,'fields':self.last_snapshot}
+            if sequence==0:
+                return None
+            if sequence%2==1:
+                continue
+            (magic,header_sequence,length,crc,timestamp) = HEADER.unpack_from(buf,0)
+            if length>self.memory.size-HEADER.size:
+                continue
+            payload = bytes(buf[HEADER.size:HEADER.size+length])
+            if SEQUENCE.unpack_from(buf,8)[0]!=sequence or zlib.crc32(payload)!=crc:
+                continue # Rewritten while it was being copied
+            self.last_sequence = sequence
+            self.last_snapshot = unpack(payload)
+            self.last_timestamp = timestamp
+            return {'sequence':sequence,'timestamp':timestamp,'fields':self.last_snapshot}
+        raise Exception("Couldn't get a consistent snapshot from shared memory after "+str(retries)+" retries.")
+
+    def get_field(self, widget_nickname, field_name):
+        """Get the latest published value of one logged field.
+
+        :param widget_nickname: The widget's nickname
+        :type widget_nickname: str
+        :param field_name: The field's name
+        :type field_name: str
+        :return: The value
+        :rtype: object
+        """
+        snapshot = self.read()
+        if snapshot is None:
+            raise Exception("The dashboard hasn't published a snapshot yet.")
+        return snapshot['fields'][widget_nickname][field_name]
+
+    def close(self):
+        """Detach from the shared memory block. The dashboard's block is left alone."""
+        self.memory.close()
@@ -1,6 +1,4 @@
-from tkinter import *
 import ctypes
-from tkinter import messagebox
 import webbrowser
 
 
@@ -18,23 +16,24 @@ class ShowHideWidget:
         self.parent = parent_dashboard
         self.root = parent_dashboard.get_tkinter_object()
         self.main_color = '#FF7F7F'
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         # Widget for showing and hiding terminal and serial interfaces
-        self.frame = Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
-        Label(self.frame,text="Show and Hide Widgets").grid(row=1,column=1)
+        self.frame = gui.Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
+        gui.Label(self.frame,text="Show and Hide Widgets").grid(row=1,column=1)
         # Button to show or hide console
-        self.console_shown_text = StringVar()
+        self.console_shown_text = gui.StringVar()
         self.console_shown = True
         self._toggle_console()
-        Button(self.frame,textvariable=self.console_shown_text,command=self._toggle_console).grid(row=2,column=1,sticky='nesw')
+        gui.Button(self.frame,textvariable=self.console_shown_text,command=self._toggle_console).grid(row=2,column=1,sticky='nesw')
         # Button to show or hide serial interface
-        self.serial_shown_text = StringVar()
+        self.serial_shown_text = gui.StringVar()
         self.serial_shown_text.set("Hide all Serial controls")
         self.serial_shown = True
-        Button(self.frame,textvariable=self.serial_shown_text,command=self._toggle_serial_shown).grid(row=3,column=1,sticky='nesw')
+        gui.Button(self.frame,textvariable=self.serial_shown_text,command=self._toggle_serial_shown).grid(row=3,column=1,sticky='nesw')
         # General help button
-        Button(self.frame, text="Open Help Website", command=self._documentation).grid(row=4,column=1,sticky='nesw')
+        gui.Button(self.frame, text="Open Help Website", command=self._documentation).grid(row=4,column=1,sticky='nesw')
         # Automation help button
-        Button(self.frame, text="Print Automation Help to Console", command = self._print_automation_help).grid(row=5,column=1,sticky='nesw')
+        gui.Button(self.frame, text="Print Automation Help to Console", command = self._print_automation_help).grid(row=5,column=1,sticky='nesw')
 
 
     def get_frame(self):
@@ -58,7 +57,7 @@ class ShowHideWidget:
             try: # The code below doesn't work on macs.
                 ctypes.windll.user32.ShowWindow(ctypes.windll.kernel32.GetConsoleWindow(),4)
             except:
-                messagebox.showinfo("Can't Open Console", "Toggling the console isn't supported on this operating system. You'll need to run this script using a launcher that generates a console, e.g. (on a Mac) IDLE or the Python Launcher with the console option selected in preferences.")
+                self.parent.gui.messagebox.showinfo("Can't Open Console", "Toggling the console isn't supported on this operating system. You'll need to run this script using a launcher that generates a console, e.g. (on a Mac) IDLE or the Python Launcher with the console option selected in preferences.")
                 return
             self.console_shown_text.set("Hide Console")
             self.console_shown = True
@@ -0,0 +1,336 @@
+import json
+import struct
+import enum
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+__all__ = ['FrameReader','BinaryFrameReader','encode_frame','encode_binary_frame']
+
+# The wire protocol between SocketWidget and PyOpticonSocketClient. Each message is one JSON object followed by a newline.
+# Requests carry an 'id', which the dashboard copies into its response, e.g.
+#
+#   -> {"id": 7, "cmd": "Get", "widget_nickname": "MFC 1", "field_name": "Actual Flow", "printout": false}
+#   <- {"id": 7, "result": "10.0"}
+#   <- {"id": 8, "error": "No widget with nickname 'MFC 9'"}
+#
+# Responses are sent in the order requests arrive, so a client can send many requests at once (pipelining) and match up the
+# responses by id. Messages can be any size. For compatibility with older clients, a request with no 'id' gets the old-style reply:
+# the result as bare text, with no newline.
+#
+# A client can instead ask for the compact binary encoding by sending, as its first request, a Hello listing the encodings it
+# accepts in order of preference, and waiting for the reply:
+#
+#   -> {"id": 1, "cmd": "Hello", "encodings": ["msgpack", "json"]}
+#   <- {"id": 1, "result": {"encoding": "msgpack"}}
+#
+# From then on, every message in both directions is a 4-byte big-endian length followed by that many bytes of MessagePack, and
+# values are sent with their own types (e.g. 23.4 rather than '23.4'). MessagePack is encoded with the msgpack package if it's
+# installed, or else by the pure-Python pack and unpack below, which produce the same bytes, just more slowly.
+
+MAX_FRAME_BYTES = 64*1024*1024
+ENCODINGS = ['msgpack','json'] # In order of preference
+
+def encode_frame(message):
+    """Encode a message for sending through a socket.
+
+    :param message: The message
+    :type message: dict
+    :return: The message as newline-terminated JSON
+    :rtype: bytes
+    """
+    return (json.dumps(message)+"\n").encode()
+
+
+class FrameReader:
+    """ Splits the bytes received on a socket into messages. Bytes are fed in as they arrive, in pieces of any size; every complete
+    JSON object received so far is returned. Objects may be separated by newlines or, as older clients send them, by nothing at all.
+
+    :param max_bytes: The largest incomplete message to buffer before giving up on the connection, in bytes. Defaults to 64 MB.
+    :type max_bytes: int, optional
+    """
+
+    def __init__(self, max_bytes=MAX_FRAME_BYTES):
+        """Constructor for a FrameReader"""
+        self.max_bytes = max_bytes
+        self.chunks = [] # Text received since the last complete message, joined only once another message might be complete
+        self.buffered = 0 # Total length of self.chunks
+        self.pending = b"" # Bytes of a UTF-8 character split between two recv calls
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, data):
+        """Add received bytes and return any messages they complete. Only the new bytes are searched for the end of a message, so a
+        large message arriving in many pieces is joined up and parsed once, not once per piece.
+
+        :param data: The bytes received
+        :type data: bytes
+        :return: The complete messages, in order
+        :rtype: list
+        """
+        data = self.pending+data
+        try:
+            text = data.decode()
+            self.pending = b""
+        except UnicodeDecodeError as e:
+            if e.start<len(data)-3: # Not just a character cut off at the end
+                raise
+            text = data[:e.start].decode()
+            self.pending = data[e.start:]
+        self.chunks.append(text)
+        self.buffered += len(text)
+        if '\n' not in text and not text.rstrip().endswith('}'): # Can't have completed a message
+            if self.buffered>self.max_bytes:
+                raise Exception("Socket message is larger than "+str(self.max_bytes)+" bytes.")
+            return []
+        buffer = "".join(self.chunks)
+        messages = []
+        position = 0
+        while True:
+            while position<len(buffer) and buffer[position].isspace():
+                position += 1
+            if position==len(buffer):
+                break
+            newline = buffer.find('\n',position)
+            if newline==-1 and not buffer.endswith('}'):
+                break # The rest can't be a complete message yet
+            try:
+                message, position = self.decoder.raw_decode(buffer,position)
+            except json.JSONDecodeError:
+                if newline!=-1: # A complete line that isn't valid JSON
+                    raise
+                break # Incomplete; wait for more bytes
+            messages.append(message)
+        buffer = buffer[position:]
+        self.chunks = [buffer] if len(buffer)>0 else []
+        self.buffered = len(buffer)
+        if self.buffered>self.max_bytes:
+            raise Exception("Socket message is larger than "+str(self.max_bytes)+" bytes.")
+        return messages
+
+
+def _pack_into(obj, out):
+    """Append the MessagePack encoding of a value to a bytearray.
+
+    :param obj: The value: None, a bool, int, float, str, bytes, or a list, tuple, or dict of these
+    :type obj: object
+    :param out: The bytearray
+    :type out: bytearray
+    """
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj,int):
+        if 0<=obj<128:
+            out.append(obj)
+        elif -32<=obj<0:
+            out.append(obj&0xff)
+        elif -2**63<=obj<2**63:
+            out += struct.pack('>Bq',0xd3,obj)
+        elif 0<=obj<2**64:
+            out += struct.pack('>BQ',0xcf,obj)
+        else:
+            raise Exception("Integer too large to send: "+str(obj))
+    elif isinstance(obj,float):
+        out += struct.pack('>Bd',0xcb,obj)
+    elif isinstance(obj,str):
+        data = obj.encode()
+        n = len(data)
+        if n<32:
+            out.append(0xa0|n)
+        elif n<2**8:
+            out += struct.pack('>BB',0xd9,n)
+        elif n<2**16:
+            out += struct.pack('>BH',0xda,n)
+        else:
+            out += struct.pack('>BI',0xdb,n)
+        out += data
+    elif isinstance(obj,(bytes,bytearray)):
+        n = len(obj)
+        if n<2**8:
+            out += struct.pack('>BB',0xc4,n)
+        elif n<2**16:
+            out += struct.pack('>BH',0xc5,n)
+        else:
+            out += struct.pack('>BI',0xc6,n)
+        out += obj
+    elif isinstance(obj,(list,tuple)):
+        n = len(obj)
+        if n<16:
+            out.append(0x90|n)
+        elif n<2**16:
+            out += struct.pack('>BH',0xdc,n)
+        else:
+            out += struct.pack('>BI',0xdd,n)
+        for item in obj:
+            _pack_into(item,out)
+    elif isinstance(obj,dict):
+        n = len(obj)
+        if n<16:
+            out.append(0x80|n)
+        elif n<2**16:
+            out += struct.pack('>BH',0xde,n)
+        else:
+            out += struct.pack('>BI',0xdf,n)
+        for (k,v) in obj.items():
+            _pack_into(k,out)
+            _pack_into(v,out)
+    else:
+        raise Exception("Can't send a value of type "+type(obj).__name__)
+
+# Fixed-size MessagePack types: first byte -> struct format of the value that follows
+_FIXED_FORMATS = {0xca:'>f',0xcb:'>d',0xcc:'>B',0xcd:'>H',0xce:'>I',0xcf:'>Q',0xd0:'>b',0xd1:'>h',0xd2:'>i',0xd3:'>q'}
+# Variable-size MessagePack types: first byte -> (struct format of the length, kind)
+_SIZED_FORMATS = {0xd9:('>B','str'),0xda:('>H','str'),0xdb:('>I','str'),0xc4:('>B','bin'),0xc5:('>H','bin'),0xc6:('>I','bin'),
+                  0xdc:('>H','array'),0xdd:('>I','array'),0xde:('>H','map'),0xdf:('>I','map')}
+
+def _unpack_from(data, position):
+    """Decode one MessagePack value.
+
+    :param data: The encoded bytes
+    :type data: bytes
+    :param position: Where the value starts
+    :type position: int
+    :return: The value, and the position just after it
+    :rtype: tuple
+    """
+    first = data[position]
+    position += 1
+    if first<0x80:
+        return (first,position)
+    if first>=0xe0:
+        return (first-0x100,position)
+    if first==0xc0:
+        return (None,position)
+    if first==0xc2 or first==0xc3:
+        return (first==0xc3,position)
+    if first in _FIXED_FORMATS.keys():
+        fmt = _FIXED_FORMATS[first]
+        return (struct.unpack_from(fmt,data,position)[0],position+struct.calcsize(fmt))
+    if 0xa0<=first<0xc0:
+        (kind,n) = ('str',first&0x1f)
+    elif 0x90<=first<0xa0:
+        (kind,n) = ('array',first&0x0f)
+    elif 0x80<=first<0x90:
+        (kind,n) = ('map',first&0x0f)
+    elif first in _SIZED_FORMATS.keys():
+        (fmt,kind) = _SIZED_FORMATS[first]
+        n = struct.unpack_from(fmt,data,position)[0]
+        position += struct.calcsize(fmt)
+    else:
+        raise Exception("Unsupported MessagePack type 0x"+format(first,'02x'))
+    if kind=='str' or kind=='bin':
+        value = bytes(data[position:position+n])
+        if len(value)<n:
+            raise Exception("Truncated MessagePack value")
+        return (value.decode() if kind=='str' else value,position+n)
+    if kind=='array':
+        out = []
+        for i in range(n):
+            (item,position) = _unpack_from(data,position)
+            out.append(item)
+        return (out,position)
+    out = dict()
+    for i in range(n):
+        (k,position) = _unpack_from(data,position)
+        (v,position) = _unpack_from(data,position)
+        out[k] = v
+    return (out,position)
+
+def _plain_value(value):
+    """Convert a value to types that the binary socket encoding can carry: None, bools, numbers, strings, bytes, lists, and dicts.
+
+    :param value: The value
+    :type value: object
+    :return: The converted value; enum members become their names, as in the CSV log, and anything else that can't be converted is turned into text
+    :rtype: object
+    """
+    if isinstance(value,enum.Enum):
+        return value.name
+    if value is None or isinstance(value,(bool,int,float,str,bytes)):
+        return value
+    if hasattr(value,'tolist'): # NumPy scalars and arrays
+        return _plain_value(value.tolist())
+    if isinstance(value,(list,tuple)):
+        return [_plain_value(v) for v in value]
+    if isinstance(value,dict):
+        return dict(((k if isinstance(k,(str,int)) else str(k)),_plain_value(v)) for (k,v) in value.items())
+    return str(value)
+
+def pack(obj):
+    """Encode a value as MessagePack, using the msgpack package if it's installed.
+
+    :param obj: The value: None, a bool, int, float, str, bytes, or a list, tuple, or dict of these
+    :type obj: object
+    :return: The encoded value
+    :rtype: bytes
+    """
+    if msgpack is not None:
+        return msgpack.packb(obj,use_bin_type=True)
+    out = bytearray()
+    _pack_into(obj,out)
+    return bytes(out)
+
+def unpack(data):
+    """Decode a MessagePack value, using the msgpack package if it's installed.
+
+    :param data: The encoded value
+    :type data: bytes
+    :return: The value. Arrays are decoded as lists.
+    :rtype: object
+    """
+    if msgpack is not None:
+        return msgpack.unpackb(data,raw=False,strict_map_key=False)
+    (value,position) = _unpack_from(data,0)
+    if position!=len(data):
+        raise Exception("Extra bytes after MessagePack value")
+    return value
+
+def encode_binary_frame(message):
+    """Encode a message for sending through a socket in binary mode.
+
+    :param message: The message
+    :type message: dict
+    :return: The message's length as a 4-byte big-endian integer, followed by the message as MessagePack
+    :rtype: bytes
+    """
+    payload = pack(message)
+    return struct.pack('>I',len(payload))+payload
+
+
+class BinaryFrameReader:
+    """ Splits the bytes received on a socket in binary mode into messages, like FrameReader does for JSON.
+
+    :param max_bytes: The largest message to accept, in bytes. Defaults to 64 MB.
+    :type max_bytes: int, optional
+    """
+
+    def __init__(self, max_bytes=MAX_FRAME_BYTES):
+        """Constructor for a BinaryFrameReader"""
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received bytes and return any messages they complete.
+
+        :param data: The bytes received
+        :type data: bytes
+        :return: The complete messages, in order
+        :rtype: list
+        """
+        self.buffer += data
+        messages = []
+        position = 0
+        while len(self.buffer)-position>=4:
+            n = struct.unpack_from('>I',self.buffer,position)[0]
+            if n>self.max_bytes:
+                raise Exception("Socket message is larger than "+str(self.max_bytes)+" bytes.")
+            if len(self.buffer)-position-4<n:
+                break
+            messages.append(unpack(bytes(self.buffer[position+4:position+4+n])))
+            position += 4+n
+        del self.buffer[:position]
+        return messages
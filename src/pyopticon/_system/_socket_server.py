@@ -0,0 +1,375 @@
+import os
+import stat
+import socket
+import selectors
+import threading
+import time
+from ._socket_protocol import FrameReader, BinaryFrameReader, encode_frame, encode_binary_frame, ENCODINGS
+
+__all__ = ['SocketServer','SocketConnection']
+
+MAX_OUTBOX_BYTES = 64*1024*1024
+
+class SocketConnection:
+    """ The state of one client's connection to a SocketServer: its socket, the encoding it uses (see _socket_protocol), the bytes
+    received but not yet parsed, the replies and events waiting to be sent, its subscriptions, and some statistics.
+
+    :param server: The server the client connected to
+    :type server: pyopticon._system._socket_server.SocketServer
+    :param sock: The connected socket
+    :type sock: socket.socket
+    :param addr: The client's address
+    :type addr: tuple
+    """
+
+    def __init__(self, server, sock, addr):
+        """Constructor for a SocketConnection"""
+        self.server = server
+        self.sock = sock
+        self.addr = addr
+        self.port = server.port
+        self.encoding = 'json'
+        self.reader = FrameReader()
+        self.lock = threading.Lock() # Replies may be queued from other threads
+        self.outbox = bytearray()
+        self.waiting_to_write = False
+        self.closing = False # Set by a 'Close' command; the connection is closed once its outbox is sent
+        self.subscriptions = dict()
+        self.subscriptions_made = 0
+        self.requests_handled = 0
+        self.connected_at = time.monotonic()
+        self.last_activity = self.connected_at
+
+    def encode(self, message):
+        """Encode a message for sending to the client, in its encoding.
+
+        :param message: The message
+        :type message: dict
+        :return: The framed message
+        :rtype: bytes
+        """
+        if self.encoding=='json':
+            return encode_frame(message)
+        return encode_binary_frame(message)
+
+    def set_encoding(self, encoding):
+        """Switch the encoding used in both directions, after a Hello.
+
+        :param encoding: 'json' or 'msgpack'
+        :type encoding: str
+        """
+        self.encoding = encoding
+        self.reader = FrameReader() if encoding=='json' else BinaryFrameReader()
+
+    def send(self, data):
+        """Queue bytes to be sent to the client. Safe to call from any thread.
+
+        :param data: The bytes
+        :type data: bytes
+        """
+        with self.lock:
+            self.outbox += data
+        if threading.current_thread() is not self.server.thread:
+            self.server.wake()
+
+    def get_info(self):
+        """Describe the connection.
+
+        :return: A dict with keys 'address', 'port', 'encoding', 'connected_seconds', 'idle_seconds', 'requests', and 'subscriptions'
+        :rtype: dict
+        """
+        now = time.monotonic()
+        return {'address':self.addr,'port':self.port,'encoding':self.encoding,'connected_seconds':now-self.connected_at,'idle_seconds':now-self.last_activity,
+                'requests':self.requests_handled,'subscriptions':len(self.subscriptions)}
+
+
+class SocketServer:
+    """ Serves socket clients on one port, all from one thread, using the selectors module: any number of clients can be connected
+    at once, each with its own SocketConnection. Requests are handled in the order they arrive, by the SocketWidget's
+    _process_request, in the server's thread; so a slow Eval or Exec command holds up the other clients on the same port until it
+    finishes. Replies, and change events from subscriptions, are sent without blocking, so a client that stops reading can't stall
+    the others. A socket pair is used to wake the server when another thread has something for it to send.
+
+    :param widget: The SocketWidget that handles the requests
+    :type widget: pyopticon._system._socket_widget.SocketWidget
+    :param port: The port to listen on, or the path of a Unix domain socket to listen on, for clients on the same computer
+    :type port: int or str
+    :param idle_timeout: Disconnect clients that send nothing for this many seconds, unless they have subscriptions. Defaults to None (never).
+    :type idle_timeout: float, optional
+    """
+
+    def __init__(self, widget, port, idle_timeout=None):
+        """Constructor for a SocketServer. Raises an exception if the port can't be opened."""
+        self.widget = widget
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.connections = dict() # socket -> SocketConnection
+        self.thread = None
+        self.stopping = False
+        if isinstance(port,str):
+            self.listener = self._bind_unix(port)
+        else:
+            self.listener = socket.socket()
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(('', port))
+        self.listener.listen(64)
+        self.listener.setblocking(False)
+        self.wakeup_receiver, self.wakeup_sender = socket.socketpair()
+        self.wakeup_receiver.setblocking(False)
+        self.wakeup_sender.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener,selectors.EVENT_READ,'listener')
+        self.selector.register(self.wakeup_receiver,selectors.EVENT_READ,'wakeup')
+
+    def _bind_unix(self, path):
+        """Create a Unix domain socket listening at a path. A socket file left behind by a dashboard that didn't close cleanly is 
+        replaced, but not one that another dashboard is still listening on.
+
+        :param path: The path
+        :type path: str
+        :return: The bound socket
+        :rtype: socket.socket
+        """
+        if not hasattr(socket,'AF_UNIX'):
+            raise Exception("Unix domain sockets aren't supported on this platform.")
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise Exception(str(path)+" already exists and isn't a socket.")
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(path)
+                raise Exception(str(path)+" is already in use.")
+            except OSError:
+                os.remove(path) # Stale
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX)
+        listener.bind(path)
+        return listener
+
+    def wake(self):
+        """Make the server's thread check for replies and events to send. Safe to call from any thread."""
+        try:
+            self.wakeup_sender.send(b'\0')
+        except (BlockingIOError,OSError):
+            pass # Already awake, or shutting down
+
+    def stop(self):
+        """Tell the server to disconnect every client and end its thread."""
+        self.stopping = True
+        self.wake()
+
+    def get_connection_count(self):
+        """Get the number of connected clients.
+
+        :return: The number of connections
+        :rtype: int
+        """
+        return len(self.connections)
+
+    def serve(self):
+        """Run the server until stop() is called. Runs in the port's thread."""
+        self.thread = threading.current_thread()
+        try:
+            while not self.stopping:
+                for (key,mask) in self.selector.select(self._next_timeout()):
+                    if key.data=='listener':
+                        self._accept()
+                    elif key.data=='wakeup':
+                        try:
+                            while self.wakeup_receiver.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif key.fileobj in self.connections.keys():
+                        if mask & selectors.EVENT_READ:
+                            try:
+                                self._read(key.data)
+                            except Exception as e: # Only this client's connection suffers, never the server
+                                self.widget.parent.exc_handler(e,"socket")
+                                self._close(key.data,"caused an error ("+str(e)+")")
+                if self.widget._force_disconnect is True:
+                    for connection in list(self.connections.values()):
+                        self._close(connection,"was disconnected manually")
+                self._send_events()
+                self._check_idle()
+                for connection in list(self.connections.values()):
+                    self._flush(connection)
+        finally:
+            for connection in list(self.connections.values()):
+                self._close(connection,"was closed on dashboard close")
+            self.selector.close()
+            self.listener.close()
+            if isinstance(self.port,str):
+                try:
+                    os.remove(self.port)
+                except OSError:
+                    pass
+            self.wakeup_receiver.close()
+            self.wakeup_sender.close()
+
+    def _next_timeout(self):
+        """How long the selector may wait: until the next held-back event or idle timeout is due, and at most a second."""
+        timeout = 1
+        now = time.monotonic()
+        for connection in self.connections.values():
+            if self.idle_timeout is not None and len(connection.subscriptions)==0:
+                timeout = min(timeout,connection.last_activity+self.idle_timeout-now)
+            for subscription in connection.subscriptions.values():
+                if subscription.next_due is not None:
+                    timeout = min(timeout,subscription.next_due-now)
+        return max(0,timeout)
+
+    def _accept(self):
+        """Accept every client waiting to connect."""
+        while True:
+            try:
+                (sock,addr) = self.listener.accept()
+            except (BlockingIOError,OSError):
+                return
+            sock.setblocking(False)
+            connection = SocketConnection(self,sock,addr)
+            self.connections[sock] = connection
+            self.selector.register(sock,selectors.EVENT_READ,connection)
+            print("Connection to socket "+str(self.port)+" from: "+str(addr if addr else "this computer"))
+            self.widget._increment_socket_counter()
+
+    def _read(self, connection):
+        """Read what a client has sent and handle every complete request in it."""
+        try:
+            data = connection.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data==b"":
+            self._close(connection,"was closed by the client without a 'Close' command")
+            return
+        connection.last_activity = time.monotonic()
+        try:
+            requests = connection.reader.feed(data)
+        except Exception as e:
+            self._close(connection,"sent a message that couldn't be read ("+str(e)+")")
+            return
+        reply = b""
+        for request in requests:
+            if not isinstance(request,dict) or not isinstance(request.get('cmd'),str):
+                reply += self._bad_request(connection,request,"Requests must be objects with a 'cmd' string")
+                continue
+            if request['cmd']=="Close":
+                connection.closing = True
+                break
+            connection.requests_handled += 1
+            try:
+                if request['cmd']=="Hello":
+                    reply += self._hello(connection,request)
+                    continue
+                reply += self.widget._process_request(request,connection)
+            except Exception as e: # e.g. a result that can't be encoded
+                self.widget.parent.exc_handler(e,"socket")
+                reply += self._bad_request(connection,request,str(e))
+        if len(reply)>0:
+            connection.send(reply) # Replies to pipelined requests go out together
+
+    def _bad_request(self, connection, request, error):
+        """Encode an error reply to a request that couldn't be handled.
+
+        :param connection: The connection
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :param request: The request, as decoded; not necessarily a dict
+        :type request: object
+        :param error: What went wrong
+        :type error: str
+        :return: The reply to send
+        :rtype: bytes
+        """
+        error = "Error: "+error
+        if isinstance(request,dict) and 'id' in request.keys():
+            return connection.encode({'id':request['id'],'error':error})
+        if isinstance(request,dict) and connection.encoding=='json': # An older client, which expects bare text
+            return error.encode()
+        return connection.encode({'id':None,'error':error})
+
+    def _hello(self, connection, request):
+        """Agree on an encoding with a client. The reply is in the old encoding; everything after it, in both directions, is in the
+        new one. The client must wait for the reply before sending anything else.
+
+        :param connection: The connection
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :param request: The Hello request, with the encodings the client accepts, most preferred first, under 'encodings'
+        :type request: dict
+        :return: The reply to send
+        :rtype: bytes
+        """
+        accepted = [e for e in request.get('encodings',[]) if e in ENCODINGS]
+        if 'id' not in request.keys() or len(accepted)==0:
+            error = "Error: None of the encodings "+str(request.get('encodings'))+" are supported; use one of "+str(ENCODINGS)
+            return connection.encode({'id':request.get('id'),'error':error})
+        reply = connection.encode({'id':request['id'],'result':{'encoding':accepted[0]}})
+        connection.set_encoding(accepted[0])
+        return reply
+
+    def _send_events(self):
+        """Queue any change events that are due, for every connection with subscriptions."""
+        now = time.monotonic()
+        for connection in self.connections.values():
+            for subscription in list(connection.subscriptions.values()):
+                events = subscription.take_due(now)[0]
+                if len(events)>0:
+                    connection.send(b"".join(connection.encode(self.widget._encode_event(e,connection)) for e in events))
+
+    def _check_idle(self):
+        """Disconnect clients that have been idle too long."""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        for connection in list(self.connections.values()):
+            if len(connection.subscriptions)==0 and now-connection.last_activity>self.idle_timeout:
+                self._close(connection,"was idle for more than "+str(self.idle_timeout)+" seconds")
+
+    def _flush(self, connection):
+        """Send as much of a connection's outbox as the socket will take right now, and close it if it's done."""
+        if connection.sock not in self.connections.keys():
+            return
+        broken = False
+        with connection.lock:
+            try:
+                while len(connection.outbox)>0:
+                    sent = connection.sock.send(connection.outbox)
+                    del connection.outbox[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                broken = True
+            pending = len(connection.outbox)
+        if broken:
+            self._close(connection,"was closed unexpectedly")
+        elif connection.closing and pending==0:
+            self._close(connection,None)
+        elif pending>MAX_OUTBOX_BYTES:
+            self._close(connection,"wasn't reading its replies")
+        elif connection.waiting_to_write!=(pending>0): # Only watch for writability while there's something left to write
+            connection.waiting_to_write = (pending>0)
+            self.selector.modify(connection.sock,selectors.EVENT_READ|(selectors.EVENT_WRITE if pending>0 else 0),connection)
+
+    def _close(self, connection, reason):
+        """Cancel a connection's subscriptions and close it.
+
+        :param connection: The connection
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :param reason: Why it's being closed, for the printout, or None if the client sent a 'Close' command
+        :type reason: str
+        """
+        if connection.sock not in self.connections.keys():
+            return
+        del self.connections[connection.sock]
+        for subscription in connection.subscriptions.values():
+            subscription.cancel()
+        connection.subscriptions = dict()
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        if reason is None:
+            print("Socket "+str(self.port)+" closed normally.")
+        else:
+            print("Socket "+str(self.port)+" connection from "+str(connection.addr)+" "+reason+".")
+        self.widget._decrement_socket_counter()
@@ -1,10 +1,14 @@
-from tkinter import *
 import serial.tools.list_ports
 import platform
 import traceback
+import concurrent.futures
 import socket
 import json
-import select
+import enum
+from ._subscriptions import FieldSubscription
+from ._socket_server import SocketServer
+from ._code_cache import CodeCache
+from ._socket_protocol import _plain_value
 
 # Socket widget
 class SocketWidget:
@@ -15,30 +19,42 @@ class SocketWidget:
     :type parent: pyopticon.dashboard.PyOpticonDashboard
     :param port_numbers: A list of int ports on which to open socket server threads.
     :type port_numbers: list
+    :param unix_paths: A list of paths at which to open Unix domain socket server threads, which are faster than TCP ports for clients on the same computer. Not available on older versions of Windows. Defaults to [].
+    :type unix_paths: list, optional
+    :param idle_timeout: Disconnect clients that send nothing for this many seconds, unless they have subscriptions. Defaults to None (never).
+    :type idle_timeout: float, optional
+    :param code_cache_size: The most compiled Eval and Exec commands to keep, so that repeated ones needn't be compiled again. Defaults to 256.
+    :type code_cache_size: int, optional
     """
 
-    def __init__(self, parent_dashboard, port_numbers):
+    def __init__(self, parent_dashboard, port_numbers, **kwargs):
         """The constructor for the SocketWidget"""
+        self.idle_timeout = None if not 'idle_timeout' in kwargs.keys() else kwargs['idle_timeout']
+        code_cache_size = 256 if not 'code_cache_size' in kwargs.keys() else kwargs['code_cache_size']
+        self.unix_paths = [] if not 'unix_paths' in kwargs.keys() else kwargs['unix_paths']
+        self.servers = dict() # Port number or Unix socket path -> SocketServer
+        self.code_cache = CodeCache(code_cache_size)
         
         # Parent is the labGUI object, root is the tkinter root object
         # Set polling interval
         self.parent = parent_dashboard
         self.root = parent_dashboard.get_tkinter_object()
         self.main_color = '#FF7F7F'
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         self.port_numbers = port_numbers
         # Widget for all serial connections
-        self.frame = Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
-        self.status_text = StringVar()
+        self.frame = gui.Frame(self.root,highlightbackground=self.main_color, highlightcolor=self.main_color, highlightthickness=5)
+        self.status_text = gui.StringVar()
         self.sockets_connected = 0
         self.status_text.set("Sockets connected: 0")
-        self.status_label = Label(self.frame,textvariable=self.status_text)
+        self.status_label = gui.Label(self.frame,textvariable=self.status_text)
         self.status_label.grid(row=1,column=1,sticky='nesw')
-        self.disconnect_button = Button(self.frame,text="Force Disconnect",command = self._force_disconnect)
+        self.disconnect_button = gui.Button(self.frame,text="Force Disconnect",command = self._force_disconnect)
         self.disconnect_button.grid(row=2,column=1,sticky='nesw')
         self.disconnect_button["state"]="disabled"
         self._force_disconnect=False
-        print_ports = lambda: print("Available ports for sockets: "+str(self.port_numbers))
-        self.help_button = Button(self.frame, text="Print Available Ports to Console", command = print_ports)
+        print_ports = lambda: print("Available ports for sockets: "+str(self.port_numbers)+("" if len(self.unix_paths)==0 else "; Unix sockets: "+str(self.unix_paths)))
+        self.help_button = gui.Button(self.frame, text="Print Available Ports to Console", command = print_ports)
         self.help_button.grid(row=3,column=1,sticky='nesw')
         self.time_to_end_thread = False
 
@@ -79,100 +95,230 @@ class SocketWidget:
     def _shutdown_threads(self):
         """Sets a flag that tells the socket processing threads to close themselves at program shutdown."""
         self.time_to_end_thread = True
+        for server in list(self.servers.values()):
+            server.stop()
+
+    def get_connection_count(self):
+        """Get the number of socket clients currently connected, on all ports. Safe to call from any thread.
+        
+        :return: The number of connected clients
+        :rtype: int
+        """
+        return sum(server.get_connection_count() for server in list(self.servers.values()))
+
+    def get_connections(self):
+        """Describe every socket client currently connected, on all ports.
+        
+        :return: A list with one dict per client; see SocketConnection.get_info
+        :rtype: list
+        """
+        return [connection.get_info() for server in list(self.servers.values()) for connection in list(server.connections.values())]
     
     def _run_one_thread(self,which_port):
-        """ Launch a thread that listens on a port for socket connections, handles the various types of commands that 
-        may be received on that socket, and shuts down the socket and thread on program close. Also handles ports that are 
-        'left hanging' when a client crashes or disconnects without sending a 'Close' method.
+        """ Listen on a port for socket connections and serve every client that connects, until program close. Any number of 
+        clients can be connected to the same port at once; see SocketServer. Clients that crash or disconnect without sending a 
+        'Close' command are noticed and cleaned up.
         
-        :param which_port: The port on which this thread will listen.
-        :type which_port: int"""
-        # Run the thread that manages the socket connection
-        while not self.time_to_end_thread:
-            s = socket.socket() #Set up a socket and start listening on it
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.settimeout(1)
-            try:
-                s.bind(('', which_port))
-            except Exception as e: # Bail and end the thread if the socket is taken or otherwise invalid
-                print("Socket "+str(which_port)+" could not be opened.")
-                return
-            s.listen(5)
-            try:
-                c, addr = s.accept() # Listen for a little while; if no command, return to start of the while loop. Ensures the thread ends promptly when the program shuts down.
-            except TimeoutError:
-                continue
-            print("Connection to socket "+str(which_port)+" from: "+str(addr)) # Got a connection!
-            self._increment_socket_counter()
-            try:
-                while not self.time_to_end_thread and not self._force_disconnect: # Stay in this loop so long as the socket is connected
-                    try:
-                        c.settimeout(1)#Guarantees the dashboard will close even if a connection is left hanging.
-                        rcvdData = c.recv(1024).decode()
-                    except TimeoutError:
-                        if self.time_to_end_thread:
-                            print("Socket "+str(which_port)+" was left hanging on dashboard close; closing it automatically.")
-                        continue
-                    rcvdDict = json.loads(rcvdData) # Commands are sent in the form of dict's
-                    cmd = rcvdDict['cmd']
-                    if cmd=="Close":
-                        break #Close the socket and wait for a reconnection on the same port
-                    try:
-                        if cmd=="Get": #Any exceptions raised are dealt with outside the if statement, so this if statement's entries just process commands and do printouts
-                            if rcvdDict['printout']:
-                                print("Received command on socket "+str(which_port)+": Get "+rcvdDict['field_name']+' in '+rcvdDict['widget_nickname'])
-                            sendData=self.parent.get_field(rcvdDict['widget_nickname'],rcvdDict['field_name'])
-
-                        elif cmd=="Set":
-                            if rcvdDict['printout']:
-                                print("Received command on socket "+str(which_port)+": Set "+rcvdDict['field_name']+' in '+rcvdDict['widget_nickname']+" to "+rcvdDict['new_value'])
-                            self.parent.set_field(rcvdDict['widget_nickname'],rcvdDict['field_name'],rcvdDict['new_value'],False)
-                            sendData="Success"
-
-                        elif cmd=="Confirm":
-                            if rcvdDict['printout']:
-                                print("Received command on socket "+str(which_port)+": Confirm in "+rcvdDict['widget_nickname'])
-                            self.parent.get_widget_by_nickname(rcvdDict['widget_nickname']).confirm()
-                            sendData="Success"
-
-                        elif cmd=="Eval":
-                            if rcvdDict['printout']:
-                                print("Received command on socket "+str(which_port)+": eval")
-                            # Execute the eval in a namespace with a method giving access to the dashboard object
-                            sendData=eval(rcvdDict['code'],{'get_dashboard': lambda: self.parent, 'do_threadsafe': (lambda l: self.parent.root.after(0,l))})
-
-                        elif cmd=="Exec": # This is the jankiest and least-recommended socket command, but we include it just in case
-                            if rcvdDict['printout']:
-                                print("Received command on socket "+str(which_port)+": exec")
-                            # Execute the exec in a namespace with a method giving access to the dashboard object
-                            code = rcvdDict['code']
-                            if 'do_exec' in code:
-                                raise Exception("Ignoring do_exec() call: Not allowed to define exec functions inline (e.g. do_exec(lambda x: ...)); please define the function elsewhere (l = lambda x: ..., or def l():...), then do_exec(l).")
-                            elif code[:3]=='def':
-                                #Replace the first line with a standard name, append line that executes it
-                                code = code[code.index('\n')+1:]
-                                code = "def to_exec():\n"+code+"\nto_exec()"
-                            elif 'lambda' in code:
-                                #Replace the first line with a standard name, append line that executes it
-                                code = code[code.index('lambda'):]
-                                code = "to_exec = "+code+"\nto_exec()"
-                            exec(code,{'get_dashboard': lambda: self.parent,'do_threadsafe': (lambda l: self.parent.root.after(0,l)) })
-                            sendData="Success"
-
-                    except Exception as e: #All exceptions send 'Error' and the exception name thru the socket and also log the exception as per the dashboard configuration
-                        sendData = "Error: "+str(e)
-                        if rcvdData!="":
-                            self.parent.exc_handler(e,"socket")
-                    c.send(sendData.encode())
-                print("Socket "+str(which_port)+" closed normally.") #If we reach this part of the loop, if means the socket ended with a 'close' command
-                self._decrement_socket_counter()
-                c.close()
-            except Exception as e: #A socket that's 'left hanging' and then attempts to reconnect triggers a broken pipe exception or similar; we just note it and return to loop start and the connection proceeds as normal
-                print("Old socket "+str(which_port)+" appears to have been left hanging; resetting.")
-                self._decrement_socket_counter()
-                c.close()
+        :param which_port: The port on which this thread will listen, or the path of a Unix domain socket.
+        :type which_port: int or str"""
+        try:
+            server = SocketServer(self,which_port,self.idle_timeout)
+        except Exception as e: # Bail and end the thread if the socket is taken or otherwise invalid
+            print("Socket "+str(which_port)+" could not be opened.")
+            return
+        self.servers[which_port] = server
+        if self.time_to_end_thread: # The dashboard closed while the server was starting
+            server.stop()
+        server.serve()
+
+    def _process_request(self, rcvdDict, connection):
+        """ Run one request received through a socket and encode the reply. Requests with an 'id' get a framed reply carrying the
+        same id (see _socket_protocol); requests without one, from older clients, get the result as bare text. If the command returns
+        a future (e.g. Confirm with 'wait'), the reply is sent when the future completes, from whichever thread completes it, and 
+        replies to later requests may go out before it.
+
+        :param rcvdDict: The request
+        :type rcvdDict: dict
+        :param connection: The connection it arrived on
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :return: The reply to send
+        :rtype: bytes
+        """
+        try:
+            result = self._handle_command(rcvdDict,connection)
+            error = None
+        except Exception as e: #All exceptions send 'Error' and the exception name thru the socket and also log the exception as per the dashboard configuration
+            error = "Error: "+str(e)
+            self.parent.exc_handler(e,"socket")
+        if error is None and isinstance(result,concurrent.futures.Future):
+            if 'id' not in rcvdDict.keys(): # Older clients can't match up a late reply, so don't wait
+                return b"Success"
+            result.add_done_callback(lambda future: connection.send(self._reply_when_done(rcvdDict,connection,future)))
+            return b""
+        if 'id' not in rcvdDict.keys():
+            return str(result if error is None else error).encode()
+        if error is None:
+            return connection.encode({'id':rcvdDict['id'],'result':result})
+        return connection.encode({'id':rcvdDict['id'],'error':error})
+
+    def _reply_when_done(self, rcvdDict, connection, future):
+        """ Encode the reply to a request whose command returned a future, once the future is done.
+
+        :param rcvdDict: The request
+        :type rcvdDict: dict
+        :param connection: The connection it arrived on
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :param future: The completed future
+        :type future: concurrent.futures.Future
+        :return: The reply to send
+        :rtype: bytes
+        """
+        if future.exception() is not None:
+            return connection.encode({'id':rcvdDict['id'],'error':"Error: "+str(future.exception())})
+        return connection.encode({'id':rcvdDict['id'],'result':"Success"})
+
+    def _handle_command(self, rcvdDict, connection):
+        """ Run one socket command and return its result. Any exception raised is sent back to the client as an error.
+
+        :param rcvdDict: The request, with the command name under 'cmd'
+        :type rcvdDict: dict
+        :param connection: The connection it arrived on
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :return: The command's result: a string, or for batch and subscription commands, a list or dict. Values are sent as text to 
+            clients using JSON, and with their own types to clients using the binary encoding; see _wire_value.
+        """
+        cmd = rcvdDict['cmd']
+        which_port = connection.port
+        if cmd=="Get":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Get "+rcvdDict['field_name']+' in '+rcvdDict['widget_nickname'])
+            return self._wire_value(self.parent.get_field(rcvdDict['widget_nickname'],rcvdDict['field_name']),connection)
+
+        elif cmd=="GetFields":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Get "+str(len(rcvdDict['fields']))+" fields")
+            return [self._wire_value(v,connection) for v in self.parent.get_fields(rcvdDict['fields'])]
+
+        elif cmd=="GetSnapshot":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Get snapshot")
+            snapshot = self.parent.get_snapshot()
+            return dict((nickname,dict((k,self._wire_value(v,connection)) for (k,v) in data.items())) for (nickname,data) in snapshot.items())
+
+        elif cmd=="SetFields":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Set "+str(len(rcvdDict['fields']))+" fields"+(" and confirm" if rcvdDict['confirm'] else ""))
+            future = self.parent.set_fields(rcvdDict['fields'],rcvdDict['confirm'])
+            return future if rcvdDict.get('wait',False) else "Success"
+
+        elif cmd=="Set":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Set "+rcvdDict['field_name']+' in '+rcvdDict['widget_nickname']+" to "+str(rcvdDict['new_value'])+(" and confirm" if rcvdDict.get('confirm',False) else ""))
+            future = self.parent.set_field(rcvdDict['widget_nickname'],rcvdDict['field_name'],rcvdDict['new_value'],rcvdDict.get('confirm',False))
+            return future if rcvdDict.get('wait',False) else "Success"
+
+        elif cmd=="Subscribe":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Subscribe to "+str(len(rcvdDict['targets']))+" fields or widgets")
+            if 'id' not in rcvdDict.keys():
+                raise Exception("Subscribe needs a client that supports framed messages.")
+            connection.subscriptions_made += 1
+            subscription = FieldSubscription(self.parent,connection.subscriptions_made,rcvdDict['targets'],rcvdDict['deadband'],
+                rcvdDict['min_interval'],connection.server.wake)
+            connection.subscriptions[subscription.subscription_id] = subscription
+            values = [[n,f,self._wire_value(v,connection),t] for (n,f,v,t) in subscription.current_values()]
+            return {'subscription':subscription.subscription_id,'values':values}
+
+        elif cmd=="Unsubscribe":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Unsubscribe")
+            if rcvdDict['subscription'] not in connection.subscriptions.keys():
+                raise Exception("No subscription with id "+str(rcvdDict['subscription']))
+            connection.subscriptions.pop(rcvdDict['subscription']).cancel()
+            return "Success"
+
+        elif cmd=="Confirm":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": Confirm in "+rcvdDict['widget_nickname'])
+            future = self.parent.confirm(rcvdDict['widget_nickname'])
+            return future if rcvdDict.get('wait',False) else "Success"
+
+        elif cmd=="Eval":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": eval")
+            # Execute the eval in a namespace with a method giving access to the dashboard object
+            return self._wire_value(eval(self.code_cache.get_eval(rcvdDict['code']),self._code_namespace()),connection)
+
+        elif cmd=="Exec": # This is the jankiest and least-recommended socket command, but we include it just in case
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": exec")
+            # Execute the exec in a namespace with a method giving access to the dashboard object
+            exec(self.code_cache.get_exec(rcvdDict['code']),self._code_namespace())
+            return "Success"
+
+        elif cmd=="Register":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": register function")
+            return self.code_cache.register(rcvdDict['code'],self._code_namespace())
+
+        elif cmd=="Invoke":
+            if rcvdDict['printout']:
+                print("Received command on socket "+str(which_port)+": invoke function "+str(rcvdDict['handle']))
+            function = self.code_cache.get_function(rcvdDict['handle'])
+            return self._wire_value(function(*rcvdDict['args'],**rcvdDict['kwargs']),connection)
+
+        raise Exception("Unknown socket command '"+str(cmd)+"'")
     
+    def _code_namespace(self):
+        """Get a fresh namespace for running Eval, Exec, and registered code: a method giving access to the dashboard object, and 
+        one to run a function in the main GUI thread.
+
+        :return: The namespace
+        :rtype: dict
+        """
+        return {'get_dashboard': lambda: self.parent,'do_threadsafe': (lambda l: self.parent.root.after(0,l))}
+
+    def get_code_cache_stats(self):
+        """Get statistics about the cache of compiled Eval and Exec code; see CodeCache.get_stats.
+
+        :return: A dict with keys 'entries', 'hits', 'misses', and 'functions'
+        :rtype: dict
+        """
+        return self.code_cache.get_stats()
+
+    def _wire_value(self, value, connection):
+        """Prepare a value for sending to a client: as text for clients using JSON, as older clients expect, or with its own type 
+        for clients using the binary encoding. NumPy values and arrays are sent as plain numbers and lists; anything else that 
+        can't be sent as it is is sent as text. Either way, values are sent as they're logged, not as they're displayed: numbers 
+        at full precision, ignoring the field's fmt, and enum members by name.
+
+        :param value: The value
+        :type value: object
+        :param connection: The connection it's being sent on
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :return: The value, ready to be framed
+        :rtype: object
+        """
+        if connection.encoding=='json':
+            return value.name if isinstance(value,enum.Enum) else str(value)
+        return _plain_value(value)
+
+    def _encode_event(self, event, connection):
+        """Prepare a change event for sending. Values are sent as Get sends them; see _wire_value.
+
+        :param event: The event, as returned by FieldSubscription.take_due
+        :type event: dict
+        :param connection: The connection it's being sent on
+        :type connection: pyopticon._system._socket_server.SocketConnection
+        :return: The event, ready to be framed
+        :rtype: dict
+        """
+        return dict(event,value=self._wire_value(event['value'],connection))
+
     def _force_disconnect(self):
         """Force any connected sockets to disconnect, resulting in broken pipe exceptions on the client side."""
         print("Manually disconnecting any connected sockets. Clients will report broken pipes.")
-        self._force_disconnect = True
\ No newline at end of file
+        self._force_disconnect = True
+        for server in list(self.servers.values()):
+            server.wake()
+
@@ -0,0 +1,116 @@
+import threading
+import time
+
+__all__ = ['FieldSubscription']
+
+def _is_number(value):
+    """Whether a value is an int or float (but not a bool), and so can be compared against a deadband."""
+    return isinstance(value,(int,float)) and not isinstance(value,bool)
+
+
+class FieldSubscription:
+    """ A socket client's request to be told about changes to certain fields. Each time a watched field's value changes, a change
+    event is queued, to be collected with take_due and pushed to the client. Events for the same field that pile up before they're
+    sent are merged, so only the latest value is sent.
+
+    With a deadband, a change to a numeric field is only sent if it differs from the last value sent by at least that much. With a
+    min_interval, events for any one field are sent at most once every min_interval seconds; the latest value is sent when the
+    interval is up.
+
+    :param dashboard: The dashboard
+    :type dashboard: pyopticon.dashboard.PyOpticonDashboard
+    :param subscription_id: A number identifying this subscription, which is included in its events
+    :type subscription_id: int
+    :param targets: What to watch: a list of [widget nickname, field name] pairs, or [widget nickname] for all of a widget's fields
+    :type targets: list
+    :param deadband: The smallest change in a numeric field that's sent. Defaults to None, meaning every change is sent.
+    :type deadband: float, optional
+    :param min_interval: The shortest time between events for one field, in seconds. Defaults to 0.
+    :type min_interval: float, optional
+    :param on_ready: A function called with no arguments whenever a new event is queued, e.g. to wake up the thread that sends events. Defaults to None.
+    :type on_ready: function, optional
+    """
+
+    def __init__(self, dashboard, subscription_id, targets, deadband=None, min_interval=0, on_ready=None):
+        """Constructor for a FieldSubscription. Starts watching the fields right away."""
+        self.subscription_id = subscription_id
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.on_ready = on_ready
+        self.lock = threading.Lock()
+        self.pending = dict() # (nickname, field name) -> (value, timestamp) of the latest unsent change
+        self.last_sent = dict() # (nickname, field name) -> (value, time.monotonic() when sent)
+        self.next_due = None # When the next held-back event will be ready
+        self.fields = [] # (nickname, Field)
+        for target in targets:
+            nickname = target[0]
+            if nickname not in dashboard.get_widgets_by_nickname().keys():
+                raise Exception("No widget with nickname '"+str(nickname)+"'")
+            attributes = getattr(dashboard.get_widget_by_nickname(nickname),'attributes',dict())
+            names = list(attributes.keys()) if len(target)<2 else [target[1]]
+            for name in names:
+                if name not in attributes.keys():
+                    raise Exception("Widget '"+str(nickname)+"' has no field '"+str(name)+"'")
+                self.fields.append((nickname,attributes[name]))
+        self.listeners = []
+        for (nickname,field) in self.fields:
+            listener = (lambda field, value, timestamp, nickname=nickname: self._on_change(nickname,field.name,value,timestamp))
+            self.listeners.append((field,listener))
+            field.add_listener(listener)
+
+    def current_values(self):
+        """Get the current values of the watched fields, and treat them as sent for the purposes of the deadband.
+
+        :return: [widget nickname, field name, value, timestamp] lists
+        :rtype: list
+        """
+        out = []
+        with self.lock:
+            for (nickname,field) in self.fields:
+                value, timestamp = field._state
+                self.last_sent[(nickname,field.name)] = (value,time.monotonic())
+                out.append([nickname,field.name,value,timestamp])
+        return out
+
+    def _on_change(self, nickname, field_name, value, timestamp):
+        """Listener for the watched fields. Queues a change event unless it's inside the deadband."""
+        key = (nickname,field_name)
+        with self.lock:
+            if self.deadband is not None and key in self.last_sent.keys():
+                last_value = self.last_sent[key][0]
+                if _is_number(value) and _is_number(last_value) and abs(value-last_value)<self.deadband:
+                    self.pending.pop(key,None) # Back within the deadband of what the client last saw
+                    return
+            self.pending[key] = (value,timestamp)
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def take_due(self, now):
+        """Collect the events that are ready to send.
+
+        :param now: The current time.monotonic()
+        :type now: float
+        :return: A list of event dicts, and the time.monotonic() at which the next held-back event will be ready, or None
+        :rtype: tuple
+        """
+        events = []
+        next_due = None
+        with self.lock:
+            for key in list(self.pending.keys()):
+                if key in self.last_sent.keys() and now-self.last_sent[key][1]<self.min_interval:
+                    due = self.last_sent[key][1]+self.min_interval
+                    next_due = due if next_due is None else min(next_due,due)
+                    continue
+                value, timestamp = self.pending.pop(key)
+                self.last_sent[key] = (value,now)
+                events.append({'event':'change','subscription':self.subscription_id,'widget_nickname':key[0],'field_name':key[1],
+                    'value':value,'timestamp':timestamp})
+            self.next_due = next_due
+        return (events,next_due)
+
+    def cancel(self):
+        """Stop watching the fields."""
+        for (field,listener) in self.listeners:
+            field.remove_listener(listener)
+        self.listeners = []
+
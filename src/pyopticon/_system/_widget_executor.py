@@ -0,0 +1,241 @@
+import queue
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+class CommandQueue(queue.Queue):
+    """A widget's command queue for use with a WidgetExecutor or AsyncioWidgetExecutor. It behaves like a normal queue.Queue, 
+    but every put() also tells the executor that the queue has work, so that the executor can pick it up.
+
+    :param executor: The executor that will process this queue's commands
+    :type executor: pyopticon._system._widget_executor.WidgetExecutor or pyopticon._system._widget_executor.AsyncioWidgetExecutor
+    :param owner: The widget whose _handle_queue_item method processes this queue's commands
+    :type owner: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+    """
+
+    def __init__(self, executor, owner):
+        """Constructor for a CommandQueue"""
+        super().__init__()
+        self.executor = executor
+        self.owner = owner
+        self.scheduled = False # True while the queue is waiting in, or being drained by, the executor. Guarded by the executor's lock.
+
+    def put(self, item, block=True, timeout=None):
+        """Put a command in the queue and notify the executor."""
+        super().put(item, block, timeout)
+        self.executor._notify(self)
+
+
+class WidgetExecutor:
+    """ A fixed-size pool of threads that processes widgets' HANDSHAKE, UPDATE, and CONFIRM commands, as an alternative
+    to giving every widget its own thread. Each widget still has its own queue (or shares one via widget_to_share_serial_with),
+    and the executor guarantees that at most one thread works on a given queue at a time, so commands for widgets that share
+    a serial port are still processed one at a time, in the order they were queued.
+
+    :param parent_dashboard: The dashboard that owns this executor.
+    :type parent_dashboard: pyopticon.dashboard.PyOpticonDashboard
+    :param n_threads: The number of worker threads in the pool.
+    :type n_threads: int
+    """
+
+    def __init__(self, parent_dashboard, n_threads):
+        """Constructor for a WidgetExecutor"""
+        if int(n_threads)<1:
+            raise Exception("worker_threads must be at least 1.")
+        self.parent = parent_dashboard
+        self.n_threads = int(n_threads)
+        self.ready = queue.Queue() # Queues that have commands waiting and aren't being worked on
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def new_queue(self, owner):
+        """Make a command queue whose commands will be processed by this executor.
+
+        :param owner: The widget whose _handle_queue_item method processes the queue's commands
+        :type owner: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+        :return: The new queue
+        :rtype: pyopticon._system._widget_executor.CommandQueue
+        """
+        return CommandQueue(self, owner)
+
+    def _notify(self, q):
+        """Called whenever a command is put in a queue; hands the queue to the pool unless it's already been handed over.
+
+        :param q: The queue that just received a command
+        :type q: pyopticon._system._widget_executor.CommandQueue
+        """
+        with self.lock:
+            if q.scheduled:
+                return
+            q.scheduled = True
+        self.ready.put(q)
+
+    def start(self):
+        """Launch the worker threads."""
+        for i in range(self.n_threads):
+            t = threading.Thread(target=self._run_worker, name="PyOpticon worker "+str(i))
+            self.threads.append(t)
+            t.start()
+
+    def shutdown(self):
+        """Tell every worker thread to exit once it finishes its current command."""
+        for t in self.threads:
+            self.ready.put(None)
+
+    def _run_worker(self):
+        """Body of each worker thread. Takes a queue with pending commands, processes one command, and hands the queue
+        back to the pool if it has more, so that a busy widget can't starve the others."""
+        while True:
+            q = self.ready.get()
+            if q is None:
+                return
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                item = None
+            if item is not None:
+                try:
+                    q.owner._handle_queue_item(item) # 'SHUTDOWN' just returns False here; the pool is stopped separately
+                except Exception as e:
+                    self.parent.exc_handler(e,'system',getattr(q.owner,'name',None))
+            with self.lock:
+                if q.empty():
+                    q.scheduled = False
+                    requeue = False
+                else:
+                    requeue = True
+            if requeue:
+                self.ready.put(q)
+
+
+class AsyncioWidgetExecutor:
+    """ Runs widgets' HANDSHAKE, UPDATE, and CONFIRM commands on an asyncio event loop, which runs in its own thread beside the 
+    Tkinter mainloop. Widgets whose on_update, on_handshake, or on_confirm are coroutines ('async def') are awaited on the loop, 
+    so one thread can multiplex many instruments that spend most of their time waiting. Ordinary blocking methods are run in a 
+    thread pool of n_threads threads. As with WidgetExecutor, each queue's commands are processed one at a time, in order.
+
+    :param parent_dashboard: The dashboard that owns this executor.
+    :type parent_dashboard: pyopticon.dashboard.PyOpticonDashboard
+    :param n_threads: The number of threads available for running blocking (non-async) widget methods.
+    :type n_threads: int
+    """
+
+    def __init__(self, parent_dashboard, n_threads):
+        """Constructor for an AsyncioWidgetExecutor"""
+        if int(n_threads)<1:
+            raise Exception("worker_threads must be at least 1.")
+        self.parent = parent_dashboard
+        self.n_threads = int(n_threads)
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread_pool = None
+        self.thread = None
+        self.pending = [] # Queues that received commands before the loop was started
+
+    def new_queue(self, owner):
+        """Make a command queue whose commands will be processed by this executor.
+
+        :param owner: The widget whose _handle_queue_item_async (or _handle_queue_item) method processes the queue's commands
+        :type owner: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+        :return: The new queue
+        :rtype: pyopticon._system._widget_executor.CommandQueue
+        """
+        return CommandQueue(self, owner)
+
+    def _notify(self, q):
+        """Called whenever a command is put in a queue, from any thread; starts a task on the loop to drain the queue, unless one is already running.
+
+        :param q: The queue that just received a command
+        :type q: pyopticon._system._widget_executor.CommandQueue
+        """
+        with self.lock:
+            if q.scheduled:
+                return
+            q.scheduled = True
+            if self.loop is None:
+                self.pending.append(q)
+                return
+            loop = self.loop
+        try:
+            loop.call_soon_threadsafe(self._start_draining, q)
+        except RuntimeError: # The loop has been closed; the dashboard is shutting down
+            pass
+
+    def start(self):
+        """Create the event loop and launch the thread that runs it."""
+        loop = asyncio.new_event_loop()
+        self.thread_pool = ThreadPoolExecutor(self.n_threads)
+        loop.set_default_executor(self.thread_pool)
+        with self.lock:
+            self.loop = loop
+            pending = self.pending
+            self.pending = []
+        for q in pending:
+            loop.call_soon_threadsafe(self._start_draining, q)
+        self.thread = threading.Thread(target=self._run_loop, name="PyOpticon event loop")
+        self.thread.start()
+
+    def shutdown(self):
+        """Stop the event loop once it finishes whatever it's currently doing. Its thread then cancels any commands still in 
+        progress and waits for the thread pool to finish before closing the loop."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _run_loop(self):
+        """Body of the event loop's thread."""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            try:
+                self._finish_loop()
+            finally:
+                self.loop.close()
+
+    def _finish_loop(self):
+        """Clean up after the loop has stopped: cancel the tasks still draining queues and wait for them to unwind, close async 
+        generators, and shut down the thread pool, so nothing is left pending or running when the loop is closed."""
+        tasks = [t for t in asyncio.all_tasks(self.loop) if not t.done()]
+        for task in tasks:
+            task.cancel()
+        if len(tasks)>0:
+            self.loop.run_until_complete(asyncio.gather(*tasks,return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        if hasattr(self.loop,'shutdown_default_executor'): # Python 3.9+
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        else:
+            self.thread_pool.shutdown(wait=True)
+
+    def _start_draining(self, q):
+        """Start a task that processes a queue's commands. Runs on the loop.
+
+        :param q: The queue to drain
+        :type q: pyopticon._system._widget_executor.CommandQueue
+        """
+        self.loop.create_task(self._drain(q))
+
+    async def _drain(self, q):
+        """Process a queue's commands one at a time until it's empty.
+
+        :param q: The queue to drain
+        :type q: pyopticon._system._widget_executor.CommandQueue
+        """
+        while True:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                item = None
+            if item is not None:
+                try:
+                    if hasattr(q.owner,'_handle_queue_item_async'):
+                        await q.owner._handle_queue_item_async(item)
+                    else: # e.g. MinimalWidget
+                        await self.loop.run_in_executor(None, q.owner._handle_queue_item, item)
+                except asyncio.CancelledError: # The loop is shutting down (before Python 3.8, this is an Exception)
+                    raise
+                except Exception as e:
+                    self.parent.exc_handler(e,'system',getattr(q.owner,'name',None))
+            with self.lock:
+                if q.empty():
+                    q.scheduled = False
+                    return
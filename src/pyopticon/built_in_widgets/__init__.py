@@ -1,2 +1,3 @@
 from .title_widget import TitleWidget
 from .spiciness_widget import SpicinessWidget
+from .async_demo_widget import VibeCheckWidget
@@ -0,0 +1,45 @@
+import numpy as np
+import asyncio
+
+# This is a silly demo of how to write a widget whose update method is a coroutine
+from .. import generic_widget
+
+class VibeCheckWidget(generic_widget.GenericWidget):
+    """ This is a silly widget meant to demonstrate defining on_update as a coroutine ('async def'). Instead of blocking
+    its thread with time.sleep while 'waiting for the device', it awaits asyncio.sleep. \n
+
+    If the dashboard is constructed with execution_engine='asyncio', coroutine methods like this one are awaited on a single
+    event loop, so many such widgets can wait on their instruments at the same time without each needing a thread. With the
+    other execution engines, the coroutine is just run to completion in the widget's thread. Real devices would use
+    'await self.read_serial_async(...)' to wait for a serial reply.
+
+    :param parent_dashboard: The dashboard object to which this device will be added
+    :type parent_dashboard: pyopticon.dashboard.PyOpticonDashboard
+    :param name: The name that the widget will be labeled with, and under which its data will be logged, e.g. "Methane Mass Flow Controller"
+    :type name: str
+    :param nickname: A shortened nickname that can be used to identify the widget in automation scripts, e.g. "CH4 MFC"
+    :type nickname: str
+
+    """
+
+    def __init__(self,parent_dashboard,name,nickname):
+        """ Constructor for a vibe check widget."""
+        super().__init__(parent_dashboard,name,nickname,'#0000CC',use_serial=False,update_every_n_cycles=2)
+        self.add_field(field_type='text output', name='Vibe',
+                       label='Vibes: ', default_value='No Reading', log=True)
+
+    def on_failed_serial_open(self):
+        """Set readout to 'no reading' if initialization failed."""
+        self.set_field('Vibe','No Reading',hush_warning=True)
+
+    async def on_update(self):
+        """'Query the device', wait for it without blocking a thread, and update the readout."""
+        await asyncio.sleep(0.2)
+        if not self.parent_dashboard.serial_connected:
+            return
+        possible_vibes = ("Abysmal","Meh","Good","Immaculate")
+        self.set_field('Vibe',possible_vibes[np.random.randint(0,len(possible_vibes))])
+
+    def on_serial_close(self):
+        """When serial is closed, set the readout to 'No Reading'."""
+        self.set_field('Vibe','No Reading',hush_warning=True)
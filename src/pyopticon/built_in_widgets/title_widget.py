@@ -1,5 +1,3 @@
-from tkinter import *
-import tkinter.font as tkFont
 from .. import minimal_widget
 
 class TitleWidget(minimal_widget.MinimalWidget):
@@ -17,5 +15,6 @@ class TitleWidget(minimal_widget.MinimalWidget):
     def __init__(self,parent_dashboard,title,font_size):
         """ Constructor for a title widget."""
         super().__init__(parent_dashboard)
-        fontStyle = tkFont.Font(size=font_size)
-        Label(self.frame, font = fontStyle, text = title).pack()
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
+        fontStyle = gui.font.Font(size=font_size)
+        gui.Label(self.frame, font = fontStyle, text = title).pack()
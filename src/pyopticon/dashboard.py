@@ -1,17 +1,49 @@
-# Import these for all dashboard objects
-#from tkinter import *
-from tkinter import Tk, font
+# Import these for all dashboard objects. tkinter itself is only imported if the dashboard isn't headless.
 import sys
 import threading
+import queue
+import concurrent.futures
 from ._system._show_hide_widget import ShowHideWidget
 from ._system._serial_widget import SerialWidget
 from ._system._automation_widget import AutomationWidget
 from ._system._data_logging_widget import DataLoggingWidget
 from ._system._socket_widget import SocketWidget
+from ._system._widget_executor import WidgetExecutor, AsyncioWidgetExecutor
+from ._system._gui_update_batcher import GuiUpdateBatcher
+from ._system._log_rotation import RotatingFile
+from ._system._shared_snapshot import SharedSnapshotPublisher
+from ._system import _headless
 import datetime
 import traceback
 
 
+def _all_done(futures):
+    """Combine futures into one that completes once they all have, with the first exception among them, if any.
+
+    :param futures: The futures
+    :type futures: list
+    :return: The combined future
+    :rtype: concurrent.futures.Future
+    """
+    combined = concurrent.futures.Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    def one_done(f):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0]==0
+        if last:
+            errors = [g.exception() for g in futures if g.exception() is not None]
+            if len(errors)>0:
+                combined.set_exception(errors[0])
+            else:
+                combined.set_result(None)
+    if len(futures)==0:
+        combined.set_result(None)
+    for f in futures:
+        f.add_done_callback(one_done)
+    return combined
+
 class PyOpticonDashboard:
     """ A Dashboard is our term for a GUI window containing various 'widgets'. A standalone program should initialize, configure, and run each dashboard. 
     One dashboard may contain many widgets, each representing a physical device or some other functionality.\n
@@ -27,7 +59,7 @@ class PyOpticonDashboard:
     :type dashboard_name: str
     :param offline_mode: Defaults to False. If True, doesn't attempt to build any serial.Serial objects, and widgets may also check to behave differently.
     :type offline_mode: bool, optional
-    :param polling_interval_ms: The interval for polling all connected devices, in milliseconds. Defaults to 1000. You may want to use a larger interval if certain devices are slow to poll, or polling them involves blocking code (not recommended).
+    :param polling_interval_ms: The interval for polling all connected devices and checking interlocks, in milliseconds. Defaults to 1000. You may want to use a larger interval if certain devices are slow to poll, or polling them involves blocking code (not recommended). Individual widgets can be polled at their own rates using the update_interval_ms argument of GenericWidget.
     :type polling_interval_ms: int, optional
     :param window_resizeable: Whether or not you can manually resize the dashboard by dragging and dropping the corner. Defaults to false. If True, the window is resizeable, but the widgets don't scale or center themselves.
     :type window_resizeable: bool, optional
@@ -45,6 +77,46 @@ class PyOpticonDashboard:
     :type include_auto_widget: bool, optional
     :param include_socket_widget: Whether or not to display a socket widget on the dashboard.
     :type include_socket_widget: bool, optional
+    :param execution_engine: How widgets' handshake, update, and confirm commands are run. 'threads' (the default) gives every widget, or group of widgets sharing a serial port, its own thread. 'pool' runs them all on a fixed pool of worker_threads threads, which suits dashboards with many devices. 'asyncio' runs them on an asyncio event loop beside the Tkinter mainloop, awaiting widgets whose on_update etc. are coroutines ('async def') and running ordinary methods on a pool of worker_threads threads. In every case, widgets that share a serial port are processed one at a time, in order.
+    :type execution_engine: str, optional
+    :param worker_threads: The number of threads in the pool when execution_engine is 'pool' or 'asyncio'. Defaults to 4.
+    :type worker_threads: int, optional
+    :param gui_refresh_ms: Field values set from widgets' threads are collected and applied to the GUI together, at most this many milliseconds after they're set. Defaults to 50.
+    :type gui_refresh_ms: int, optional
+    :param socket_idle_timeout: Disconnect socket clients that send nothing for this many seconds, unless they've subscribed to field changes. Any number of clients may connect to each port. Defaults to None (never).
+    :type socket_idle_timeout: float, optional
+    :param socket_code_cache_size: The most compiled socket Eval and Exec commands to keep, so that ones sent again needn't be parsed and compiled again. Defaults to 256.
+    :type socket_code_cache_size: int, optional
+    :param socket_unix_paths: Paths at which to listen for socket connections over Unix domain sockets as well, e.g. ['/tmp/pyopticon.sock']. These are faster than TCP for clients on the same computer; connect with PyOpticonSocketClient(unix_path=...). Defaults to [].
+    :type socket_unix_paths: list, optional
+    :param shared_snapshot_name: If given, the current values of every logged field (see get_snapshot) are published to a block of shared memory with this name, which processes on the same computer can read with pyopticon.SharedSnapshotReader without any socket traffic. Defaults to None.
+    :type shared_snapshot_name: str, optional
+    :param shared_snapshot_interval: How often to publish the shared memory snapshot, in seconds. Defaults to 0.1.
+    :type shared_snapshot_interval: float, optional
+    :param shared_snapshot_bytes: The size of the shared memory block, which limits the size of the snapshot. Defaults to 1 MB.
+    :type shared_snapshot_bytes: int, optional
+    :param headless: If True, the dashboard runs without a GUI, e.g. on a server with no display. Polling, data logging, automation, and sockets run as usual on a non-Tkinter event loop, and widgets' fields hold their values without any GUI elements. tkinter isn't imported, so it needn't be installed. Widgets must build their GUI through the dashboard's gui attribute (e.g. self.parent_dashboard.gui.Label(...)), which on a headless dashboard gives no-op stand-ins for any tkinter class or constant; widgets built with add_field and the other GenericWidget methods do this already, but widgets that create tkinter objects directly can't run headless. Use start_polling, start_logging, load_automation_script, etc. to do what the buttons would do, and stop the dashboard with close() or Ctrl-C. Defaults to False.
+    :type headless: bool, optional
+    :param log_queue_rows: Logged rows are written to disk by a background thread; this is the most rows that may wait to be written before new rows are dropped. Defaults to 10000.
+    :type log_queue_rows: int, optional
+    :param log_flush_rows: The data logfile is flushed after this many rows are written. Defaults to 10.
+    :type log_flush_rows: int, optional
+    :param log_flush_seconds: The data logfile is flushed at least this often while rows are being written, in seconds. Defaults to 1.
+    :type log_flush_seconds: float, optional
+    :param log_fsync: If True, every flush of the data logfile also forces it onto the disk with os.fsync, so rows survive a power failure. Defaults to False.
+    :type log_fsync: bool, optional
+    :param log_rotate_bytes: If set, the data logfile is rotated once it reaches this many bytes: it's renamed to a numbered segment (e.g. run.0001.csv) and a new file with the same header is started. Defaults to None (never).
+    :type log_rotate_bytes: int, optional
+    :param log_rotate_seconds: If set, the data logfile is rotated once the current segment is this many seconds old. Defaults to None (never).
+    :type log_rotate_seconds: float, optional
+    :param log_compression: How to compress rotated data log segments: None, 'gzip', or 'zstd' (needs the zstandard package). Defaults to None.
+    :type log_compression: str, optional
+    :param console_log_rotate_bytes: Like log_rotate_bytes, for the persistent console logfile. Defaults to None (never).
+    :type console_log_rotate_bytes: int, optional
+    :param console_log_rotate_seconds: Like log_rotate_seconds, for the persistent console logfile. Defaults to None (never).
+    :type console_log_rotate_seconds: float, optional
+    :param console_log_compression: Like log_compression, for the persistent console logfile. Defaults to None.
+    :type console_log_compression: str, optional
 
     """
 
@@ -54,20 +126,55 @@ class PyOpticonDashboard:
         # Unpack kwargs
         offline_mode = False if not 'offline_mode' in kwargs.keys() else kwargs['offline_mode']
         polling_interval_ms = 1000 if not 'polling_interval_ms' in kwargs.keys() else kwargs['polling_interval_ms']
+        if isinstance(polling_interval_ms,bool) or not isinstance(polling_interval_ms,(int,float)) or not polling_interval_ms>0:
+            raise Exception("polling_interval_ms must be a positive number, not "+repr(polling_interval_ms)+".")
         window_resizeable = False if not 'window_resizeable' in kwargs.keys() else kwargs['window_resizeable']
         persistent_console_logfile = True if not 'persistent_console_logfile' in kwargs.keys() else kwargs['persistent_console_logfile']
         x_pad = 50 if not 'x_pad' in kwargs.keys() else kwargs['x_pad']
         y_pad = 25 if not 'y_pad' in kwargs.keys() else kwargs['y_pad']
         self.print_stacktraces = True if not 'print_stacktraces' in kwargs.keys() else kwargs['print_stacktraces']
         socket_ports = [12345] if not 'socket_ports' in kwargs.keys() else kwargs['socket_ports']
+        socket_idle_timeout = None if not 'socket_idle_timeout' in kwargs.keys() else kwargs['socket_idle_timeout']
+        socket_code_cache_size = 256 if not 'socket_code_cache_size' in kwargs.keys() else kwargs['socket_code_cache_size']
+        socket_unix_paths = [] if not 'socket_unix_paths' in kwargs.keys() else kwargs['socket_unix_paths']
+        shared_snapshot_name = None if not 'shared_snapshot_name' in kwargs.keys() else kwargs['shared_snapshot_name']
+        shared_snapshot_interval = 0.1 if not 'shared_snapshot_interval' in kwargs.keys() else kwargs['shared_snapshot_interval']
+        shared_snapshot_bytes = 1024*1024 if not 'shared_snapshot_bytes' in kwargs.keys() else kwargs['shared_snapshot_bytes']
         self.include_auto_widget = True if not 'include_auto_widget' in kwargs.keys() else kwargs['include_auto_widget']
         self.include_socket_widget = True if not 'include_socket_widget' in kwargs.keys() else kwargs['include_socket_widget']
         if not self.include_socket_widget:
             socket_ports = [] # Prevents any socket threads from getting launched
+            socket_unix_paths = []
+        self.execution_engine = 'threads' if not 'execution_engine' in kwargs.keys() else kwargs['execution_engine']
+        worker_threads = 4 if not 'worker_threads' in kwargs.keys() else kwargs['worker_threads']
+        gui_refresh_ms = 50 if not 'gui_refresh_ms' in kwargs.keys() else kwargs['gui_refresh_ms']
+        self.headless = False if not 'headless' in kwargs.keys() else kwargs['headless']
+        log_queue_rows = 10000 if not 'log_queue_rows' in kwargs.keys() else kwargs['log_queue_rows']
+        log_flush_rows = 10 if not 'log_flush_rows' in kwargs.keys() else kwargs['log_flush_rows']
+        log_flush_seconds = 1 if not 'log_flush_seconds' in kwargs.keys() else kwargs['log_flush_seconds']
+        log_fsync = False if not 'log_fsync' in kwargs.keys() else kwargs['log_fsync']
+        log_rotate_bytes = None if not 'log_rotate_bytes' in kwargs.keys() else kwargs['log_rotate_bytes']
+        log_rotate_seconds = None if not 'log_rotate_seconds' in kwargs.keys() else kwargs['log_rotate_seconds']
+        log_compression = None if not 'log_compression' in kwargs.keys() else kwargs['log_compression']
+        self.console_log_rotate_bytes = None if not 'console_log_rotate_bytes' in kwargs.keys() else kwargs['console_log_rotate_bytes']
+        self.console_log_rotate_seconds = None if not 'console_log_rotate_seconds' in kwargs.keys() else kwargs['console_log_rotate_seconds']
+        self.console_log_compression = None if not 'console_log_compression' in kwargs.keys() else kwargs['console_log_compression']
+        if self.execution_engine not in ['threads','pool','asyncio']:
+            raise Exception("execution_engine must be 'threads', 'pool', or 'asyncio'")
         
         self.name = dashboard_name
-        root = Tk()
+        if not self.headless:
+            import tkinter
+            import tkinter.font
+            import tkinter.messagebox
+            import tkinter.filedialog
+            root = tkinter.Tk()
+            self.gui = tkinter # Widgets build their GUI elements from here
+        else:
+            root = _headless.HeadlessRoot()
+            self.gui = _headless
         self.root = root
+        self._tk_thread = threading.current_thread() # The thread that may touch the GUI; updated in start(), which runs the mainloop
         window_title="PyOpticon 0.2.0"
         self.title = window_title
         root.title(window_title)
@@ -78,6 +185,17 @@ class PyOpticonDashboard:
         self.x_pad = x_pad
         self.y_pad = y_pad
 
+        # Batches up GUI updates from widgets' threads
+        self._gui_batcher = GuiUpdateBatcher(root,gui_refresh_ms)
+
+        # Set up the thread pool or event loop, if one is being used; widgets ask for their command queues via _make_command_queue
+        if self.execution_engine=='pool':
+            self._widget_executor = WidgetExecutor(self,worker_threads)
+        elif self.execution_engine=='asyncio':
+            self._widget_executor = AsyncioWidgetExecutor(self,worker_threads)
+        else:
+            self._widget_executor = None
+
         # Setup widget storage
         self.all_widgets = []
         self.widgets_by_nickname = dict()
@@ -105,15 +223,23 @@ class PyOpticonDashboard:
             self.all_widgets.append(self._automation_control_widget)
 
         # Create a widget for socket control. If not included, the object is created but never displayed.
-        self._socket_widget = SocketWidget(self,socket_ports)
+        self._socket_widget = SocketWidget(self,socket_ports,idle_timeout=socket_idle_timeout,code_cache_size=socket_code_cache_size,
+            unix_paths=socket_unix_paths)
         if self.include_socket_widget:
             self._socket_widget.get_frame().grid(row=i,column=0,padx=self.x_pad,pady=self.y_pad)
             i+=1
 
         # Control widget for data logging
-        self._logging_control_widget = DataLoggingWidget(self)
+        self._logging_control_widget = DataLoggingWidget(self,queue_rows=log_queue_rows,flush_rows=log_flush_rows,
+            flush_seconds=log_flush_seconds,fsync=log_fsync,rotate_bytes=log_rotate_bytes,rotate_seconds=log_rotate_seconds,
+            compression=log_compression)
         self._logging_control_widget.get_frame().grid(row=i,column=0,padx=self.x_pad,pady=self.y_pad)
         i+=1
+
+        # Publisher of snapshots to shared memory, for readers on the same computer
+        self._snapshot_publisher = None
+        if shared_snapshot_name is not None:
+            self._snapshot_publisher = SharedSnapshotPublisher(self,shared_snapshot_name,shared_snapshot_interval,shared_snapshot_bytes)
     
     def add_widget(self, widget, row, column):
         """Add a widget to the dashboard at the specified row and column, each indexed from 0. 
@@ -158,7 +284,8 @@ class PyOpticonDashboard:
 
         # Open a persistent logfile
         if self.persistent_console_logfile:
-            console_logfile = open("persistent_logfile.txt", "a")
+            console_logfile = RotatingFile("persistent_logfile.txt",self.console_log_rotate_bytes,self.console_log_rotate_seconds,
+                self.console_log_compression)
             console_logfile.write("\n")
         else:
             console_logfile = None
@@ -200,25 +327,29 @@ class PyOpticonDashboard:
         print("Dashboard launched.")
 
         # Launch some other threads!
-        for widget in self.all_widgets:
-            if hasattr(widget,'_run_thread'):
-                threading.Thread(target=widget._run_thread).start()
+        if self._widget_executor is None:
+            for widget in self.all_widgets:
+                if hasattr(widget,'_run_thread'):
+                    threading.Thread(target=widget._run_thread).start()
+        else:
+            self._widget_executor.start()
 
         # Preparations to launch the Tkinter mainloop
         if not self.window_resizeable:
             self.get_tkinter_object().after(100, lambda: self.get_tkinter_object().resizable(False,False))
         self._serial_control_widget._update_serial_ports()
-        def on_close():
-            if self.serial_connected:
-                self._serial_control_widget._toggle_serial_connected()
-            self.get_tkinter_object().destroy()    
-        self.get_tkinter_object().protocol("WM_DELETE_WINDOW", on_close)
+        self.get_tkinter_object().protocol("WM_DELETE_WINDOW", self._on_close)
         
         # Start polling the sockets, creating as many threads as are needed
-        for p in self._socket_widget.port_numbers:
+        for p in self._socket_widget.port_numbers+self._socket_widget.unix_paths:
             threading.Thread(target=self._socket_widget._run_one_thread,args=(p,)).start()
 
+        # Start publishing snapshots to shared memory, if desired
+        if self._snapshot_publisher is not None:
+            threading.Thread(target=self._snapshot_publisher.run,name="PyOpticon snapshot publisher").start()
+
         # Launch the mainloop
+        self._tk_thread = threading.current_thread()
         self.get_tkinter_object().mainloop()
 
         # Shutdown the threads
@@ -226,11 +357,98 @@ class PyOpticonDashboard:
         for widget in self.all_widgets:
             if hasattr(widget,'_shutdown_thread'):
                 widget._shutdown_thread()
+        if self._widget_executor is not None:
+            self._widget_executor.shutdown()
         self._socket_widget._shutdown_threads()
+        if self._snapshot_publisher is not None:
+            self._snapshot_publisher.stop()
         print("Dashboard closed normally.")
         if self.persistent_console_logfile:
             console_logfile.close()
 
+    def _on_close(self):
+        """Close serial communications and stop data logging, if they're active, and end the mainloop. Runs when the window is closed."""
+        if self.serial_connected:
+            self._serial_control_widget._toggle_serial_connected()
+        logger = self._logging_control_widget
+        if logger.logging_active or logger.logging_starting: # Make sure the logfile is closed, and any buffered rows are written
+            logger._toggle_logging()
+        self.get_tkinter_object().destroy()
+
+    def close(self):
+        """Close the dashboard, as if its window had been closed. Safe to call from any thread."""
+        self.root.after(0,self._on_close)
+
+    def start_polling(self):
+        """Open serial communications and start polling devices, like the 'Start polling devices' button. Safe to call from any thread, 
+        or before start(), in which case polling starts once the dashboard is running. Mainly useful for headless dashboards."""
+        def to_do():
+            if not self.serial_connected:
+                self._serial_control_widget._toggle_serial_connected()
+        self.root.after(0,to_do)
+
+    def stop_polling(self):
+        """Stop polling devices and close serial communications, like the 'Stop polling devices' button. Safe to call from any thread."""
+        def to_do():
+            if self.serial_connected:
+                self._serial_control_widget._toggle_serial_connected()
+        self.root.after(0,to_do)
+
+    def start_logging(self, filename, interval='0:00:10'):
+        """Start data logging to a file, like selecting a destination and pressing 'Start Logging'. Safe to call from any thread, 
+        or before start(). Mainly useful for headless dashboards.
+
+        :param filename: The path of the logfile. If it already exists, data is appended to it. Use a .npz extension for a binary NumPy archive rather than CSV.
+        :type filename: str
+        :param interval: The data logging interval, in h:mm:ss format, optionally with milliseconds (h:mm:ss.fff). Defaults to '0:00:10'.
+        :type interval: str, optional
+        """
+        def to_do():
+            logger = self._logging_control_widget
+            if logger.logging_active or logger.logging_starting:
+                print("Data logging is already active.")
+                return
+            logger._set_destination(filename)
+            logger.time_interval.set(interval)
+            logger._toggle_logging()
+        self.root.after(0,to_do)
+
+    def stop_logging(self):
+        """Stop data logging, like pressing 'Stop Logging'. Safe to call from any thread."""
+        def to_do():
+            logger = self._logging_control_widget
+            if logger.logging_active or logger.logging_starting:
+                logger._toggle_logging()
+        self.root.after(0,to_do)
+
+    def load_automation_script(self, filename, start=False):
+        """Load an automation script from a file, like the automation widget's 'Load' button, and optionally start it. Safe to call 
+        from any thread, or before start(). Mainly useful for headless dashboards.
+
+        :param filename: The path of the automation script
+        :type filename: str
+        :param start: Whether to start the script once it's loaded. Serial communications must be open, e.g. via start_polling. Defaults to False.
+        :type start: bool, optional
+        """
+        def to_do():
+            self._automation_control_widget._load_automation_file(filename)
+            if start:
+                self._automation_control_widget._start_automated_tasks()
+        self.root.after(0,to_do)
+
+    def _make_command_queue(self,owner):
+        """Make the queue through which a widget's HANDSHAKE, UPDATE, and CONFIRM commands reach whatever thread runs them. 
+        Called from widgets' constructors.
+        
+        :param owner: The widget whose thread (or whose turn in the thread pool) will process the queue's commands
+        :type owner: pyopticon.generic_widget.GenericWidget or pyopticon.minimal_widget.MinimalWidget
+        :return: A new queue
+        :rtype: queue.Queue
+        """
+        if self._widget_executor is None:
+            return queue.Queue()
+        return self._widget_executor.new_queue(owner)
+
     def exc_handler(self,exc,source='system',widget=None):#Function used in various places to print helpful info about exceptions 
         """Handle an exception according to the protocol configured when the dashboard was launched. Generate a 
         message about what subprocess raised the exception.
@@ -304,7 +522,7 @@ class PyOpticonDashboard:
         :param target_field: The name of the field to read
         :type target_field: str
         :return: The value of the field that you queried
-        :rtype: str
+        :rtype: str, or the field's dtype
         """
         return self.widgets_by_nickname[target_widget_nickname].get_field(target_field)
     
@@ -318,14 +536,95 @@ class PyOpticonDashboard:
         :type target_widget_nickname: str
         :param target_field: The name of the field to modify
         :type target_field: str
-        :param new_value: The new value for the field. Fields' values are always stored as strings, even if they represent numbers.
-        :type new_value: str
+        :param new_value: The new value for the field. Fields are stored as strings unless they were created with a dtype, in which case strings are parsed as that type.
+        :type new_value: str, or the field's dtype
         :param confirm: Whether or not to execute the widget's confirm function, which usually sends a command to the physical device based on the newly updated field.
         :type confirm: bool
+        :return: A future that completes once the confirm function has run in the widget's thread, or right away if confirm is False. The confirm itself is started from the Tkinter thread, so this method may be called from any thread. Its exception is set if the confirm function raised one or the confirm was ignored. The field's value itself is set before this method returns.
+        :rtype: concurrent.futures.Future
         """
         self.widgets_by_nickname[target_widget_nickname].set_field(target_field,new_value)
+        future = concurrent.futures.Future()
+        if confirm:
+            self._confirm_on_tk_thread(self.widgets_by_nickname[target_widget_nickname],future)
+        else:
+            future.set_result(None)
+        return future
+
+    def get_fields(self, pairs):
+        """Get the current values of several fields at once.
+
+        :param pairs: (widget nickname, field name) pairs, e.g. [('MFC 1','Actual Flow'),('MFC 2','Actual Flow')]
+        :type pairs: list
+        :return: The fields' values, in the same order
+        :rtype: list
+        """
+        return [self.widgets_by_nickname[nickname].get_field(field) for (nickname,field) in pairs]
+
+    def get_snapshot(self):
+        """Get the current values of every field that's logged, i.e. the data that would be in the next row of the logfile, from 
+        every widget that has a nickname.
+
+        :return: A dict mapping each widget's nickname to a dict of its logged fields' names and values, as returned by its log_data method
+        :rtype: dict
+        """
+        return dict((nickname,widget.log_data()) for (nickname,widget) in self.widgets_by_nickname.items() if hasattr(widget,'log_data'))
+
+    def set_fields(self, assignments, confirm=True):
+        """Set several fields at once and, optionally, execute the confirm function of every widget that was changed, once each. 
+        Every widget and field is checked before any field is set, so if one of them doesn't exist, nothing is changed.
+
+        :param assignments: (widget nickname, field name, new value) tuples
+        :type assignments: list
+        :param confirm: Whether or not to execute the changed widgets' confirm functions afterwards, in the order they first appear in assignments.
+        :type confirm: bool
+        :return: A future that completes once every confirm function has run, or right away if confirm is False; see set_field
+        :rtype: concurrent.futures.Future
+        """
+        for (nickname,field,new_value) in assignments:
+            if nickname not in self.widgets_by_nickname.keys():
+                raise Exception("No widget with nickname '"+str(nickname)+"'")
+            if field not in getattr(self.widgets_by_nickname[nickname],'attributes',dict()).keys():
+                raise Exception("Widget '"+str(nickname)+"' has no field '"+str(field)+"'")
+        changed = []
+        for (nickname,field,new_value) in assignments:
+            widget = self.widgets_by_nickname[nickname]
+            widget.set_field(field,new_value)
+            if widget not in changed:
+                changed.append(widget)
+        futures = []
         if confirm:
-            self.widgets_by_nickname[target_widget_nickname].confirm()
+            for widget in changed:
+                futures.append(concurrent.futures.Future())
+                self._confirm_on_tk_thread(widget,futures[-1])
+        return _all_done(futures)
+
+    def confirm(self, target_widget_nickname):
+        """Execute a widget's confirm function, as if its Confirm button had been pressed.
+
+        :param target_widget_nickname: The nickname of the widget
+        :type target_widget_nickname: str
+        :return: A future that completes once the confirm function has run in the widget's thread; see set_field
+        :rtype: concurrent.futures.Future
+        """
+        future = concurrent.futures.Future()
+        self._confirm_on_tk_thread(self.widgets_by_nickname[target_widget_nickname],future)
+        return future
+
+    def _confirm_on_tk_thread(self, widget, future):
+        """Have the Tkinter thread run a widget's confirm method, which touches the GUI and so mustn't run on e.g. a socket thread. 
+        The widget's thread then runs on_confirm and completes the future. If this is called on the Tkinter thread, e.g. by an
+        automation script, confirm runs right away, so the confirm command is queued in order with whatever the caller does next.
+
+        :param widget: The widget
+        :type widget: pyopticon.generic_widget.GenericWidget
+        :param future: The future to pass to confirm
+        :type future: concurrent.futures.Future
+        """
+        if threading.current_thread() is self._tk_thread:
+            widget.confirm(future)
+        else:
+            self.root.after(0,widget.confirm,future)
 
     def get_widget_by_nickname(self, nickname):
         """Get a certain widget based on its nickname. 
@@ -347,8 +646,26 @@ class PyOpticonDashboard:
         """
         return self.widgets_by_nickname
     
+    def get_polling_stats(self):
+        """Get statistics on how closely device polling has kept to polling_interval_ms since serial communications were last opened: 
+        the number of ticks, overruns and skipped ticks, and the jitter of tick times, in seconds.
+
+        :return: A dict of polling statistics; see SerialWidget.get_polling_stats
+        :rtype: dict
+        """
+        return self._serial_control_widget.get_polling_stats()
+
+    def get_logging_stats(self):
+        """Get counters for the current or most recent data logging session: the depth of the queue of rows waiting to be written, 
+        rows written and dropped, errors writing the logfile, and rows sampled late.
+
+        :return: A dict of logging statistics; see DataLoggingWidget.get_logging_stats
+        :rtype: dict
+        """
+        return self._logging_control_widget.get_logging_stats()
+
     def get_tkinter_object(self):
-        """Get the dashboard's Tkinter frame object, through which Tkinter functions like after() can be accessed.
+        """Get the dashboard's Tkinter frame object, through which Tkinter functions like after() can be accessed. On a headless dashboard this is a HeadlessRoot, which provides after() and after_cancel().
 
         :return: The dashboard's Tkinter frame object.
         :rtype: tkinter.Tk
@@ -362,6 +679,8 @@ class PyOpticonDashboard:
         :param scale_factor: A factor by which to scale text, e.g. 1.2. Values are calculated in font units and are rounded to the nearest int.
         :type scale_factor: float
         """
+        if self.headless: # No text to scale
+            return
         system_widgets=[self._automation_control_widget,self._logging_control_widget,self._serial_control_widget,self._show_hide_control_widget]
         # Scale all the font sizes; only do it once for each font
         fonts_done = set()
@@ -376,9 +695,9 @@ class PyOpticonDashboard:
                         continue
                     fonts_done.add(font_name)
                     try:
-                        current_font = font.nametofont(font_name)
+                        current_font = self.gui.font.nametofont(font_name)
                     except Exception as e:
-                        current_font = font.Font(font=font_name)
+                        current_font = self.gui.font.Font(font=font_name)
                     current_size = int(current_font.cget('size'))
                     new_size = int(current_size*scale_factor)
                     new_size = 1 if new_size<1 else new_size
@@ -1,9 +1,23 @@
-from tkinter import *
 import ctypes
 import serial
 import time
 import traceback
 import queue
+import asyncio
+import enum
+import threading
+from ._system._field_store import Field
+
+_thread_event_loops = threading.local() # The event loop each widget thread runs its coroutine methods in, when not using 'asyncio'
+
+def _read_serial_until(s, terminator, timeout):
+    """Block until a terminator is read from a serial object or a timeout passes, and return what was read. Serial objects are
+    built with timeout=0, so the timeout is set just for this read."""
+    s.timeout = timeout
+    try:
+        return bytes(s.read_until(terminator))
+    finally:
+        s.timeout = 0
 
 class GenericWidget:
     """This is the superclass for all widgets representing physical devices. It contains a lot of the machinery for 
@@ -30,13 +44,15 @@ class GenericWidget:
     :type widget_to_share_thread_with: pyopticon.generic_widget.GenericWidget, optional
     :param update_every_n_cycles: Set the widget to poll its serial connection for updates every n cycles. Useful for instruments that poll slowly for some reason, or whose state changes infrequently. Defaults to 1.
     :type update_every_n_cycleS: int, optional
+    :param update_interval_ms: Poll this widget every so many milliseconds, independent of the dashboard's polling interval, e.g. 100 for a fast thermocouple or 15000 for a GC logfile. Overrides update_every_n_cycles if given.
+    :type update_interval_ms: int, optional
     """
 
     def __init__(self,parent_dashboard,name,nickname,color,**kwargs):
         """Constructor for a GenericWidget"""
 
         # Required arguments: parent_dashboard, name, nickname, color
-        # Optional: use_serial, default_serial_port, baudrate, widget_to_share_thread_with, update_every_n_cycles
+        # Optional: use_serial, default_serial_port, baudrate, widget_to_share_thread_with, update_every_n_cycles, update_interval_ms
 
         # Unpack basic arguments
         self.name = name
@@ -57,7 +73,7 @@ class GenericWidget:
         self.widget_to_share_thread_with=widget_to_share_thread_with
         self.no_serial = no_serial
         self.update_every_n_cycles=update_every_n_cycles
-        self._update_cycle_counter=-1
+        self.update_interval_ms = kwargs['update_interval_ms'] if ('update_interval_ms' in kwargs.keys()) else None # The dashboard's serial widget schedules updates using these two
 
         # Check kwargs
         if not no_serial and self.widget_to_share_thread_with==None:
@@ -65,39 +81,45 @@ class GenericWidget:
                 raise Exception("Default serial port required unless use_serial==False or thread is shared with other widget.")
             if self.baudrate == None:
                 raise Exception("Baud rate required unless use_serial == False or thread is shared with other widget.")
+        for (option,value) in (('update_every_n_cycles',self.update_every_n_cycles),('update_interval_ms',self.update_interval_ms)):
+            if option=='update_interval_ms' and value is None:
+                continue
+            if isinstance(value,bool) or not isinstance(value,(int,float)) or not value>0: # The polling schedule divides by these
+                raise Exception(option+" must be a positive number, not "+repr(value)+" (widget '"+str(nickname)+"').")
 
 
         # Create a frame, set its style
+        gui = parent_dashboard.gui # tkinter, or stand-ins if the dashboard is headless
         self.color = color
-        self.frame = Frame(parent_dashboard.get_tkinter_object(), highlightbackground=self.color, highlightcolor=self.color, highlightthickness=5)
+        self.frame = gui.Frame(parent_dashboard.get_tkinter_object(), highlightbackground=self.color, highlightcolor=self.color, highlightthickness=5)
         self.parent_dashboard = parent_dashboard
         
         # Create the title
-        Label(self.frame,text=name).grid(row=0,column=1)
+        gui.Label(self.frame,text=name).grid(row=0,column=1)
         
         if not no_serial:
             # Labels associated with serial communications
             if not self.thread_shared:
-                self.serial_menu_label = Label(self.frame,text="Select Serial Port: ")
+                self.serial_menu_label = gui.Label(self.frame,text="Select Serial Port: ")
             else:
-                self.serial_menu_label = Label(self.frame,text="Serial Shared With: ")
+                self.serial_menu_label = gui.Label(self.frame,text="Serial Shared With: ")
             self.serial_menu_label.grid(row=1,column=0)
-            self.serial_readout_label = Label(self.frame,text="Connection status: ")
+            self.serial_readout_label = gui.Label(self.frame,text="Connection status: ")
             self.serial_readout_label.grid(row=2,column=0)
             # Declare the variables that run the serial port
             self.serial_options = ["COM1"]
-            self.serial_selected = StringVar() # Serial port selected
+            self.serial_selected = gui.StringVar() # Serial port selected
             self.serial_selected.set(self.default_serial)
-            self.serial_status = StringVar() # Status of serial connection
+            self.serial_status = gui.StringVar() # Status of serial connection
             self.serial_status.set("Not connected.")
         
             # Add and locate all of the functional serial widgets
             if not self.thread_shared:
-                self.serial_menu = OptionMenu(self.frame, self.serial_selected, *self.serial_options)
+                self.serial_menu = gui.OptionMenu(self.frame, self.serial_selected, *self.serial_options)
             else:
-                self.serial_menu = Label(self.frame,text=str(self.widget_to_share_thread_with.nickname))
+                self.serial_menu = gui.Label(self.frame,text=str(self.widget_to_share_thread_with.nickname))
             self.serial_menu.grid(row=1,column=1,sticky='nesw')
-            self.serial_readout = Label(self.frame,textvariable=self.serial_status)
+            self.serial_readout = gui.Label(self.frame,textvariable=self.serial_status)
             self.serial_readout.grid(row=2,column=1,sticky='nesw')
 
         # Construct a map of attributes for automation
@@ -109,11 +131,15 @@ class GenericWidget:
 
         # Create a queue for the thread, if needed
         if not self.thread_shared:
-            self.queue = queue.Queue()
+            self.queue = parent_dashboard._make_command_queue(self)
         else:
             self.queue = widget_to_share_thread_with.queue
         self.doing_update = False
         self.shutdown_flag=False
+        self._queue_wait_count = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_last = 0.0
+        self._queue_wait_max = 0.0
 
 # Methods implementing serial functionality that will often be overridden by the user
 
@@ -128,10 +154,14 @@ class GenericWidget:
         that the serial connection was already initialized successfully. If not, you'll need to initialize whatever objects are needed 
         to update the widget in this method (say, an OEM Python driver).
         
-        By default, it just calls on_update(), assuming that the handshake was successful if (and only if) no exception was raised."""
+        By default, it just calls on_update(), assuming that the handshake was successful if (and only if) no exception was raised.
+        
+        This method, on_update, and on_confirm may also be defined as coroutines ('async def'), in which case they can use 'await', 
+        e.g. on asyncio.sleep or read_serial_async. They're run on the dashboard's event loop if its execution_engine is 'asyncio', 
+        and run to completion in the widget's thread otherwise."""
 
         print("Device '"+self.name+"' has no handshake defined; just using a standard update cycle. See on_update docs.")
-        self.on_update()
+        return self.on_update() # Returned so that an async on_update gets awaited
         
     def on_update(self): #This function gets called whenever the device updates itself
         """This function gets called once every polling interval when the dashboard prompts each device to update itself. 
@@ -158,7 +188,9 @@ class GenericWidget:
         Adding a field is like making an instance variable for the widget, 
         except 1) the GUI elements get autogenerated for you and 2) fields' values are, by default, logged whenever the dashboard's data logging is active. 
         This method is meant to streamline adding input and output fields, though you can of course define your own instance variables, configure data logging, 
-        and add GUI elements by hand to the tkinter frame from widget.get_frame() if you want more granular control. Underlying each field is a tkinter StringVar bound to some tkinter GUI element.\n
+        and add GUI elements by hand to the tkinter frame from widget.get_frame() if you want more granular control. Underlying each field is a Field object, which holds 
+        the field's value and can be read or written from any thread, and a tkinter StringVar bound to some tkinter GUI element that displays it. On a headless 
+        dashboard there's no StringVar, and this method returns the Field instead.\n
 
         If you add the first input field to a widget, a 'Confirm' button will also automatically be generated and placed. Use the move_confirm_button method to change its location.
 
@@ -169,37 +201,52 @@ class GenericWidget:
         :param label: The text label that will appear to the left of the field. This may differ from the name if you want to include units or abbreviate the label; e.g., the name might be 'Temperature' and the label might be 'Temp. (C)'. If this argument is '' (an empty string), no label is added.
         :type label: str
         :param default_value: The starting value that appears in the field
-        :type default_value: str
-        :param options: The options in the dropdown option menu. Required if field_type is 'dropdown', ignored otherwise.
+        :type default_value: str, or the field's dtype
+        :param options: The options in the dropdown option menu. Required if field_type is 'dropdown', unless dtype is an enum.Enum subclass, in which case the options default to all of its members. Ignored otherwise.
         :type options: list, optional
+        :param dtype: The type of the field's values: str (the default), float, int, bool, or an enum.Enum subclass. Typed fields hold native values, so get_field returns e.g. a float, and set_field accepts one; values are only formatted as text for display. Strings are parsed, and strings that can't be parsed (e.g. 'No Reading') are kept as they are.
+        :type dtype: type, optional
+        :param fmt: How the field's values are displayed, as a format string like '{:.1f}' or a function that takes a value and returns a str. Only affects the display, not the value that's stored or logged.
+        :type fmt: str or function, optional
         :param log: Whether or not to log this field's contents when the dashboard's data logging is active. Defaults to True.
         :type log: bool, optional
         :param custom_stringvar: If you want to pass a pre-existing tkinter StringVar to be bound to the field's GUI element, rather than letting this method initialize a new one.
         :type custom_stringvar: tkinter.StringVar, optional
 
         """
-        # Generate the stringvar that will represent this field
-        if not ('custom_stringvar' in kwargs.keys()):
-            stringvar_to_add = StringVar()
-            if default_value is not None:
-                stringvar_to_add.set(default_value)
-        else:
+        # Generate the field and the stringvar that will display it. A headless dashboard has nothing to display fields on.
+        gui = self.parent_dashboard.gui
+        dtype = kwargs['dtype'] if ('dtype' in kwargs.keys()) else str
+        fmt = kwargs['fmt'] if ('fmt' in kwargs.keys()) else None
+        if 'custom_stringvar' in kwargs.keys():
             stringvar_to_add = kwargs['custom_stringvar']
+            field_to_add = Field(name,stringvar_to_add.get(),stringvar_to_add,self.parent_dashboard._gui_batcher,dtype,fmt)
+        elif self.parent_dashboard.headless:
+            stringvar_to_add = None
+            field_to_add = Field(name,default_value,None,self.parent_dashboard._gui_batcher,dtype,fmt)
+        else:
+            stringvar_to_add = gui.StringVar()
+            field_to_add = Field(name,default_value,stringvar_to_add,self.parent_dashboard._gui_batcher,dtype,fmt)
         # Generate the Tkinter label and widget
-        label_to_add = Label(self.frame,text=label)
+        label_to_add = gui.Label(self.frame,text=label)
         if field_type=='text output':
-            item_to_add = Label(self.frame,width=10,textvariable=stringvar_to_add)
+            item_to_add = gui.Label(self.frame,width=10,textvariable=stringvar_to_add)
             self.default_values[name]=default_value
         elif field_type=='text input':
-            item_to_add = Entry(self.frame,width=5,textvariable=stringvar_to_add)
+            item_to_add = gui.Entry(self.frame,width=5,textvariable=stringvar_to_add)
         elif field_type=='dropdown':
-            if not ('options' in kwargs.keys()):
+            if 'options' in kwargs.keys():
+                options = kwargs['options']
+            elif isinstance(dtype,type) and issubclass(dtype,enum.Enum):
+                options = list(dtype)
+            else:
                 raise Exception("Missing required 'options' argument with dropdown items")
-            item_to_add = OptionMenu(self.frame, stringvar_to_add, *kwargs['options'])
+            options = [field_to_add.format(o) if not isinstance(o,str) else o for o in options] # Show the same text that the field displays
+            item_to_add = gui.OptionMenu(self.frame, stringvar_to_add, *options)
         elif field_type=='button':
             if not('action' in kwargs.keys()):
                 raise Exception("Missing required 'action' argument with button")
-            item_to_add = Button(self.frame, text=name, command=kwargs['action'])
+            item_to_add = gui.Button(self.frame, text=name, command=kwargs['action'])
         else:
             raise Exception("Valid field types are 'text output','text input', 'dropdown', or 'button'")
         
@@ -214,24 +261,24 @@ class GenericWidget:
             label_to_add.grid(row=row,column=col,sticky='nesw')
         item_to_add.grid(row=row,column=col+1,sticky='nesw')
         
-        # Add the stringvars to the dicts
+        # Add the fields to the dicts
         if name in self.attributes.keys():
             print("Warning: duplicate attribute '"+str(name)+"' in "+str(self.name))
-        self.attributes[name]=stringvar_to_add
+        self.attributes[name]=field_to_add
         if not (('log' in kwargs.keys()) and (kwargs['log']==False)):#Default behavior is to log data
-            self.values_to_log[name]=stringvar_to_add
+            self.values_to_log[name]=field_to_add
         
         # Add the GUI objects to the dict
         self.field_gui_objects[name]=(label_to_add,item_to_add)
         
         # Add a confirm button if needed
         if (field_type=='text input' or field_type=='dropdown') and not self.confirm_button_added:
-            self.confirm_button = Button(self.frame,text=" Confirm ",command=self.confirm)
+            self.confirm_button = gui.Button(self.frame,text=" Confirm ",command=self.confirm)
             self.confirm_button_added=True
             self.confirm_button.grid(row=2,column=2,sticky='nesw')
         
-        # Return the stringvar
-        return stringvar_to_add
+        # Return the stringvar, or the field itself (which also has get and set methods) if there isn't one
+        return stringvar_to_add if stringvar_to_add is not None else field_to_add
 
     def do_threadsafe(self,to_do):
         """Feeds the specified function to tkinter's after() method with a delay of 0, so that it will be executed in a thread-safe way.
@@ -242,29 +289,39 @@ class GenericWidget:
         tkinter_obj.after(0,to_do)
 
     def get_field(self, which_field): 
-        """Get the current value of the specified field.
+        """Get the current value of the specified field. Safe to call from any thread.
         
         :param which_field: The name of the field whose value to get.
         :type which_field: str
         :return: The current value of the specified field
-        :rtype: str
+        :rtype: str, or the dtype given to add_field
         """
         return self.attributes[which_field].get()
 
+    def get_field_timestamp(self, which_field):
+        """Get the time at which the specified field's value was last set, whether by set_field or by the user through the GUI.
+        
+        :param which_field: The name of the field.
+        :type which_field: str
+        :return: The time, in seconds since the epoch as returned by time.time()
+        :rtype: float
+        """
+        return self.attributes[which_field].get_timestamp()
+
     def set_field(self, which_field, new_value, hush_warning=False):
-        """Set the value of the specified field to a specified value.
+        """Set the value of the specified field to a specified value. When called from a widget's thread, the GUI is updated at the 
+        dashboard's next GUI refresh (see gui_refresh_ms), though get_field returns the new value right away.
         
         :param which_field: The name of the field whose value to set.
         :type which_field: str
         :param new_value: The value to which to set the specified field.
-        :type new_value: str
+        :type new_value: str, or the dtype given to add_field
         :param hush_warning: Silence the warning when you set a field while a widget's serial isn't connected.
         :type hush_warning: True
         """
         if (not self.parent_dashboard.serial_connected) and (not hush_warning):
             print("Warning: set_field called in '"+self.name+"' while serial is not connected (field: "+which_field+"). Consider checking self.parent_dashboard.serial_connected before calling, or call set_field with hush_warning=True .")
-        to_do = lambda: self.attributes[which_field].set(new_value)
-        self.do_threadsafe(to_do)
+        self.attributes[which_field].set(new_value)
 
     def log_data(self):
         """Generate a dict of data that is sent to the dashboard's data logging script. The dict contains the current values of 
@@ -319,41 +376,122 @@ class GenericWidget:
 # Methods to make a thread for this widget (!)
         
     def _run_thread(self):
-        """Launch a thread to process commands from the widget's queue. The thread just keeps 
-        checking for new commands in its queue forever until the close flag is set. Valid commands 
-        are 'UPDATE', 'HANDSHAKE', and 'CONFIRM'."""
+        """Launch a thread to process commands from the widget's queue. The thread blocks on the queue until a 
+        command arrives, so commands are handled as soon as they're queued, and returns once it receives the 'SHUTDOWN' 
+        command posted by _shutdown_thread. Valid commands are 'UPDATE', 'HANDSHAKE', 'CONFIRM', and 'SHUTDOWN'."""
 
         if self.thread_shared: #We post events to a shared queue in a different widget's thread
-            pass
-        else: #This widget gets its own thread in which to process events
-            while True:
-                if self.shutdown_flag: # Bail immediately
-                    return
-                try:
-                    while not self.queue.empty():
-                        (cmd,widget) = self.queue.get()
-                        
-                        if cmd == 'UPDATE': # Update the widget however desired
-                            self.doing_update = True
-                            widget._update()
-                            self.doing_update = False # Flag to let us warn if the polling interval is too short
-
-                        elif cmd == 'CONFIRM': # Tell the thread to update the system state
-                            widget._on_confirm()
-
-                        elif cmd == 'HANDSHAKE': # Tell the thread to open serial and do the handshake
-                            self.doing_handshake = True
-                            widget._handshake()
-                            self.doing_handshake = False
-
-                except Exception as e:
-                    self.parent_dashboard.exc_handler(e,'system',self.name)
-
-                time.sleep(0.05)
+            return
+        while not self.shutdown_flag: #This widget gets its own thread in which to process events
+            try:
+                item = self.queue.get(timeout=1) # Timeout is just a backstop in case the shutdown command never arrives
+            except queue.Empty:
+                continue
+            if not self._handle_queue_item(item):
+                return
+
+    def _handle_queue_item(self,item):
+        """Process one command taken from the widget's queue, recording how long it waited in the queue.
+        
+        :param item: A tuple of (command, target widget, time.monotonic() when the command was queued), optionally followed by a concurrent.futures.Future to complete once it's run
+        :type item: tuple
+        :return: False if the command was 'SHUTDOWN', True otherwise
+        :rtype: bool
+        """
+        (cmd,widget,time_queued) = item[:3]
+        future = item[3] if len(item)>3 else None # Completed once the command has run; see confirm
+        if cmd == 'SHUTDOWN':
+            return False
+        widget._record_queue_wait(time.monotonic()-time_queued)
+        error = None
+        try:
+            if cmd == 'UPDATE': # Update the widget however desired
+                self.doing_update = True
+                widget._update()
+                self.doing_update = False # Flag to let us warn if the polling interval is too short
+
+            elif cmd == 'CONFIRM': # Tell the thread to update the system state
+                error = widget._on_confirm()
+
+            elif cmd == 'HANDSHAKE': # Tell the thread to open serial and do the handshake
+                self.doing_handshake = True
+                widget._handshake()
+                self.doing_handshake = False
+
+        except Exception as e:
+            self.parent_dashboard.exc_handler(e,'system',self.name)
+            error = e
+        if future is not None:
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+        return True
+
+    async def _handle_queue_item_async(self,item):
+        """Coroutine version of _handle_queue_item, used by the dashboard's event loop when its execution_engine is 'asyncio'.
+        
+        :param item: A tuple of (command, target widget, time.monotonic() when the command was queued), optionally followed by a concurrent.futures.Future to complete once it's run
+        :type item: tuple
+        :return: False if the command was 'SHUTDOWN', True otherwise
+        :rtype: bool
+        """
+        (cmd,widget,time_queued) = item[:3]
+        future = item[3] if len(item)>3 else None # Completed once the command has run; see confirm
+        if cmd == 'SHUTDOWN':
+            return False
+        widget._record_queue_wait(time.monotonic()-time_queued)
+        error = None
+        try:
+            if cmd == 'UPDATE':
+                self.doing_update = True
+                await widget._update_async()
+                self.doing_update = False
+
+            elif cmd == 'CONFIRM':
+                error = await widget._on_confirm_async()
+
+            elif cmd == 'HANDSHAKE':
+                self.doing_handshake = True
+                await widget._handshake_async()
+                self.doing_handshake = False
+
+        except Exception as e:
+            self.parent_dashboard.exc_handler(e,'system',self.name)
+            error = e
+        if future is not None:
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+        return True
+
+    def _record_queue_wait(self,wait):
+        """Add one observation to this widget's queue-wait statistics.
+        
+        :param wait: How long the command sat in the queue, in seconds
+        :type wait: float
+        """
+        self._queue_wait_count+=1
+        self._queue_wait_total+=wait
+        self._queue_wait_last=wait
+        self._queue_wait_max=max(self._queue_wait_max,wait)
+
+    def get_queue_wait_stats(self):
+        """Get statistics on how long this widget's commands (UPDATE, CONFIRM, HANDSHAKE) waited in the queue before 
+        the widget's thread started processing them. Useful for checking whether a thread shared by several widgets is keeping up.
+        
+        :return: A dict with keys 'count', 'last', 'mean', and 'max'; times are in seconds
+        :rtype: dict
+        """
+        mean = (self._queue_wait_total/self._queue_wait_count) if self._queue_wait_count>0 else 0.0
+        return {'count':self._queue_wait_count,'last':self._queue_wait_last,'mean':mean,'max':self._queue_wait_max}
 
     def _shutdown_thread(self):
         """Shutdown the widget's thread once the GUI is closed."""
         self.shutdown_flag = True
+        if not self.thread_shared:
+            self.queue.put(('SHUTDOWN',self,time.monotonic())) # Wakes the thread if it's blocked waiting on the queue
 
 
 # Underlying methods to make the serial functionality work.
@@ -385,77 +523,194 @@ class GenericWidget:
             return False
         return True
 
-    def confirm(self): 
+    def confirm(self, future=None): 
         """Method executed when the Confirm button is pressed. Checks whether serial is connected and unfocuses any input field that's focused, then 
-        calls the on_confirm method that is hopefully defined in a subclass."""
-        self.parent_dashboard.get_tkinter_object().focus()
+        calls the on_confirm method that is hopefully defined in a subclass.
+        
+        :param future: A concurrent.futures.Future to complete once on_confirm has run in the widget's thread, e.g. so a socket client can wait for it. It gets the exception instead if on_confirm raises one, or if the confirm is ignored. Defaults to None.
+        :type future: concurrent.futures.Future, optional"""
+        if not self.parent_dashboard.headless: # A headless dashboard has no input fields to unfocus
+            self.parent_dashboard.get_tkinter_object().focus()
         if self.serial_object == None and not (self.no_serial or self.parent_dashboard.offline_mode):
             print("\"Confirm\" pressed for "+str(self.name)+" with no serial connection.")
+            if future is not None:
+                future.set_exception(Exception("Confirm ignored for "+str(self.name)+": no serial connection."))
             return
         
         if self.doing_handshake:
             print("\"Confirm\" pressed for "+str(self.name)+" while still handshaking.")
+            if future is not None:
+                future.set_exception(Exception("Confirm ignored for "+str(self.name)+": still handshaking."))
             return
         
-        self.queue.put(('CONFIRM',self))
+        if future is None:
+            self.queue.put(('CONFIRM',self,time.monotonic()))
+        else:
+            self.queue.put(('CONFIRM',self,time.monotonic(),future))
 
     def _on_confirm(self):
+        """Run on_confirm, reporting any exception it raises.
+        
+        :return: The exception, or None
+        :rtype: Exception"""
+        try:
+            self._run_user_method(self.on_confirm)
+        except Exception as e:
+            self.parent_dashboard.exc_handler(e,'on_confirm',self.name)
+            return e
+
+    async def _on_confirm_async(self):
+        """Coroutine version of _on_confirm.
+        
+        :return: The exception, or None
+        :rtype: Exception"""
         try:
-            self.on_confirm()
+            await self._await_user_method(self.on_confirm)
         except Exception as e:
             self.parent_dashboard.exc_handler(e,'on_confirm',self.name)
+            return e
+
+    def _due_for_update(self):
+        """Checks whether the handshake is done. How often updates happen (update_interval_ms or update_every_n_cycles) 
+        is handled by the dashboard's polling schedule, which only sends 'UPDATE' when the widget is due.
+        
+        :return: True if on_update should be called
+        :rtype: bool"""
+        return self.handshake_was_successful and not self.doing_handshake
 
     def _update(self):
-        """Executes every time the widget is prompted to update. Checks whether to update this cycle, checks whether 
-        serial is connected, and then calls the on_update method that is hopefully defined in a subclass implementation."""
-        self._update_cycle_counter+=1 #Some devices may only update every 2nd or 3rd cycle
-        self._update_cycle_counter%=self.update_every_n_cycles
-        if self._update_cycle_counter!=0:
+        """Executes every time the widget is prompted to update. Checks whether the handshake succeeded, 
+        and then calls the on_update method that is hopefully defined in a subclass implementation."""
+        if not self._due_for_update():
             return
-        if not self.handshake_was_successful or self.doing_handshake:
+        try:
+            self._run_user_method(self.on_update)
+        except Exception as e:
+            self.parent_dashboard.exc_handler(e,'on_update',self.name)
+
+    async def _update_async(self):
+        """Coroutine version of _update, used when the dashboard's execution_engine is 'asyncio'."""
+        if not self._due_for_update():
             return
         try:
-            self.on_update()
+            await self._await_user_method(self.on_update)
         except Exception as e:
             self.parent_dashboard.exc_handler(e,'on_update',self.name)
 
     def _handshake(self):
         """Builds the serial object, if needed, and prompts the widget to handshake with the device, handling errors as needed."""
+        serial_success = self._open_serial_for_handshake()
+        handshake_success = False
+        if serial_success:
+            try:
+                self._run_user_method(self.on_handshake)
+                handshake_success = True
+            except Exception as e:
+                self._report_failed_handshake(e)
+        self._finish_handshake(serial_success,handshake_success)
+
+    async def _handshake_async(self):
+        """Coroutine version of _handshake, used when the dashboard's execution_engine is 'asyncio'."""
+        serial_success = self._open_serial_for_handshake()
+        handshake_success = False
+        if serial_success:
+            try:
+                await self._await_user_method(self.on_handshake)
+                handshake_success = True
+            except Exception as e:
+                self._report_failed_handshake(e)
+        self._finish_handshake(serial_success,handshake_success)
 
-        # Build serial object (if needed)
+    def _open_serial_for_handshake(self):
+        """First half of a handshake: build the serial object (if needed) and update the connection status readout.
+        
+        :return: True if the serial object was built successfully (or isn't needed)
+        :rtype: bool"""
         if not self.no_serial:
-            self.do_threadsafe(lambda: self.serial_status.set("Connecting..."))
+            self.parent_dashboard._gui_batcher.set(self.serial_status,"Connecting...")
         try:
             serial_success = self._build_serial_object()
         except Exception as e:
             serial_success = False
             self.parent_dashboard.exc_handler(e,'serial build',self.name)
-
         if not serial_success:
             if not self.no_serial:
-                self.do_threadsafe(lambda: self.serial_status.set("Connection Failed"))
+                self.parent_dashboard._gui_batcher.set(self.serial_status,"Connection Failed")
+        return serial_success
 
-        if serial_success:
-            # Do the handshake
-            try:
-                self.on_handshake()
-                print("Handshake successful for '"+str(self.name)+"'.")
-                handshake_success = True
-                if not self.no_serial:
-                    self.do_threadsafe(lambda: self.serial_status.set("Connected"))
-            except Exception as e:
-                handshake_success = False
-                if not self.no_serial:
-                    self.do_threadsafe(lambda: self.serial_status.set("No Device Found"))
-                self.parent_dashboard.exc_handler(e,'on_handshake',self.name)
-        else:
-            handshake_success = False
+    def _report_failed_handshake(self,e):
+        """Update the connection status readout and report the exception raised by on_handshake. Called from within the except block.
+        
+        :param e: The exception raised by on_handshake
+        :type e: Exception"""
+        if not self.no_serial:
+            self.parent_dashboard._gui_batcher.set(self.serial_status,"No Device Found")
+        self.parent_dashboard.exc_handler(e,'on_handshake',self.name)
 
+    def _finish_handshake(self,serial_success,handshake_success):
+        """Second half of a handshake: report success and set the flag that lets on_update start being called.
+        
+        :param serial_success: Whether the serial object was built successfully
+        :type serial_success: bool
+        :param handshake_success: Whether on_handshake ran without raising an exception
+        :type handshake_success: bool"""
+        if handshake_success:
+            print("Handshake successful for '"+str(self.name)+"'.")
+            if not self.no_serial:
+                self.parent_dashboard._gui_batcher.set(self.serial_status,"Connected")
         # Set the failure flag
         self.handshake_was_successful = serial_success and handshake_success
         if not self.handshake_was_successful:
             self.on_failed_serial_open()
 
+    def _run_user_method(self,method):
+        """Call one of the user-defined methods (on_update, on_handshake, or on_confirm) from the widget's thread. If it's a 
+        coroutine function ('async def'), it's run to completion before returning, in an event loop that's kept for the thread's
+        next call rather than made anew every time.
+        
+        :param method: The method to call
+        :type method: function
+        :return: Whatever the method returned"""
+        result = method()
+        if asyncio.iscoroutine(result):
+            loop = getattr(_thread_event_loops,'loop',None)
+            if loop is None or loop.is_closed():
+                loop = asyncio.new_event_loop()
+                _thread_event_loops.loop = loop
+            result = loop.run_until_complete(result)
+        return result
+
+    async def _await_user_method(self,method):
+        """Call one of the user-defined methods from the dashboard's event loop. Coroutine functions are awaited directly; 
+        ordinary methods are run in the event loop's thread pool, so that blocking code like time.sleep doesn't stall other widgets.
+        
+        :param method: The method to call
+        :type method: function
+        :return: Whatever the method returned"""
+        if asyncio.iscoroutinefunction(method):
+            return await method()
+        result = await asyncio.get_running_loop().run_in_executor(None,method)
+        if asyncio.iscoroutine(result): # e.g. the default on_handshake, which returns on_update()
+            result = await result
+        return result
+
+    async def read_serial_async(self,terminator=b'\r',timeout=1):
+        """Read from the widget's serial object until a terminator is received, yielding to the event loop while waiting. 
+        The read itself blocks one of the event loop's pool threads, so nothing is polled. Meant for use in 'async def' versions of on_update, on_handshake, or on_confirm, e.g. 
+        'reply = await self.read_serial_async(b';',timeout=0.5)'.
+        
+        :param terminator: The bytes that mark the end of a reply. Defaults to b'\\r'.
+        :type terminator: bytes, optional
+        :param timeout: How long to wait for the full reply, in seconds. Defaults to 1.
+        :type timeout: float, optional
+        :return: The reply, including the terminator
+        :rtype: bytes
+        """
+        s = self.get_serial_object()
+        received = await asyncio.get_running_loop().run_in_executor(None,_read_serial_until,s,terminator,timeout)
+        if not received.endswith(terminator):
+            raise TimeoutError("Timed out waiting for a serial reply in '"+str(self.name)+"'; received "+str(received))
+        return received
 
     def close_serial(self):
         """Closes the serial object, if needed, and returns the GUI fields to their default non-connected states. Executes on_serial_close, which is hopefully implemented in a subclass."""
@@ -519,7 +774,7 @@ class GenericWidget:
         self.serial_options = new_serial_options
         prev_value=self.serial_selected.get()
         self.serial_menu.grid_forget()
-        self.serial_menu = OptionMenu(self.frame, self.serial_selected, *self.serial_options)
+        self.serial_menu = self.parent_dashboard.gui.OptionMenu(self.frame, self.serial_selected, *self.serial_options)
         self.serial_menu.grid(row=1,column=1,sticky='nesw')
         self.serial_selected.set(prev_value)
     
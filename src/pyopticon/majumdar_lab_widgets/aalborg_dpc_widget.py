@@ -64,12 +64,12 @@ class AalborgDPCWidget(generic_widget.GenericWidget):
         self.mode_options=['Closed','Setpoint','Open']
         self.add_field(field_type='dropdown',name='Mode Selection',
                        label='Select Mode: ',default_value='Closed', log=True, options=self.mode_options)
-        self.add_field(field_type='text input', name='Setpoint Entry', label='Enter Setpoint (sccm): ', default_value='0.0',log=True)
+        self.add_field(field_type='text input', name='Setpoint Entry', label='Enter Setpoint (sccm): ', default_value=0.0,log=True,dtype=float,fmt='{:.1f}')
         # Output fields: gas status, mode reading, flow reading. move_field is used to make widget more compact.
         self.add_field(field_type='text output',name='Device Gas',label='Actual: ',default_value='None',log=True,column=2,row=3)
         self.add_field(field_type='text output',name='Device Mode',label='Actual: ',default_value='None',log=True,column=2,row=4)
-        self.add_field(field_type='text output',name='Device Setpoint',label='Actual: ',default_value='None',log=True,column=2,row=5)
-        self.add_field(field_type='text output',name='Actual Flow',label='Actual Flow (sccm): ',default_value='None',log=True)
+        self.add_field(field_type='text output',name='Device Setpoint',label='Actual: ',default_value='None',log=True,column=2,row=5,dtype=float,fmt='{:.1f}')
+        self.add_field(field_type='text output',name='Actual Flow',label='Actual Flow (sccm): ',default_value='None',log=True,dtype=float,fmt='{:.1f}')
 
     def on_failed_serial_open(self):
         """If serial failed to open, set the readouts to 'no reading'.
@@ -139,8 +139,7 @@ class AalborgDPCWidget(generic_widget.GenericWidget):
             if self.use_calibrator:
                 setpoint_value = np.interp(setpoint_value,
                                            self.flows_according_to_mfc,self.flows_according_to_meter)# Serial reports a setpoint acc. to the MFC; need to display actual 
-            setpoint_str = "{:.1f}".format(setpoint_value)
-            self.set_field('Device Setpoint',setpoint_str)
+            self.set_field('Device Setpoint',setpoint_value)
             # Parse the flow data
             flow_status = lines[3]
             flow_start = flow_status.index(b">")
@@ -150,8 +149,7 @@ class AalborgDPCWidget(generic_widget.GenericWidget):
             if self.use_calibrator:
                 flow_value = np.interp(flow_value,
                                            self.flows_according_to_mfc,self.flows_according_to_meter)# Serial reports a flow acc. to the MFC; need to display actual 
-            flow_str = "{:.1f}".format(flow_value)
-            self.set_field('Actual Flow',flow_str)
+            self.set_field('Actual Flow',flow_value)
         except Exception as e:
             for f in ('Device Gas','Device Mode','Device Setpoint','Actual Flow'):
                 self.set_field(f,'Read Error',hush_warning=True)
@@ -204,5 +202,5 @@ class AalborgDPCWidget(generic_widget.GenericWidget):
                 self.serial_object.write(cmd)
                 time.sleep(0.1)
         # Print to console
-        print("MFC '"+str(self.name)+"' set to gas "+g+", mode "+m+((", setpoint "+sp+" sccm.") if change_sp else '.'))
+        print("MFC '"+str(self.name)+"' set to gas "+g+", mode "+m+((", setpoint "+str(sp)+" sccm.") if change_sp else '.'))
 
@@ -76,18 +76,18 @@ class MksMFCWidget(generic_widget.GenericWidget):
         self.device_id = device_id
         # Input fields: select gas, mode, setpoint, scale factor
         self.add_field(field_type='text input',name='Scale Factor Entry',
-                       label='Enter Scale Factor: ', default_value=self.force_scale_factor, log=True)
+                       label='Enter Scale Factor: ', default_value=self.force_scale_factor, log=True, dtype=float)
         if self.force_scale_factor!="":
             self.disable_field('Scale Factor Entry')
         self.mode_options=['Closed','Setpoint','Open']
         self.add_field(field_type='dropdown',name='Mode Selection',
                        label='Select Mode: ',default_value='Closed', log=True, options=self.mode_options)
-        self.add_field(field_type='text input', name='Setpoint Entry', label='Enter Setpoint (sccm): ', default_value='0.0',log=True)
+        self.add_field(field_type='text input', name='Setpoint Entry', label='Enter Setpoint (sccm): ', default_value=0.0,log=True,dtype=float)
         # Output fields: gas status, mode reading, flow reading. move_field is used to make widget more compact.
-        self.add_field(field_type='text output',name='Device Scale Factor',label='Actual: ',default_value='None',log=True,column=2,row=3)
+        self.add_field(field_type='text output',name='Device Scale Factor',label='Actual: ',default_value='None',log=True,column=2,row=3,dtype=float)
         self.add_field(field_type='text output',name='Device Mode',label='Actual: ',default_value='None',log=True,column=2,row=4)
-        self.add_field(field_type='text output',name='Device Setpoint',label='Actual: ',default_value='None',log=True,column=2,row=5)
-        self.add_field(field_type='text output',name='Actual Flow',label='Actual Flow (sccm): ',default_value='None',log=True)
+        self.add_field(field_type='text output',name='Device Setpoint',label='Actual: ',default_value='None',log=True,column=2,row=5,dtype=float,fmt='{:.1f}')
+        self.add_field(field_type='text output',name='Actual Flow',label='Actual Flow (sccm): ',default_value='None',log=True,dtype=float,fmt='{:.1f}')
         # Move the confirm buttom
         self.move_confirm_button(row=6,column=3)
 
@@ -167,7 +167,6 @@ class MksMFCWidget(generic_widget.GenericWidget):
             scale_factor = lines.pop(0).replace('FF','')
             scale_factor = scale_factor[scale_factor.index("ACK")+3:]
             scale_factor = max(0,float(scale_factor))
-            scale_factor = "{:.1f}".format(scale_factor)
             self.set_field('Device Scale Factor',scale_factor)
             # Parse the Mode data
             mode_status = lines.pop(0).replace('FF','')
@@ -186,8 +185,7 @@ class MksMFCWidget(generic_widget.GenericWidget):
             if self.use_calibrator:
                 setpoint_value = np.interp(setpoint_value,
                                            self.flows_according_to_mfc,self.flows_according_to_meter)# Serial reports a setpoint acc. to the MFC; need to display actual 
-            setpoint_status = "{:.1f}".format(setpoint_value)
-            self.set_field('Device Setpoint',setpoint_status)
+            self.set_field('Device Setpoint',setpoint_value)
             # Parse the flow data
             flow_status = lines.pop(0).replace('FF','').replace(";","")
             flow_status = flow_status[flow_status.index("ACK")+3:]
@@ -196,8 +194,7 @@ class MksMFCWidget(generic_widget.GenericWidget):
             if self.use_calibrator:
                 flow_value = np.interp(flow_value,
                                            self.flows_according_to_mfc,self.flows_according_to_meter)# Serial reports a flow acc. to the MFC; need to display actual 
-            flow_status = "{:.1f}".format(flow_value)
-            self.set_field('Actual Flow',flow_status)
+            self.set_field('Actual Flow',flow_value)
         except Exception as e:
             for f in ('Device Scale Factor','Device Mode','Device Setpoint','Actual Flow'):
                 self.set_field(f,'Read Error')
@@ -256,7 +253,7 @@ class MksMFCWidget(generic_widget.GenericWidget):
                 print("Enter setpoint number as an int or float.")
                 return
         # Print to console
-        print("MFC '"+str(self.name)+"' set to scale factor "+sf+", mode "+m+((", setpoint "+sp+" sccm.") if change_sp else '.'))
+        print("MFC '"+str(self.name)+"' set to scale factor "+sf+", mode "+m+((", setpoint "+str(sp)+" sccm.") if change_sp else '.'))
         
 
 
@@ -31,11 +31,11 @@ class PicarroCRDWidget(generic_widget.GenericWidget):
                          default_serial_port=default_serial_port,baudrate=19200,update_every_n_cycles=3)
         # Add some readout fields
         self.add_field(field_type='text output', name='CH4 (ppm)',
-                       label='CH4 (ppm): ', default_value='No Reading', log=True)
+                       label='CH4 (ppm): ', default_value='No Reading', log=True, dtype=float, fmt='{:.4f}')
         self.add_field(field_type='text output', name='CO2 (ppm)',
-                       label='CO2 (ppm): ', default_value='No Reading', log=True)
+                       label='CO2 (ppm): ', default_value='No Reading', log=True, dtype=float, fmt='{:.4f}')
         self.add_field(field_type='text output', name='H2O (vol %)',
-                       label='Water (vol %): ', default_value='No Reading', log=True)
+                       label='Water (vol %): ', default_value='No Reading', log=True, dtype=float, fmt='{:.4f}')
         self.num_fails=0
 
     def on_failed_serial_open(self):
@@ -63,9 +63,9 @@ class PicarroCRDWidget(generic_widget.GenericWidget):
             #print(values)
             if len(values)!=7:
                 raise Exception('Bad response format.')
-            ch4 = str(round(float(values[2]),4))
-            h2o = str(round(float(values[3]),4))
-            co2 = str(round(float(values[4]),4))
+            ch4 = float(values[2])
+            h2o = float(values[3])
+            co2 = float(values[4])
             self.set_field('CH4 (ppm)',ch4)
             self.set_field('CO2 (ppm)',co2)
             self.set_field('H2O (vol %)',h2o)
@@ -1,5 +1,4 @@
 import numpy as np
-import tkinter
 
 from .. import generic_widget
 
@@ -67,7 +66,7 @@ class SRIGasChromatographFIDWidget(generic_widget.GenericWidget):
         for l in self.gas_labels:
             self.add_field(field_type='text output', name=l,label=l+": ", default_value='No Reading')
         # Add a button to specify the logfile location to watch
-        self.button=tkinter.Button(self.get_frame(), text="Select GC FID Logfile", command=self._update_file_to_watch)
+        self.button=parent_dashboard.gui.Button(self.get_frame(), text="Select GC FID Logfile", command=self._update_file_to_watch)
         self.button.grid(row=1,column=2)
 
 
@@ -130,7 +129,7 @@ class SRIGasChromatographFIDWidget(generic_widget.GenericWidget):
     def _update_file_to_watch(self):
         """Prompt the user to select a new file to watch."""
         try:
-            path = tkinter.filedialog.askopenfilename()
+            path = self.parent_dashboard.gui.filedialog.askopenfilename()
             self.path=path
             chunks = str.split(path,'/')
             self.to_display = chunks[len(chunks)-1]
@@ -1,5 +1,3 @@
-from tkinter import *
-import tkinter.font as tkFont
 import time
 import queue
 
@@ -14,10 +12,15 @@ class MinimalWidget:
 
     def __init__(self,parent_dashboard):
         """ Constructor for a minimal widget."""
-        self.frame = Frame(parent_dashboard.get_tkinter_object())
-        self.queue = queue.Queue()
+        self.frame = parent_dashboard.gui.Frame(parent_dashboard.get_tkinter_object())
+        self.parent_dashboard = parent_dashboard
+        self.queue = parent_dashboard._make_command_queue(self)
         self.doing_update=False
         self.shutdown_flag = False
+        self._queue_wait_count = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_last = 0.0
+        self._queue_wait_max = 0.0
 
     def on_handshake(self):
         """Runs when serial is connected. Does nothing unless overridden."""
@@ -38,34 +41,77 @@ class MinimalWidget:
     # Widgets to run the thread
 
     def _run_thread(self):
-        """Launch a thread to process commands from the widget's queue."""
+        """Launch a thread to process commands from the widget's queue. Blocks on the queue until a command arrives, 
+        and returns once the 'SHUTDOWN' command posted by _shutdown_thread is received."""
 
-        while True:
-            if self.shutdown_flag:
-                return
+        while not self.shutdown_flag:
             try:
-                while not self.queue.empty():
-                    (cmd,widget) = self.queue.get()
-                    
-                    if cmd == 'UPDATE': # Update the widget however desired
-                        self.doing_update = True
-                        widget.on_update()
-                        self.doing_update = False # Flag to let us warn if the polling interval is too short
-
-                    elif cmd == 'CONFIRM': # Tell the thread to update the system state
-                        widget.on_confirm()
-
-                    elif cmd == 'HANDSHAKE': # Tell the thread to open serial and do the handshake
-                        widget.on_handshake()
+                item = self.queue.get(timeout=1) # Timeout is just a backstop in case the shutdown command never arrives
+            except queue.Empty:
+                continue
+            if not self._handle_queue_item(item):
+                return
 
-            except Exception as e:
-                self.parent_dashboard.exc_handler(e,'system',self.name)
+    def _handle_queue_item(self,item):
+        """Process one command taken from the widget's queue, recording how long it waited in the queue.
+        
+        :param item: A tuple of (command, target widget, time.monotonic() when the command was queued), optionally followed by a concurrent.futures.Future to complete once it's run
+        :type item: tuple
+        :return: False if the command was 'SHUTDOWN', True otherwise
+        :rtype: bool
+        """
+        (cmd,widget,time_queued) = item[:3]
+        future = item[3] if len(item)>3 else None # Completed once the command has run; see confirm
+        if cmd == 'SHUTDOWN':
+            return False
+        widget._record_queue_wait(time.monotonic()-time_queued)
+        error = None
+        try:
+            if cmd == 'UPDATE': # Update the widget however desired
+                self.doing_update = True
+                widget.on_update()
+                self.doing_update = False # Flag to let us warn if the polling interval is too short
+
+            elif cmd == 'CONFIRM': # Tell the thread to update the system state
+                widget.on_confirm()
+
+            elif cmd == 'HANDSHAKE': # Tell the thread to open serial and do the handshake
+                widget.on_handshake()
+
+        except Exception as e:
+            self.parent_dashboard.exc_handler(e,'system',getattr(self,'name',None))
+            error = e
+        if future is not None:
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+        return True
+
+    def _record_queue_wait(self,wait):
+        """Add one observation to this widget's queue-wait statistics.
+        
+        :param wait: How long the command sat in the queue, in seconds
+        :type wait: float
+        """
+        self._queue_wait_count+=1
+        self._queue_wait_total+=wait
+        self._queue_wait_last=wait
+        self._queue_wait_max=max(self._queue_wait_max,wait)
 
-            time.sleep(0.05)
+    def get_queue_wait_stats(self):
+        """Get statistics on how long this widget's commands waited in the queue before its thread processed them.
+        
+        :return: A dict with keys 'count', 'last', 'mean', and 'max'; times are in seconds
+        :rtype: dict
+        """
+        mean = (self._queue_wait_total/self._queue_wait_count) if self._queue_wait_count>0 else 0.0
+        return {'count':self._queue_wait_count,'last':self._queue_wait_last,'mean':mean,'max':self._queue_wait_max}
 
     def _shutdown_thread(self):
         """Shutdown the widget's thread once the GUI is closed."""
         self.shutdown_flag = True
+        self.queue.put(('SHUTDOWN',self,time.monotonic())) # Wakes the thread if it's blocked waiting on the queue
 
     # All widgets must have the below methods; they don't really do anything.
 
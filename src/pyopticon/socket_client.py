@@ -2,29 +2,317 @@ import socket
 import time
 import json
 import inspect
+import collections
+import threading
+from ._system._socket_protocol import FrameReader, BinaryFrameReader, encode_frame, encode_binary_frame
+
+# Commands that are safe to send again if the connection drops before their reply arrives, because they don't change anything
+IDEMPOTENT_COMMANDS = ['Get','GetFields','GetSnapshot']
+
+class _ClientConnection:
+    """One socket connection from a PyOpticonSocketClient to the dashboard, with the responses and events received on it but not yet 
+    collected. Only used by one thread at a time.
+    
+    :param sock: The connected socket
+    :type sock: socket.socket
+    """
+
+    def __init__(self,sock):
+        """Constructor for a client connection. It starts out using JSON."""
+        self.sock = sock
+        self.encoding = 'json'
+        self.reader = FrameReader()
+        self.responses = dict() # Responses that arrived while waiting for a different one, by request id
+        self.events = [] # Change events received since they were last collected, oldest first
+
+    def encode(self,message):
+        """Encodes a message for sending, in the connection's encoding.
+        
+        :param message: The message
+        :type message: dict
+        :return: The framed message
+        :rtype: bytes"""
+        return encode_frame(message) if self.encoding=='json' else encode_binary_frame(message)
+
+    def set_encoding(self,encoding):
+        """Switches the encoding used in both directions, once the dashboard has agreed to it.
+        
+        :param encoding: 'json' or 'msgpack'
+        :type encoding: str"""
+        self.encoding = encoding
+        self.reader = FrameReader() if encoding=='json' else BinaryFrameReader()
+
+    def is_alive(self):
+        """Checks, without waiting, whether the dashboard has closed the connection, e.g. because the dashboard was restarted while 
+        the connection sat in the pool.
+        
+        :return: False if the connection has been closed
+        :rtype: bool"""
+        try:
+            self.sock.setblocking(False)
+            return self.sock.recv(1,socket.MSG_PEEK)!=b""
+        except BlockingIOError:
+            return True # Open, with nothing to read
+        except OSError:
+            return False
+        finally:
+            try:
+                self.sock.setblocking(True)
+            except OSError:
+                pass
+
+    def receive_messages(self,deadline):
+        """Waits for data from the dashboard and files away the messages it completes: responses by request id, and change events.
+        
+        :param deadline: The time.monotonic() after which to stop waiting and raise TimeoutError, or None to wait forever
+        :type deadline: float"""
+        if deadline is not None:
+            remaining = deadline-time.monotonic()
+            if remaining<=0:
+                raise TimeoutError("Timed out waiting for the dashboard.")
+            self.sock.settimeout(remaining)
+        else:
+            self.sock.settimeout(None)
+        data = self.sock.recv(65536)
+        if data==b"":
+            raise ConnectionError("The dashboard closed the socket connection.")
+        for message in self.reader.feed(data):
+            if 'event' in message.keys():
+                self.events.append(message)
+            else:
+                self.responses[message['id']] = message
+
+    def receive_response(self,request_id,deadline):
+        """Waits for the response to a request. Responses to other requests that arrive in the meantime are kept for later.
+        
+        :param request_id: The request's id
+        :type request_id: int
+        :param deadline: The time.monotonic() after which to give up and raise TimeoutError, or None to wait forever
+        :type deadline: float
+        :return: The result, or 'Error: ...' if the dashboard reported an error
+        :rtype: str"""
+        while request_id not in self.responses.keys():
+            self.receive_messages(deadline)
+        message = self.responses.pop(request_id)
+        return message['error'] if 'error' in message.keys() else message['result']
+
+    def close(self):
+        """Tells the dashboard to close the connection, and closes it on this end."""
+        try:
+            self.sock.settimeout(1)
+            self.sock.sendall(self.encode({"cmd":"Close"}))
+        except OSError:
+            pass # Already gone
+        self.sock.close()
+
 
 class PyOpticonSocketClient:
     """Class representing a client-side socket connection to a PyOpticon dashboard. Can be used to send various commands and 
     queries to the dashboard from a separate Python script.
     
+    The client can be shared between threads. It keeps a pool of up to pool_size connections to the dashboard, and each command 
+    borrows one for as long as it takes to run, so up to pool_size commands can be running at once. If the dashboard goes away, e.g. 
+    because it was restarted, the client reconnects, retrying with increasing waits in between for up to reconnect_timeout seconds. 
+    Commands that only read from the dashboard (get_field, get_fields, get_snapshot) are re-sent if the connection dropped before 
+    their reply arrived; any other command raises an exception in that case, since it may or may not have run. Subscriptions are 
+    renewed after a reconnect, keeping their ids.
+    
+    :param host: The address of the computer running the dashboard. Defaults to '127.0.0.1' (this computer).
+    :type host: str, optional
     :param socket_number: The port on which to open the socket connection. Defaults to 12345.
     :type socket_number: int, optional
+    :param unix_path: The path of a Unix domain socket the dashboard is listening on (see its socket_unix_paths option), to connect to instead of host and socket_number. Faster than TCP when the dashboard is on the same computer. Defaults to None.
+    :type unix_path: str, optional
     :param handle_errors: How to handle errors reported by the dashboard when attempting to execute a socket command. 'none' does nothing, 'print' prints a warning to console but continues executing, 'exception' raises an exception. Defaults to 'none'.
     :type handle_errors: str, optional
+    :param event_buffer: The most change events from subscriptions (see subscribe) to hold until get_events is called; older events are discarded once there are more than this. Defaults to 10000.
+    :type event_buffer: int, optional
+    :param timeout: How long to wait for a reply to each command, in seconds, unless the command is given a timeout of its own. None waits forever. Defaults to 5.
+    :type timeout: float, optional
+    :param pool_size: The most connections to the dashboard to open at once, not counting the one used for subscriptions. Defaults to 4.
+    :type pool_size: int, optional
+    :param reconnect: Whether to reconnect automatically if the connection to the dashboard is lost. Defaults to True.
+    :type reconnect: bool, optional
+    :param reconnect_timeout: How long to keep trying to reconnect before giving up and raising an exception, in seconds. None keeps trying forever. Defaults to 60.
+    :type reconnect_timeout: float, optional
+    :param encoding: How messages are encoded: 'json', which is readable and what older dashboards understand, or 'msgpack', a compact binary encoding in which values arrive with their own types (e.g. 23.4 rather than '23.4', and lists of numbers as lists). 'msgpack' uses the msgpack package if it's installed, and a slower built-in encoder if not. If the dashboard doesn't support it, the client falls back to 'json' with a warning. Defaults to 'json'.
+    :type encoding: str, optional
     """
 
     def __init__(self,**kwargs):
-        """Constructor for a socket client object."""
-        socket_number = 12345 if not 'socket_number' in kwargs.keys() else kwargs['socket_number']
+        """Constructor for a socket client object. Opens the first connection to the dashboard, and raises an exception if it can't."""
+        self.host = '127.0.0.1' if not 'host' in kwargs.keys() else kwargs['host']
+        self.socket_number = 12345 if not 'socket_number' in kwargs.keys() else kwargs['socket_number']
+        self.unix_path = None if not 'unix_path' in kwargs.keys() else kwargs['unix_path']
         handle_errors = 'none' if not 'handle_errors' in kwargs.keys() else kwargs['handle_errors']
+        event_buffer = 10000 if not 'event_buffer' in kwargs.keys() else kwargs['event_buffer']
+        self.timeout = 5 if not 'timeout' in kwargs.keys() else kwargs['timeout']
+        self.pool_size = 4 if not 'pool_size' in kwargs.keys() else kwargs['pool_size']
+        self.reconnect = True if not 'reconnect' in kwargs.keys() else kwargs['reconnect']
+        self.reconnect_timeout = 60 if not 'reconnect_timeout' in kwargs.keys() else kwargs['reconnect_timeout']
+        self.encoding = 'json' if not 'encoding' in kwargs.keys() else kwargs['encoding']
         if handle_errors not in ['none','print','exception']:
             raise Exception("handle_errors must be 'none', 'print', or 'exception'")
-        self.socket_obj = socket.socket()
-        self.socket_obj.connect(('127.0.0.1',socket_number))
-        self.socket_obj.settimeout(5)
+        if self.encoding not in ['json','msgpack']:
+            raise Exception("encoding must be 'json' or 'msgpack'")
+        if self.pool_size<1:
+            raise Exception("pool_size must be at least 1")
         self.handle_errors=handle_errors
+        self.lock = threading.Lock() # Guards the pool and the request id counter
+        self.pool_changed = threading.Condition(self.lock)
+        self.idle_connections = [] # Open connections not in use, most recently used last
+        self.open_connections = 0 # Connections in the pool, idle or in use
+        self.next_id = 0
+        self.closed = False
+        self.subscription_lock = threading.RLock() # Guards the subscription connection and everything below
+        self.subscription_connection = None # The connection subscriptions are made on, kept out of the pool so it can receive events
+        self.subscriptions = dict() # Subscription id -> the Subscribe request, for renewing subscriptions after a reconnect
+        self.subscriptions_made = 0
+        self.registered = dict() # Handle -> source of each function registered with register, to register again after a restart
+        self.subscription_ids = dict() # The dashboard's id for each subscription on the current connection -> the subscription's id
+        self.events = collections.deque(maxlen=event_buffer) # Change events pushed by the dashboard, oldest first
+        self.idle_connections.append(self._open_connection(retry=False))
+        self.open_connections = 1
         print("Socket opened successfully.")
 
+    def _connect(self,retry=True):
+        """Opens a socket to the dashboard. If it can't and retry is True, tries again with increasing waits in between (0.1 s, 
+        0.2 s, ... up to 5 s) until reconnect_timeout runs out.
+        
+        :param retry: Whether to retry if the dashboard can't be reached. Defaults to True.
+        :type retry: bool, optional
+        :return: The connected socket
+        :rtype: socket.socket"""
+        start = time.monotonic()
+        wait = 0.1
+        failed = False
+        address = str(self.unix_path) if self.unix_path is not None else str(self.host)+":"+str(self.socket_number)
+        while True:
+            try:
+                if self.unix_path is not None:
+                    sock = socket.socket(socket.AF_UNIX)
+                    try:
+                        sock.settimeout(5)
+                        sock.connect(self.unix_path)
+                    except OSError:
+                        sock.close()
+                        raise
+                else:
+                    sock = socket.create_connection((self.host,self.socket_number),timeout=5)
+                    sock.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+                if failed:
+                    print("Reconnected to the dashboard at "+address+".")
+                return sock
+            except OSError as e:
+                out_of_time = self.reconnect_timeout is not None and time.monotonic()-start+wait>self.reconnect_timeout
+                if not retry or not self.reconnect or self.closed or out_of_time:
+                    raise Exception("Couldn't connect to the dashboard at "+address+": "+str(e))
+                failed = True
+                time.sleep(wait)
+                wait = min(wait*2,5)
+
+    def _open_connection(self,retry=True):
+        """Opens a connection to the dashboard and agrees on an encoding, with a Hello, if it isn't JSON.
+        
+        :param retry: Whether to retry if the dashboard can't be reached; see _connect. Defaults to True.
+        :type retry: bool, optional
+        :return: The connection
+        :rtype: pyopticon.socket_client._ClientConnection"""
+        connection = _ClientConnection(self._connect(retry))
+        if self.encoding=='json':
+            return connection
+        request_id = self._new_ids(1)[0]
+        try:
+            connection.sock.settimeout(self.timeout)
+            connection.sock.sendall(encode_frame({'cmd':"Hello",'encodings':[self.encoding,'json'],'id':request_id}))
+            result = connection.receive_response(request_id,self._deadline(None))
+        except Exception:
+            connection.sock.close()
+            raise
+        if isinstance(result,dict):
+            connection.set_encoding(result['encoding'])
+        else: # An older dashboard, without the Hello command
+            print("The dashboard doesn't support the '"+self.encoding+"' encoding, so using 'json'.")
+            self.encoding = 'json'
+        return connection
+
+    def _checkout(self,deadline):
+        """Borrows a connection from the pool, opening a new one if none is free and the pool isn't full, or else waiting for one to 
+        be returned. Connections the dashboard has closed are thrown away.
+        
+        :param deadline: The time.monotonic() after which to give up waiting for a connection and raise TimeoutError, or None to wait forever
+        :type deadline: float
+        :return: The connection
+        :rtype: pyopticon.socket_client._ClientConnection"""
+        with self.lock:
+            while True:
+                if self.closed:
+                    raise Exception("The socket client has been closed.")
+                if len(self.idle_connections)>0:
+                    connection = self.idle_connections.pop()
+                    if connection.is_alive():
+                        return connection
+                    connection.sock.close()
+                    self.open_connections -= 1
+                    continue
+                if self.open_connections<self.pool_size:
+                    self.open_connections += 1 # Reserve the slot while connecting
+                    break
+                remaining = None if deadline is None else deadline-time.monotonic()
+                if remaining is not None and remaining<=0:
+                    raise TimeoutError("Timed out waiting for a free connection to the dashboard.")
+                self.pool_changed.wait(remaining)
+        try:
+            return self._open_connection()
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _checkin(self,connection):
+        """Returns a borrowed connection to the pool.
+        
+        :param connection: The connection
+        :type connection: pyopticon.socket_client._ClientConnection"""
+        with self.lock:
+            if not self.closed:
+                self.idle_connections.append(connection)
+                self.pool_changed.notify()
+                return
+        connection.close()
+
+    def _discard(self,connection):
+        """Closes a borrowed connection that's broken or in an unknown state, and frees its place in the pool.
+        
+        :param connection: The connection, or None if it never opened
+        :type connection: pyopticon.socket_client._ClientConnection"""
+        if connection is not None:
+            connection.sock.close()
+        with self.lock:
+            self.open_connections -= 1
+            self.pool_changed.notify()
+
+    def _new_ids(self,n):
+        """Gets fresh request ids.
+        
+        :param n: How many
+        :type n: int
+        :return: The ids
+        :rtype: list"""
+        with self.lock:
+            ids = list(range(self.next_id+1,self.next_id+n+1))
+            self.next_id += n
+        return ids
+
+    def _deadline(self,timeout):
+        """Gets the time.monotonic() by which a command's reply must arrive.
+        
+        :param timeout: The command's timeout in seconds, or None for the client's
+        :type timeout: float
+        :return: The deadline, or None for no limit
+        :rtype: float"""
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else time.monotonic()+timeout
+
     def _check_errors(self,source,result):
         """Checks a string returned by the dashboard for whether it's an error message (beginning with 'Error: ') and, if so, processes it.
         
@@ -33,7 +321,7 @@ class PyOpticonSocketClient:
         :param result: The string that the dashboard sent through the socket as its reply, which may or may not be an error message.
         :type result: str
         """
-        if result[:5]!="Error":
+        if not isinstance(result,str) or result[:5]!="Error":
             return
         if self.handle_errors=='none':
             return
@@ -42,17 +330,240 @@ class PyOpticonSocketClient:
         elif self.handle_errors=='exception':
             raise Exception("In "+source+", "+result)
 
-    def _query_socket(self,to_send):
-        """Converts a dict to a JSON string and sends it through the socket.
+    def _query_socket(self,to_send,timeout=None):
+        """Sends a request to the dashboard and waits for its response.
         
         :param to_send: The dict to send to the dashboard.
-        :type to_send: dict"""
-        self.socket_obj.send(json.dumps(to_send).encode())
-        result =  self.socket_obj.recv(1024).decode()
+        :type to_send: dict
+        :param timeout: How long to wait for the response, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: The dashboard's reply
+        :rtype: str"""
+        result = self._run_requests([to_send],timeout)[0]
         self._check_errors(to_send['cmd'],result)
         return result
 
-    def get_field(self,widget_nickname,field_name,printout=True):
+    def _run_requests(self,requests,timeout=None):
+        """Sends requests to the dashboard together on one connection from the pool, and waits for all of their responses. If the 
+        connection turns out to be broken, reconnects and tries again, as long as nothing is lost by sending the requests twice.
+        
+        :param requests: The dicts to send to the dashboard
+        :type requests: list
+        :param timeout: How long to wait for all of the responses, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: The results, in order
+        :rtype: list"""
+        deadline = self._deadline(timeout)
+        while True:
+            connection = self._checkout(deadline)
+            ids = self._new_ids(len(requests))
+            sent = False
+            try:
+                connection.sock.settimeout(None if deadline is None else max(0.001,deadline-time.monotonic()))
+                connection.sock.sendall(b"".join(connection.encode(dict(r,id=i)) for (r,i) in zip(requests,ids)))
+                sent = True
+                results = [connection.receive_response(i,deadline) for i in ids]
+            except TimeoutError:
+                self._discard(connection) # A late reply would be mistaken for the next command's
+                raise TimeoutError("Timed out waiting for the dashboard to reply to "+", ".join(r['cmd'] for r in requests)+".")
+            except OSError as e:
+                self._discard(connection)
+                if not self.reconnect or (sent and any(r['cmd'] not in IDEMPOTENT_COMMANDS for r in requests)):
+                    raise Exception("The connection to the dashboard was lost while running "+", ".join(r['cmd'] for r in requests)
+                        +"; it may or may not have run. ("+str(e)+")")
+                continue
+            except Exception:
+                self._discard(connection)
+                raise
+            self._checkin(connection)
+            return results
+
+    def _subscription_request(self,to_send,timeout=None,retry=True):
+        """Sends a request on the subscription connection, opening it if need be, and waits for its response. Call with 
+        subscription_lock held. Events that arrive in the meantime are left on the connection for _collect_events.
+        
+        :param to_send: The dict to send to the dashboard
+        :type to_send: dict
+        :param timeout: How long to wait for the response, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :param retry: Whether to reconnect and send the request again if the connection turns out to be broken. Defaults to True.
+        :type retry: bool, optional
+        :return: The dashboard's reply
+        :rtype: str"""
+        deadline = self._deadline(timeout)
+        while True:
+            try:
+                connection = self._subscription_connection()
+                request_id = self._new_ids(1)[0]
+                connection.sock.settimeout(None if deadline is None else max(0.001,deadline-time.monotonic()))
+                connection.sock.sendall(connection.encode(dict(to_send,id=request_id)))
+                return connection.receive_response(request_id,deadline)
+            except TimeoutError:
+                self._drop_subscription_connection()
+                raise TimeoutError("Timed out waiting for the dashboard to reply to "+to_send['cmd']+".")
+            except OSError as e:
+                self._drop_subscription_connection()
+                if not (retry and self.reconnect): # Otherwise, subscriptions are renewed on the new connection, so it's safe to try again
+                    raise Exception("The connection to the dashboard was lost while running "+to_send['cmd']+". ("+str(e)+")")
+
+    def _subscription_connection(self):
+        """Gets the connection subscriptions are made on, opening it, and renewing any subscriptions, if it isn't open.
+        
+        :return: The connection
+        :rtype: pyopticon.socket_client._ClientConnection"""
+        if self.subscription_connection is not None and self.subscription_connection.is_alive():
+            return self.subscription_connection
+        if self.subscription_connection is not None:
+            self._drop_subscription_connection()
+        if self.closed:
+            raise Exception("The socket client has been closed.")
+        connection = self._open_connection()
+        self.subscription_connection = connection
+        for (subscription_id,to_send) in list(self.subscriptions.items()):
+            request_id = self._new_ids(1)[0]
+            try:
+                connection.sock.settimeout(self.timeout)
+                connection.sock.sendall(connection.encode(dict(to_send,id=request_id)))
+                result = connection.receive_response(request_id,self._deadline(None))
+            except OSError:
+                self._drop_subscription_connection()
+                raise
+            if not isinstance(result,dict):
+                print("Couldn't renew subscription "+str(subscription_id)+" after reconnecting: "+str(result))
+                del self.subscriptions[subscription_id]
+                continue
+            self.subscription_ids[result['subscription']] = subscription_id
+            for (nickname,field_name,value,timestamp) in result['values']: # Let the client see any changes it missed
+                connection.events.append({'event':'change','subscription':result['subscription'],'widget_nickname':nickname,
+                    'field_name':field_name,'value':value,'timestamp':timestamp})
+        return connection
+
+    def _drop_subscription_connection(self):
+        """Closes the subscription connection after it breaks. Its subscriptions are renewed when it's next opened."""
+        if self.subscription_connection is not None:
+            self._collect_events()
+            self.subscription_connection.sock.close()
+            self.subscription_connection = None
+            self.subscription_ids = dict()
+
+    def _collect_events(self):
+        """Moves events received on the subscription connection into the event buffer, giving them the client's subscription ids."""
+        connection = self.subscription_connection
+        if connection is None:
+            return
+        for event in connection.events:
+            if event['subscription'] in self.subscription_ids.keys():
+                self.events.append(dict(event,subscription=self.subscription_ids[event['subscription']]))
+        connection.events = []
+
+    def subscribe(self,targets,deadband=None,min_interval=0,printout=True,timeout=None):
+        """Asks the dashboard to push an event to this client whenever certain fields change, rather than having to poll them. 
+        Events arrive on a connection of their own, kept out of the pool; fetch them with get_events. Each event is a dict with keys 
+        'event' ('change'), 'subscription' (the id returned here), 'widget_nickname', 'field_name', 'value' (as text, like get_field 
+        returns), and 'timestamp' (when the value was set, in seconds since the epoch).
+        
+        :param targets: What to watch: a list of (widget nickname, field name) pairs, or of widget nicknames alone to watch all of a widget's fields
+        :type targets: list
+        :param deadband: Only send a change to a numeric field if it differs by at least this much from the last value sent. Defaults to None, meaning every change is sent.
+        :type deadband: float, optional
+        :param min_interval: Send events for any one field at most this often, in seconds; the latest value is sent once the interval is up. Defaults to 0.
+        :type min_interval: float, optional
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: A dict with keys 'subscription' (the subscription's id) and 'values' (a list of [widget nickname, field name, value, timestamp] lists with the watched fields' current values), or an error message
+        :rtype: dict"""
+        targets = [[t] if isinstance(t,str) else list(t) for t in targets]
+        to_send = {'cmd':"Subscribe",'targets':targets,'deadband':deadband,'min_interval':min_interval,'printout':printout}
+        with self.subscription_lock:
+            result = self._subscription_request(to_send,timeout)
+            if isinstance(result,dict):
+                self.subscriptions_made += 1
+                self.subscriptions[self.subscriptions_made] = to_send
+                self.subscription_ids[result['subscription']] = self.subscriptions_made
+                result = dict(result,subscription=self.subscriptions_made)
+            self._collect_events()
+        self._check_errors(to_send['cmd'],result)
+        return result
+
+    def unsubscribe(self,subscription_id,printout=True,timeout=None):
+        """Stops a subscription made with subscribe. Events already received stay in the event buffer.
+        
+        :param subscription_id: The subscription's id
+        :type subscription_id: int
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        """
+        with self.subscription_lock:
+            if subscription_id not in self.subscriptions.keys():
+                result = "Error: No subscription with id "+str(subscription_id)
+            else:
+                del self.subscriptions[subscription_id] # So it isn't renewed, whatever happens next
+                self._collect_events()
+                dashboard_ids = [k for (k,v) in self.subscription_ids.items() if v==subscription_id]
+                result = "Success"
+                if self.subscription_connection is not None and len(dashboard_ids)>0:
+                    del self.subscription_ids[dashboard_ids[0]]
+                    to_send = {'cmd':"Unsubscribe",'subscription':dashboard_ids[0],'printout':printout}
+                    try:
+                        result = self._subscription_request(to_send,timeout,retry=False)
+                    except TimeoutError:
+                        raise
+                    except Exception:
+                        pass # The connection dropped, taking the subscription with it
+                    self._collect_events()
+        self._check_errors("Unsubscribe",result)
+        return result
+
+    def get_events(self,timeout=0):
+        """Gets and removes all change events received from subscriptions so far, oldest first. If there are none, waits up to 
+        timeout seconds for some to arrive.
+        
+        :param timeout: How long to wait if there are no events yet, in seconds. Defaults to 0.
+        :type timeout: float, optional
+        :return: The events; see subscribe
+        :rtype: list"""
+        deadline = time.monotonic()+timeout
+        with self.subscription_lock:
+            while len(self.subscriptions)>0:
+                try:
+                    connection = self._subscription_connection()
+                    if len(connection.events)==0 and len(self.events)==0:
+                        connection.receive_messages(max(deadline,time.monotonic()+0.001))
+                    else:
+                        connection.receive_messages(time.monotonic()+0.001) # Only take what's already arrived
+                except TimeoutError:
+                    pass
+                except OSError:
+                    self._drop_subscription_connection() # Reconnected, and subscriptions renewed, next time round
+                    if not self.reconnect:
+                        raise Exception("The connection to the dashboard was lost.")
+                self._collect_events()
+                if len(self.events)>0 or time.monotonic()>=deadline:
+                    break
+            out = list(self.events)
+            self.events.clear()
+        return out
+
+    def pipeline(self):
+        """Get a pipeline, which collects commands and then sends them to the dashboard all at once, so that many commands cost 
+        one round trip through the socket rather than one each. The pipeline has the same command methods as the client (get_field, 
+        set_field, do_confirm, ...), which queue commands instead of running them; execute() sends them and returns their results, 
+        in order. For example:
+        
+        ``p = client.pipeline()``
+        ``p.get_field('MFC 1','Actual Flow')``
+        ``p.get_field('MFC 2','Actual Flow')``
+        ``flow_1, flow_2 = p.execute()``
+        
+        :return: A new, empty pipeline
+        :rtype: pyopticon.socket_client.SocketPipeline"""
+        return SocketPipeline(self)
+
+    def get_field(self,widget_nickname,field_name,printout=True,timeout=None):
         """Gets the current value of a field from the dashboard via the socket.
         
         :param widget_nickname: The nickname of the widget to query
@@ -61,14 +572,17 @@ class PyOpticonSocketClient:
         :type field_name: str
         :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
         :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
         :return: The current value of the specified field.
         :rtype: str"""
         to_send = {'cmd':"Get",'widget_nickname':widget_nickname,'field_name':field_name,'printout':printout}
-        result = self._query_socket(to_send)
+        result = self._query_socket(to_send,timeout)
         return result
 
-    def set_field(self,widget_nickname,field_name,new_value,printout=True):
-        """Sets the value of a field to a specified value via the socket.
+    def set_field(self,widget_nickname,field_name,new_value,printout=True,timeout=None,confirm=False,wait=False):
+        """Sets the value of a field to a specified value via the socket. The field has its new value by the time this returns, so a 
+        get_field right afterwards sees it.
         
         :param widget_nickname: The nickname of the widget whose field to set
         :type widget_nickname: str
@@ -78,24 +592,83 @@ class PyOpticonSocketClient:
         :type new_value: str
         :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
         :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :param confirm: Whether to execute the widget's confirm method afterwards, as do_confirm does. Defaults to False.
+        :type confirm: bool, optional
+        :param wait: Whether to wait for the widget's confirm method to finish running in the dashboard before replying, so that, e.g., the command has been sent to the device by the time this returns. If the confirm method raises an exception, it's reported as an error. Use a timeout long enough for the confirm method. Defaults to False.
+        :type wait: bool, optional
         """
         to_send = {'cmd':"Set",'widget_nickname': widget_nickname,'field_name':field_name,'new_value':new_value,'printout':printout}
-        result = self._query_socket(to_send)
+        if confirm:
+            to_send.update(confirm=True,wait=wait) # Only sent when needed, so older dashboards still understand the request
+        result = self._query_socket(to_send,timeout)
         return result
 
-    def do_confirm(self,widget_nickname,printout=True):
+    def get_fields(self,fields,printout=True,timeout=None):
+        """Gets the current values of several fields at once, in one round trip through the socket.
+        
+        :param fields: (widget nickname, field name) pairs, e.g. [('MFC 1','Actual Flow'),('MFC 2','Actual Flow')]
+        :type fields: list
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: The fields' current values, in the same order, or an error message
+        :rtype: list"""
+        to_send = {'cmd':"GetFields",'fields':[list(pair) for pair in fields],'printout':printout}
+        result = self._query_socket(to_send,timeout)
+        return result
+
+    def get_snapshot(self,printout=True,timeout=None):
+        """Gets the current value of every logged field of every widget, in one round trip through the socket.
+        
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: A dict mapping widgets' nicknames to dicts of their logged fields' names and current values, or an error message
+        :rtype: dict"""
+        to_send = {'cmd':"GetSnapshot",'printout':printout}
+        result = self._query_socket(to_send,timeout)
+        return result
+
+    def set_fields(self,fields,confirm=True,printout=True,timeout=None,wait=False):
+        """Sets several fields at once and, optionally, executes the confirm method of each widget that was changed, in one round 
+        trip through the socket. Every widget and field is checked before any is set, so if one doesn't exist, nothing is changed.
+        
+        :param fields: (widget nickname, field name, new value) tuples
+        :type fields: list
+        :param confirm: Whether to execute the changed widgets' confirm methods afterwards. Defaults to True.
+        :type confirm: bool, optional
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :param wait: Whether to wait for every changed widget's confirm method to finish running in the dashboard before replying, so that, e.g., the command has been sent to the device by the time this returns. If a confirm method raises an exception, it's reported as an error. Use a timeout long enough for the confirm method. Defaults to False.
+        :type wait: bool, optional
+        """
+        to_send = {'cmd':"SetFields",'fields':[list(f) for f in fields],'confirm':confirm,'printout':printout,'wait':wait}
+        result = self._query_socket(to_send,timeout)
+        return result
+
+    def do_confirm(self,widget_nickname,printout=True,timeout=None,wait=False):
         """Executes a widget's 'confirm' method via the socket.
         
         :param widget_nickname: The nickname of the widget to confirm
         :type widget_nickname: str
         :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
         :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :param wait: Whether to wait for the widget's confirm method to finish running in the dashboard before replying, so that, e.g., the command has been sent to the device by the time this returns. If the confirm method raises an exception, it's reported as an error. Use a timeout long enough for the confirm method. Defaults to False.
+        :type wait: bool, optional
         """
-        to_send = {'cmd':"Confirm",'widget_nickname':widget_nickname,'printout':printout}
-        result = self._query_socket(to_send)
+        to_send = {'cmd':"Confirm",'widget_nickname':widget_nickname,'printout':printout,'wait':wait}
+        result = self._query_socket(to_send,timeout)
         return result
 
-    def do_eval(self,expression,printout=True):
+    def do_eval(self,expression,printout=True,timeout=None):
         """Tells the dashboard to evaluate an expression and return the result. Eval is run in a namespace containing the methods 
         get_dashboard(), which returns a dashboard object, and do_threadsafe(f), which executes a function f in the main GUI thread.
         
@@ -103,12 +676,14 @@ class PyOpticonSocketClient:
         :type widget_nickname: str
         :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
         :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
         """
         to_send = {'cmd':"Eval",'code':expression,'printout':printout}
-        result = self._query_socket(to_send)
+        result = self._query_socket(to_send,timeout)
         return result
 
-    def do_exec(self,fn,printout=True):
+    def do_exec(self,fn,printout=True,timeout=None):
         """Tells the dashboard to execute a given function. Exec is run in a namespace containing the methods 
         get_dashboard(), which returns a dashboard object, and do_threadsafe(f), which executes a function f in the main GUI thread. 
         
@@ -122,15 +697,147 @@ class PyOpticonSocketClient:
         :type widget_nickname: function or str
         :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
         :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
         """
         code =  inspect.getsource(fn)
         to_send = {'cmd':"Exec",'code':code,'printout':printout}
-        result = self._query_socket(to_send)
+        result = self._query_socket(to_send,timeout)
+        return result
+
+    def register(self,fn,printout=True,timeout=None):
+        """Sends a function to the dashboard once, to be called later with invoke as often as needed without sending or compiling 
+        its source again. The function runs in the same namespace as do_exec (with get_dashboard() and do_threadsafe(f)), and, like 
+        do_exec, must be defined separately rather than inline in the register call. Registering the same function again returns 
+        the same handle. If the dashboard is restarted, invoke registers the function again automatically.
+        
+        :param fn: The function, or its source as a string
+        :type fn: function or str
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: The function's handle, to pass to invoke, or an error message
+        :rtype: str
+        """
+        code = fn if isinstance(fn,str) else inspect.getsource(fn)
+        to_send = {'cmd':"Register",'code':code,'printout':printout}
+        result = self._query_socket(to_send,timeout)
+        if not result.startswith("Error"):
+            self.registered[result] = code
+        return result
+
+    def invoke(self,handle,args=(),kwargs=None,printout=True,timeout=None):
+        """Calls a function registered with register, in the dashboard, and returns what it returns, as text (like do_eval).
+        
+        :param handle: The handle returned by register
+        :type handle: str
+        :param args: Positional arguments for the function. They must survive being sent as JSON. Defaults to ().
+        :type args: tuple, optional
+        :param kwargs: Keyword arguments for the function. Defaults to None, meaning none.
+        :type kwargs: dict, optional
+        :param printout: Whether the dashboard should print to its own console a record that the socket command was received. Defaults to True.
+        :type printout: bool, optional
+        :param timeout: How long to wait for the dashboard's reply, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        :return: The function's return value as a string, or an error message
+        :rtype: str
+        """
+        to_send = {'cmd':"Invoke",'handle':handle,'args':list(args),'kwargs':dict() if kwargs is None else kwargs,'printout':printout}
+        result = self._run_requests([to_send],timeout)[0]
+        if result=="Error: No registered function with handle "+str(handle) and handle in self.registered.keys():
+            # The dashboard has been restarted since the function was registered
+            register = {'cmd':"Register",'code':self.registered[handle],'printout':printout}
+            result = self._run_requests([register,to_send],timeout)[1]
+        self._check_errors(to_send['cmd'],result)
         return result
 
     def close(self):
-        """Send a message via the socket telling the Dashboard to close the socket on its end. Close the socket connection on the client end."""
-        self.socket_obj.send(json.dumps({'cmd':"Close"}).encode())
-        self.socket_obj.close()
+        """Send a message via the socket telling the Dashboard to close the socket on its end. Close the socket connection on the client end.
+        Closes every connection in the pool, and the subscription connection; connections in use by other threads are closed when 
+        their commands finish."""
+        with self.lock:
+            self.closed = True
+            idle = self.idle_connections
+            self.idle_connections = []
+            self.open_connections -= len(idle)
+            self.pool_changed.notify_all()
+        for connection in idle:
+            connection.close()
+        with self.subscription_lock:
+            if self.subscription_connection is not None:
+                self.subscription_connection.close()
+                self.subscription_connection = None
+            self.subscriptions = dict()
         print("Socket closed successfully.")
 
+class SocketPipeline(PyOpticonSocketClient):
+    """A batch of socket commands to be sent to the dashboard together; see PyOpticonSocketClient.pipeline. Calling a command method 
+    only queues the command, and returns None.
+    
+    :param client: The client whose connection the pipeline uses
+    :type client: pyopticon.socket_client.PyOpticonSocketClient
+    """
+
+    def __init__(self,client):
+        """Constructor for a pipeline. Doesn't open a connection of its own."""
+        self.client = client
+        self.requests = []
+
+    def _query_socket(self,to_send,timeout=None):
+        """Queues a request instead of sending it. The timeout is ignored; give one to execute() instead.
+        
+        :param to_send: The dict to send to the dashboard.
+        :type to_send: dict
+        :param timeout: Ignored
+        :type timeout: float, optional"""
+        self.requests.append(to_send)
+
+    def execute(self,timeout=None):
+        """Sends all of the queued commands at once, on one connection, waits for all of their results, and empties the pipeline. 
+        Errors are handled for each command according to the client's handle_errors setting.
+        
+        :param timeout: How long to wait for all of the results, in seconds. Defaults to None, meaning the client's timeout.
+        :type timeout: float, optional
+        
+        :return: The commands' results, in the order the commands were queued
+        :rtype: list"""
+        requests = self.requests
+        self.requests = []
+        if len(requests)==0:
+            return []
+        results = self.client._run_requests(requests,timeout)
+        for (to_send,result) in zip(requests,results):
+            self.client._check_errors(to_send['cmd'],result)
+        return results
+
+    def register(self,fn,printout=True,timeout=None):
+        """Queues registering a function, like PyOpticonSocketClient.register, except that the client won't register it again 
+        automatically after a restart."""
+        code = fn if isinstance(fn,str) else inspect.getsource(fn)
+        self._query_socket({'cmd':"Register",'code':code,'printout':printout})
+
+    def invoke(self,handle,args=(),kwargs=None,printout=True,timeout=None):
+        """Queues calling a registered function, like PyOpticonSocketClient.invoke, except that it isn't registered again 
+        automatically if the dashboard has been restarted."""
+        self._query_socket({'cmd':"Invoke",'handle':handle,'args':list(args),'kwargs':dict() if kwargs is None else kwargs,'printout':printout})
+
+    def subscribe(self,*args,**kwargs):
+        """Subscriptions can't be pipelined."""
+        raise Exception("Call subscribe() on the client, not on a pipeline.")
+
+    def unsubscribe(self,*args,**kwargs):
+        """Subscriptions can't be pipelined."""
+        raise Exception("Call unsubscribe() on the client, not on a pipeline.")
+
+    def get_events(self,*args,**kwargs):
+        """Pipelines don't receive events."""
+        raise Exception("Call get_events() on the client, not on a pipeline.")
+
+    def pipeline(self):
+        """Pipelines can't be nested."""
+        raise Exception("Call pipeline() on the client, not on a pipeline.")
+
+    def close(self):
+        """Pipelines have no connection of their own to close."""
+        raise Exception("Close the client, not the pipeline.")
@@ -1,2 +1,3 @@
 from .gmail_helper import GmailHelper
-from .serial_port_scanner import scan_serial_ports
\ No newline at end of file
+from .serial_port_scanner import scan_serial_ports
+from .log_reader import read_log, iter_log_chunks, list_log_schemas
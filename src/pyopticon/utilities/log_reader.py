@@ -0,0 +1,267 @@
+import io
+import gzip
+import datetime
+import itertools
+import numpy as np
+from .._system._log_rotation import list_log_segments
+import os
+from .._system._log_writers import iter_npz_chunks, read_log_index, TEXT_KEY, _split_text, _select_rows, _concatenate_chunks
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def read_log(filename, columns=None, start=None, end=None, include_segments=True, chunk_rows=100000):
+    """ Load a data logfile written by a dashboard into NumPy arrays, one per column. CSV logfiles are read in chunks of chunk_rows
+    rows, and their Date and Timestamp columns are parsed all at once per chunk rather than row by row, so even very large logfiles
+    load quickly. Binary .npz logfiles are read chunk by chunk with iter_npz_chunks. If the logfile has been rotated, its older segments (e.g.
+    run.0001.csv.gz, run.0002.csv, ...) are read first, in order, followed by the file itself.
+
+    For example, to plot one flow rate over one afternoon:
+
+    ``data = read_log('run.csv', columns=['MFC 1: Actual Flow'], start=datetime.datetime(2024,5,1,12), end=datetime.datetime(2024,5,1,18))``
+
+    :param filename: The path of the logfile
+    :type filename: str
+    :param columns: The names of the columns to load, e.g. ['MFC 1: Actual Flow']. Defaults to None, meaning all columns.
+    :type columns: list, optional
+    :param start: Only load rows logged at or after this time, as a datetime.datetime or seconds since the epoch. Defaults to None.
+    :type start: datetime.datetime or float, optional
+    :param end: Only load rows logged before this time, as a datetime.datetime or seconds since the epoch. Defaults to None.
+    :type end: datetime.datetime or float, optional
+    :param include_segments: Whether to also read the logfile's rotated segments. Defaults to True.
+    :type include_segments: bool, optional
+    :param chunk_rows: How many rows of a CSV file to parse at once. Defaults to 100000.
+    :type chunk_rows: int, optional
+    :return: A dict mapping 'Timestamp' to an array of float64 seconds since the epoch, each column name to a float64 array of its values, with NaN where a value is blank or isn't a number (e.g. 'No Reading'), and '#text' to a dict mapping column names to (row indices, text) pairs of arrays holding those values that aren't numbers. Columns missing from part of the log are padded with NaN. Rows whose date or time is malformed, such as a last row cut off by a crash, are skipped.
+    :rtype: dict
+    """
+    return _concatenate_chunks(list(iter_log_chunks(filename,columns,start,end,include_segments,chunk_rows)))
+
+def iter_log_chunks(filename, columns=None, start=None, end=None, include_segments=True, chunk_rows=100000):
+    """ Like read_log, but rather than loading the whole logfile at once, yield it one chunk at a time, so logfiles bigger than
+    memory can be processed piece by piece. Each chunk is a dict like the one read_log returns, for up to chunk_rows rows of a CSV 
+    logfile, or one chunk of an .npz logfile (see NpzLogWriter).
+
+    :param filename: The path of the logfile
+    :type filename: str
+    :param columns: The names of the columns to load. Defaults to None, meaning all columns.
+    :type columns: list, optional
+    :param start: Only load rows logged at or after this time. Defaults to None.
+    :type start: datetime.datetime or float, optional
+    :param end: Only load rows logged before this time. Defaults to None.
+    :type end: datetime.datetime or float, optional
+    :param include_segments: Whether to also read the logfile's rotated segments. Defaults to True.
+    :type include_segments: bool, optional
+    :param chunk_rows: The maximum number of rows per chunk. Defaults to 100000.
+    :type chunk_rows: int, optional
+    :return: A generator of dicts mapping column names to arrays
+    :rtype: generator
+    """
+    start = start.timestamp() if isinstance(start,datetime.datetime) else start
+    end = end.timestamp() if isinstance(end,datetime.datetime) else end
+    segments = list_log_segments(filename) if include_segments else [filename]
+    if len(segments)==0:
+        raise Exception("No logfile found at "+str(filename))
+    for segment in segments:
+        if segment.endswith('.npz'):
+            chunks = iter_npz_chunks(segment)
+        else:
+            chunks = _iter_csv_chunks(segment,columns,chunk_rows,start)
+        for chunk in chunks:
+            if len(chunk['Timestamp'])==0:
+                continue
+            if columns is not None:
+                chunk = dict((k,v) for (k,v) in chunk.items() if k=='Timestamp' or k==TEXT_KEY or k in columns)
+                chunk[TEXT_KEY] = dict((k,v) for (k,v) in chunk.get(TEXT_KEY,dict()).items() if k in columns)
+            if start is not None or end is not None:
+                t = chunk['Timestamp']
+                keep = np.ones(len(t),dtype=bool)
+                if start is not None:
+                    keep &= (t>=start)
+                if end is not None:
+                    keep &= (t<end)
+                if not keep.all():
+                    chunk = _select_rows(chunk,keep)
+                if len(chunk['Timestamp'])==0:
+                    continue
+            yield chunk
+
+def list_log_schemas(filename):
+    """ List the schema blocks of a CSV logfile (not including its rotated segments). A new schema block starts whenever logging
+    restarts with different columns. This uses the logfile's index, so only the header of each block is read.
+
+    :param filename: The path of the logfile
+    :type filename: str
+    :return: A list with one dict per schema block, in order, with keys 'schema' (its number), 'offset' (the byte offset where the block starts), 'first_timestamp' (when its first row was logged, in seconds since the epoch, or NaN if unknown), and 'columns' (its column names, excluding Date and Timestamp)
+    :rtype: list
+    """
+    if not os.path.isfile(filename+'.idx'):
+        raise Exception("Logfile "+str(filename)+" has no index. Its index is created when a dashboard next logs to it.")
+    out = []
+    with _open_text(filename) as f:
+        for (schema,offset,first) in read_log_index(filename):
+            f.seek(offset)
+            line = f.readline()
+            if line.startswith('#schema='):
+                line = f.readline()
+            out.append({'schema':schema,'offset':offset,'first_timestamp':first,'columns':line.rstrip('\r\n').split(',')[2:]})
+    return out
+
+def _open_text(path):
+    """Open a logfile or rotated segment for reading as text, decompressing it if needed.
+
+    :param path: The path of the file
+    :type path: str
+    :return: The open file
+    :rtype: io.TextIOBase
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path,'rt')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise Exception("Reading "+str(path)+" needs the zstandard package (pip install zstandard).")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path,'rb'),closefd=True))
+    return open(path,'r',encoding='utf-8',newline='')
+
+def _iter_csv_chunks(path, columns, chunk_rows, start=None):
+    """Yield the rows of one CSV logfile or segment as dicts of arrays, chunk_rows rows at a time. Each schema block's header row
+    sets the columns for the rows after it. If the file has an index and a start time is given, reading starts at the last schema
+    block that began before the start time, rather than at the top of the file.
+
+    :param path: The path of the file
+    :type path: str
+    :param columns: The names of the columns to parse, or None for all
+    :type columns: list
+    :param chunk_rows: The maximum number of rows per chunk
+    :type chunk_rows: int
+    :param start: Rows before this time, in seconds since the epoch, may be skipped. Defaults to None.
+    :type start: float, optional
+    """
+    offset = 0
+    if start is not None and os.path.isfile(path+'.idx'):
+        for (schema,block_offset,first) in read_log_index(path):
+            if first<=start: # NaN, meaning unknown, compares False
+                offset = block_offset
+            elif not np.isnan(first):
+                break
+    with _open_text(path) as f:
+        if offset>0:
+            f.seek(offset)
+        names = None
+        while True:
+            lines = list(itertools.islice(f,chunk_rows))
+            if len(lines)==0:
+                return
+            block = []
+            for line in lines:
+                if not line.endswith('\n'): # The last line, cut off part way through being written
+                    continue
+                line = line.rstrip('\r\n')
+                if line=='' or line.startswith('#'): # '#schema=<n>' lines are followed by the schema's header row
+                    continue
+                if line.startswith('Date,Timestamp'):
+                    if len(block)>0:
+                        yield _parse_csv_rows(names,block,columns)
+                        block = []
+                    names = line.split(',')[2:]
+                    continue
+                block.append(line)
+            if len(block)>0:
+                if names is None:
+                    raise Exception("Logfile "+str(path)+" doesn't start with a header row.")
+                yield _parse_csv_rows(names,block,columns)
+
+def _parse_csv_rows(names, lines, columns):
+    """Parse rows of a CSV logfile into arrays.
+
+    :param names: The column names from the header, excluding Date and Timestamp
+    :type names: list
+    :param lines: The rows, as text without newlines
+    :type lines: list
+    :param columns: The names of the columns to parse, or None for all
+    :type columns: list
+    :return: A dict mapping 'Timestamp' and the column names to arrays
+    :rtype: dict
+    """
+    n_fields = len(names)+2
+    rows = [line.split(',',n_fields-1) for line in lines]
+    for row in rows:
+        if len(row)<n_fields:
+            row.extend(['']*(n_fields-len(row)))
+    cells = np.array(rows,dtype=str)
+    valid = _valid_timestamps(cells[:,0],cells[:,1])
+    if not valid.all():
+        cells = cells[valid]
+    out = {'Timestamp':_parse_timestamps(cells[:,0],cells[:,1]),TEXT_KEY:dict()}
+    for j in range(len(names)):
+        if columns is not None and names[j] not in columns:
+            continue
+        (out[names[j]],text_rows,text) = _split_text(cells[:,j+2])
+        if len(text_rows)>0:
+            out[TEXT_KEY][names[j]] = (text_rows,text)
+    return out
+
+def _valid_timestamps(dates, times):
+    """Check which rows' Date and Timestamp cells are complete and well formed (mm/dd/YYYY and HH:MM:SS, optionally with .fff).
+
+    :param dates: The dates
+    :type dates: numpy.ndarray
+    :param times: The times
+    :type times: numpy.ndarray
+    :return: Whether each row is valid
+    :rtype: numpy.ndarray of bool
+    """
+    ascii = np.array([d.isascii() and t.isascii() for (d,t) in zip(dates.tolist(),times.tolist())],dtype=bool)
+    if not ascii.all():
+        dates = np.where(ascii,dates,'')
+        times = np.where(ascii,times,'')
+    d = np.char.ljust(dates,10).astype('S10').view(np.uint8).reshape(-1,10)
+    t = np.char.ljust(times,12).astype('S12').view(np.uint8).reshape(-1,12)
+    is_digit = lambda chars, positions: ((chars[:,positions]>=ord('0')) & (chars[:,positions]<=ord('9'))).all(axis=1)
+    time_length = np.char.str_len(times)
+    valid = ascii & (np.char.str_len(dates)==10) & ((time_length==8) | (time_length==12))
+    valid &= is_digit(d,[0,1,3,4,6,7,8,9]) & (d[:,2]==ord('/')) & (d[:,5]==ord('/'))
+    valid &= is_digit(t,[0,1,3,4,6,7]) & (t[:,2]==ord(':')) & (t[:,5]==ord(':'))
+    valid &= (time_length==8) | ((t[:,8]==ord('.')) & is_digit(t,[9,10,11]))
+    return valid
+
+def _digits(chars, first, count):
+    """Read a run of decimal digits at the same position in every row of a 2-D array of ASCII codes.
+
+    :param chars: An array of ASCII codes, one row per string
+    :type chars: numpy.ndarray
+    :param first: The index of the first digit
+    :type first: int
+    :param count: How many digits
+    :type count: int
+    :return: The numbers
+    :rtype: numpy.ndarray
+    """
+    out = np.zeros(len(chars),dtype=np.int64)
+    for i in range(first,first+count):
+        out = out*10+(chars[:,i].astype(np.int64)-48)
+    return out
+
+def _parse_timestamps(dates, times):
+    """Convert the Date (mm/dd/YYYY) and Timestamp (HH:MM:SS, optionally with .fff) columns to seconds since the epoch, for a whole
+    chunk at once. Every row must have passed _valid_timestamps. The logged times are local times, so they're converted using the local UTC offset for each hour that appears.
+
+    :param dates: The dates
+    :type dates: numpy.ndarray
+    :param times: The times
+    :type times: numpy.ndarray
+    :return: The timestamps, in seconds since the epoch
+    :rtype: numpy.ndarray
+    """
+    d = np.char.ljust(dates,10).astype('S10').view(np.uint8).reshape(-1,10)
+    t = np.char.ljust(times,12).astype('S12').view(np.uint8).reshape(-1,12)
+    iso = d[:,[6,7,8,9,5,0,1,5,3,4]].copy() # YYYY/mm/dd
+    iso[:,4] = iso[:,7] = ord('-')
+    days = iso.view('S10').ravel().astype('datetime64[D]').astype(np.int64)
+    naive = days*86400+_digits(t,0,2)*3600+_digits(t,3,2)*60+_digits(t,6,2)
+    millis = np.where(t[:,8]==ord('.'),_digits(t[:,9:12],0,3),0)
+    # Local time to epoch time. The UTC offset only changes on the hour, so look it up once per distinct hour.
+    hours, inverse = np.unique(naive//3600,return_inverse=True)
+    offsets = np.array([(datetime.datetime(1970,1,1)+datetime.timedelta(hours=int(h))).timestamp()-int(h)*3600 for h in hours],dtype=np.int64)
+    return (naive+offsets[inverse.ravel()]).astype(np.float64)+millis/1000